@@ -19,10 +19,85 @@ class Settings(BaseSettings):
     xai_base_url: str = "https://api.groq.com/openai/v1"
     xai_model: str = "llama-3.3-70b-versatile"
     
+    # LLM gateway: concurrency cap, per-request budget and retry policy
+    request_budget_seconds: float = float(os.getenv("REQUEST_BUDGET_SECONDS", "15"))
+    llm_timeout: float = float(os.getenv("LLM_TIMEOUT", "8"))
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+    llm_max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    llm_retry_base_delay: float = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.2"))
+    llm_retry_max_delay: float = float(os.getenv("LLM_RETRY_MAX_DELAY", "2.0"))
+    llm_min_attempt_seconds: float = float(os.getenv("LLM_MIN_ATTEMPT_SECONDS", "0.5"))
+
+    # Circuit breaker per model: opens on failure rate or slow-call rate over the
+    # last llm_breaker_window calls, then fails fast for llm_breaker_open_seconds
+    llm_breaker_window: int = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+    llm_breaker_min_calls: int = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+    llm_breaker_failure_rate: float = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+    llm_breaker_slow_seconds: float = float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "5"))
+    llm_breaker_slow_rate: float = float(os.getenv("LLM_BREAKER_SLOW_RATE", "0.5"))
+    llm_breaker_open_seconds: float = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+    # Optional hedge model and/or endpoint (empty = no hedging); an attempt still
+    # running after the primary's p95 latency (llm_hedge_delay until enough
+    # samples exist) is duplicated to it
+    llm_hedge_model: str = os.getenv("LLM_HEDGE_MODEL", "")
+    llm_hedge_base_url: str = os.getenv("LLM_HEDGE_BASE_URL", "")
+    llm_hedge_api_key: str = os.getenv("LLM_HEDGE_API_KEY", "")
+    llm_hedge_delay: float = float(os.getenv("LLM_HEDGE_DELAY", "1.5"))
+    llm_hedge_min_delay: float = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.3"))
+    # Adaptive admission control (AIMD): requests beyond the limit get an immediate
+    # fallback answer; LLM calls beyond theirs are skipped (General Support, 0.0)
+    admission_enabled: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    admission_backoff: float = float(os.getenv("ADMISSION_BACKOFF", "0.7"))
+    admission_initial_limit: float = float(os.getenv("ADMISSION_INITIAL_LIMIT", "16"))
+    admission_min_limit: float = float(os.getenv("ADMISSION_MIN_LIMIT", "2"))
+    admission_max_limit: float = float(os.getenv("ADMISSION_MAX_LIMIT", "128"))
+    admission_latency_target: float = float(os.getenv("ADMISSION_LATENCY_TARGET", "8.0"))
+    llm_admission_initial_limit: float = float(os.getenv("LLM_ADMISSION_INITIAL_LIMIT", "8"))
+    llm_admission_min_limit: float = float(os.getenv("LLM_ADMISSION_MIN_LIMIT", "2"))
+    llm_admission_max_limit: float = float(os.getenv("LLM_ADMISSION_MAX_LIMIT", "64"))
+    llm_admission_latency_target: float = float(os.getenv("LLM_ADMISSION_LATENCY_TARGET", "3.0"))
+    # Concurrent intent analyses arriving within the window share one multi-item
+    # prompt (up to llm_batch_size items; 1 disables batching)
+    llm_batch_size: int = int(os.getenv("LLM_BATCH_SIZE", "8"))
+    llm_batch_window_ms: float = float(os.getenv("LLM_BATCH_WINDOW_MS", "5"))
+
     # External Tools
+    ffmpeg_timeout: float = float(os.getenv("FFMPEG_TIMEOUT", "20"))
     ffmpeg_path: str = r"C:\Users\HP\AppData\Local\Microsoft\Winget\Packages\Gyan.FFmpeg_Microsoft.Winget.Source_8wekyb3d8bbwe\ffmpeg-8.0.1-full_build\bin\ffmpeg.exe"
 
-    # Application Logic
+    # Audio worker pool (0 = one worker per CPU core)
+    audio_workers: int = int(os.getenv("AUDIO_WORKERS", "0"))
+    audio_job_timeout: float = float(os.getenv("AUDIO_JOB_TIMEOUT", "30"))
+
+    # Speech-to-text engine: "google" (web API) or "vosk" (offline, local model directory)
+    stt_engine: str = os.getenv("STT_ENGINE", "google")
+    stt_model_path: str = os.getenv("STT_MODEL_PATH", "models/vosk-model-small-en-in-0.4")
+
+    # Voice-activity detection: trim leading/trailing silence and long pauses before STT
+    vad_enabled: bool = os.getenv("VAD_ENABLED", "true").lower() == "true"
+    vad_min_energy: float = float(os.getenv("VAD_MIN_ENERGY", "300"))      # int16 RMS (~-40 dBFS)
+    vad_energy_ratio: float = float(os.getenv("VAD_ENERGY_RATIO", "3.0"))  # x noise floor
+    vad_zcr_threshold: float = float(os.getenv("VAD_ZCR_THRESHOLD", "0.25"))
+    vad_padding_ms: int = int(os.getenv("VAD_PADDING_MS", "200"))
+    vad_max_pause_ms: int = int(os.getenv("VAD_MAX_PAUSE_MS", "500"))
+
+    # Intent cache (LRU + TTL, optional JSON persistence across restarts)
+    intent_cache_size: int = int(os.getenv("INTENT_CACHE_SIZE", "5000"))
+    intent_cache_ttl: float = float(os.getenv("INTENT_CACHE_TTL", "86400"))
+    intent_cache_path: str = os.getenv("INTENT_CACHE_PATH", "")
+
+    # Finished /analyze_audio results keyed by upload content hash
+    # (memory LRU, plus a directory of JSON files when AUDIO_CACHE_DIR is set)
+    audio_cache_size: int = int(os.getenv("AUDIO_CACHE_SIZE", "2000"))
+    audio_cache_ttl: float = float(os.getenv("AUDIO_CACHE_TTL", "86400"))
+    audio_cache_dir: str = os.getenv("AUDIO_CACHE_DIR", "")
+    audio_cache_disk_max_entries: int = int(os.getenv("AUDIO_CACHE_DISK_MAX_ENTRIES", "50000"))
+
+    # Hot-reloadable category list: JSON file {"allowed_categories": [...]} watched for changes
+    runtime_config_path: str = os.getenv("RUNTIME_CONFIG_PATH", "")
+    runtime_config_poll_interval: float = float(os.getenv("RUNTIME_CONFIG_POLL_INTERVAL", "5"))
+
+    # Application Logic (defaults; a runtime config file may replace allowed_categories)
     allowed_categories: list[str] = [
         "Billing",
         "Technical Issue",
@@ -1,17 +1,46 @@
 import logging
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
 from config import settings
 from models import AnalysisResponse
-from services.audio import process_audio_file, get_fallback_response
-from services.llm import analyze_intent
+from services.audio import process_audio_bytes, get_fallback_response, audio_executor, get_vad_stats
+from services.admission import AdmissionController
+from services.llm import analyze_intent, get_batching_stats, intent_cache, llm_admission
+from services.llm_gateway import llm_gateway
+from services.result_cache import audio_result_cache, read_and_hash
+from services.runtime_config import runtime_config
 
 # Configure Logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the audio worker pool and warm caches; release them on shutdown."""
+    audio_executor.start()
+    intent_cache.load()
+    await runtime_config.start()
+    yield
+    intent_cache.save()
+    await runtime_config.stop()
+    await llm_gateway.close()
+    audio_executor.shutdown()
+
+# Adaptive cap on concurrent analyses; beyond it callers get the fallback answer at once
+request_admission = AdmissionController(
+    "request admission",
+    initial_limit=settings.admission_initial_limit,
+    min_limit=settings.admission_min_limit,
+    max_limit=settings.admission_max_limit,
+    latency_target=settings.admission_latency_target,
+    backoff=settings.admission_backoff,
+    enabled=settings.admission_enabled
+)
+
 # Initialize FastAPI
-app = FastAPI(title="Smart IVR AI Logic")
+app = FastAPI(title="Smart IVR AI Logic", lifespan=lifespan)
 
 # CORS
 app.add_middleware(
@@ -27,23 +56,69 @@ async def analyze_audio(file: UploadFile = File(...)):
     """
     Receives an audio file, transcribes it, and determines the intent using Grok/Groq.
     """
+    # Whole-request budget; the LLM only gets what audio processing leaves over
+    deadline = time.monotonic() + settings.request_budget_seconds
+    # One category/prompt version for the whole request
+    snapshot = runtime_config.current
+
+    # Overloaded: answer within the SLA instead of queueing behind the AI tier
+    if not request_admission.try_acquire():
+        logger.warning(f"Shedding request at limit {request_admission.limit:.0f}")
+        return get_fallback_response(transcript="System busy", reason="overloaded")
+    started = time.perf_counter()
+    failed = False
+
     try:
+        # Step 0: Identical uploads (telephony retries) reuse the finished analysis
+        data, digest = await read_and_hash(file)
+        cached = await audio_result_cache.get(digest, snapshot.categories_version)
+        if cached is not None:
+            logger.info(f"Audio cache hit: {digest}")
+            return AnalysisResponse(**cached)
+
         # Step 1: Process Audio (Convert & Transcribe)
-        transcript_text, detected_lang = await process_audio_file(file)
+        transcript_text, detected_lang = await process_audio_bytes(data)
         
         if not transcript_text:
             logger.warning("Transcription failed or empty.")
-            return get_fallback_response()
+            return get_fallback_response(reason="no_transcript")
 
         # Step 2: Analyze Intent (LLM)
-        analysis_result = analyze_intent(transcript_text, detected_lang)
+        analysis_result = await analyze_intent(transcript_text, detected_lang, deadline=deadline, snapshot=snapshot)
+
+        # Only cache real analyses; fallbacks (confidence 0.0) should be retried
+        if analysis_result.confidence > 0:
+            await audio_result_cache.set(digest, snapshot.categories_version, analysis_result.model_dump())
         
         return analysis_result
 
     except Exception as e:
+        failed = True
         logger.error(f"Unexpected endpoint error: {e}")
         return get_fallback_response()
 
+    finally:
+        request_admission.release(time.perf_counter() - started, not failed)
+
+@app.get("/metrics")
+async def get_metrics():
+    """
+    Runtime metrics (worker pool load, LLM latency, cache effectiveness).
+    """
+    return {
+        "audio_executor": audio_executor.get_stats(),
+        "vad": get_vad_stats(),
+        "llm": llm_gateway.get_stats(),
+        "intent_batcher": get_batching_stats(),
+        "intent_cache": intent_cache.get_stats(),
+        "audio_result_cache": audio_result_cache.get_stats(),
+        "config": runtime_config.get_stats(),
+        "admission": {
+            "requests": request_admission.get_stats(),
+            "llm": llm_admission.get_stats()
+        }
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host=settings.host, port=settings.port)
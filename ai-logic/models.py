@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel
 
 class AnalysisResponse(BaseModel):
@@ -6,3 +7,6 @@ class AnalysisResponse(BaseModel):
     transcript: str
     intent: str
     confidence: float
+    # Why this is a fallback answer: overloaded, no_transcript, llm_overloaded,
+    # llm_unavailable, llm_error or error (None for a normal analysis)
+    fallback_reason: Optional[str] = None
@@ -0,0 +1,99 @@
+import logging
+import time
+from typing import Any, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionController:
+    """
+    Adaptive concurrency limit (AIMD) for one stage.
+
+    A call is admitted while fewer than `limit` calls are in flight. Every call
+    reports its latency on release: calls within latency_target grow the limit
+    additively (about +1 per `limit` fast calls, and only while the limit is
+    actually being used), a slow or failed call shrinks it multiplicatively by
+    `backoff` - at most once per latency_target, so one burst of slow calls
+    counts as a single congestion signal. Callers that are not admitted take a
+    cheap degraded path instead of queueing behind a slow dependency.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial_limit: float,
+        min_limit: float,
+        max_limit: float,
+        latency_target: float,
+        backoff: float = 0.7,
+        enabled: bool = True
+    ):
+        self.name = name
+        self.min_limit = max(1.0, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(self.max_limit, max(self.min_limit, initial_limit))
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self.enabled = enabled
+
+        self.in_flight = 0
+        self._last_decrease = 0.0
+
+        # Counters
+        self.admitted = 0
+        self.rejected = 0
+        self.decreases = 0
+
+    def try_acquire(self) -> bool:
+        """Admit one call if the limit allows; every admitted call must be released."""
+        if self.enabled and self.in_flight >= int(self.limit):
+            self.rejected += 1
+            return False
+        self.in_flight += 1
+        self.admitted += 1
+        return True
+
+    def release(self, latency: float, success: bool = True) -> None:
+        """
+        Finish an admitted call and adapt the limit.
+
+        Args:
+            latency: Seconds the call took
+            success: False if the call failed (treated like a slow call)
+        """
+        saturated = self.in_flight >= int(self.limit) // 2
+        self.in_flight = max(0, self.in_flight - 1)
+
+        if not success or latency > self.latency_target:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.latency_target:
+                self._last_decrease = now
+                previous = self.limit
+                self.limit = max(self.min_limit, self.limit * self.backoff)
+                self.decreases += 1
+                if int(previous) != int(self.limit):
+                    logger.warning(
+                        f"{self.name}: limit {previous:.1f} -> {self.limit:.1f} "
+                        f"(latency {latency:.2f}s, success={success})"
+                    )
+        elif saturated:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Current limit, load and shed counts.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        total = self.admitted + self.rejected
+        return {
+            "enabled": self.enabled,
+            "limit": round(self.limit, 2),
+            "in_flight": self.in_flight,
+            "latency_target": self.latency_target,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "rejected_rate": round(self.rejected / total, 4) if total else 0.0,
+            "decreases": self.decreases,
+        }
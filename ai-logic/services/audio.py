@@ -1,89 +1,165 @@
-import os
-import shutil
+import io
 import logging
+import subprocess
 import speech_recognition as sr
-from pydub import AudioSegment
-from langdetect import detect, LangDetectException
-from fastapi import UploadFile
 from config import settings
 from models import AnalysisResponse
+from services.executor import AudioExecutor, JobTimeoutError
+from services.stt import STTEngine, STTError, create_engine
+from services.vad import trim_silence
+from services.langid import identify_language
+from metrics import metrics
 
 logger = logging.getLogger(__name__)
 
-# Configure Pydub with FFmpeg path from settings
-AudioSegment.converter = settings.ffmpeg_path
-AudioSegment.ffmpeg = settings.ffmpeg_path
+# PCM format produced by the ffmpeg pipe (what the recognizer expects anyway)
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2
 
-def get_fallback_response(transcript="Unable to clearly understand the spoken issue", intent="General Support"):
+# Containers speech_recognition can read directly from memory
+NATIVE_HEADERS = (b"RIFF", b"FORM", b"fLaC")
+
+def get_fallback_response(transcript="Unable to clearly understand the spoken issue", intent="General Support", reason="error"):
     return AnalysisResponse(
         language="Unknown",
         transcript=transcript,
         intent=intent,
-        confidence=0.0
+        confidence=0.0,
+        fallback_reason=reason
     )
 
-async def process_audio_file(file: UploadFile) -> tuple[str, str]:
+def _read_native(data: bytes) -> sr.AudioData:
+    """Read WAV/AIFF/FLAC bytes straight into PCM, no ffmpeg or disk involved."""
+    with sr.AudioFile(io.BytesIO(data)) as source:
+        return sr.Recognizer().record(source)
+
+def _ffmpeg_to_pcm(data: bytes) -> sr.AudioData:
+    """Decode any ffmpeg-supported format via stdin/stdout pipes into 16 kHz mono PCM."""
+    result = subprocess.run(
+        [
+            settings.ffmpeg_path, "-hide_banner", "-loglevel", "error",
+            "-i", "pipe:0",
+            "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE),
+            "pipe:1"
+        ],
+        input=data,
+        capture_output=True,
+        timeout=settings.ffmpeg_timeout,
+        check=True
+    )
+    return sr.AudioData(result.stdout, SAMPLE_RATE, SAMPLE_WIDTH)
+
+def decode_audio(data: bytes) -> sr.AudioData:
     """
-    Saves the uploaded file, converts it to WAV, and performs transcription.
-    Returns: (transcript_text, detected_language)
+    Decode uploaded audio bytes to an in-memory PCM buffer.
+    WAV/AIFF/FLAC are read directly; everything else is piped through ffmpeg.
     """
-    temp_filename = f"temp_{file.filename}"
-    temp_wav = f"temp_converted_{file.filename}.wav" # standardized wav path
-    
-    transcript_text = ""
-    detected_lang = "Unknown"
+    if data[:4] in NATIVE_HEADERS:
+        return _read_native(data)
+
+    try:
+        return _ffmpeg_to_pcm(data)
+    except Exception as e:
+        logger.warning(f"FFmpeg decode failed (ffmpeg missing?): {e}. Trying raw bytes.")
+        return _read_native(data)
+
+# Per-worker STT engine, created and warmed up once by init_worker() in each pool process
+_engine = None
 
+def init_worker():
+    """Process pool initializer: build and warm up the configured STT engine for this worker."""
+    global _engine
+    _engine = create_engine(settings.stt_engine)
     try:
-        # Save uploaded file temporarily
-        with open(temp_filename, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
-        
-        # 1. Convert to WAV using Pydub
-        try:
-            audio = AudioSegment.from_file(temp_filename)
-            audio.export(temp_wav, format="wav")
-            source_file = temp_wav
-        except Exception as e:
-            logger.warning(f"Pydub conversion failed (ffmpeg missing?): {e}. Trying raw file.")
-            source_file = temp_filename
-
-        # 2. Transcribe Audio
-        recognizer = sr.Recognizer()
-        
-        try:
-            with sr.AudioFile(source_file) as source:
-                audio_data = recognizer.record(source)
-                try:
-                    transcript_text = recognizer.recognize_google(audio_data)
-                except sr.UnknownValueError:
-                    logger.warning("Speech Recognition could not understand audio")
-                    return "", "Unknown"
-                except sr.RequestError as e:
-                    logger.error(f"Speech Recognition error: {e}")
-                    return "", "Unknown"
-                
-        except Exception as e:
-            logger.error(f"Audio processing failed: {e}")
-            return "", "Unknown"
-
-        if not transcript_text:
-             return "", "Unknown"
-
-        # 3. Detect Language
-        try:
-            detected_lang = detect(transcript_text)
-        except LangDetectException:
-            detected_lang = "Unknown"
-            
+        _engine.warmup()
+    except Exception as e:
+        logger.error(f"STT engine warmup failed: {e}")
+
+def _get_engine() -> STTEngine:
+    if _engine is None:
+        init_worker()
+    return _engine
+
+def _detect_language(transcript_text: str) -> str:
+    """Language code of the transcript (hi, mr, en, hi-Latn) or "Unknown"."""
+    result = identify_language(transcript_text)
+    return result["code"] if result["code"] != "und" else "Unknown"
+
+def transcribe_bytes(data: bytes) -> tuple[str, str, dict | None]:
+    """
+    Decode, transcribe and language-detect one upload. Runs inside a pool worker.
+    Returns: (transcript_text, detected_language, vad_stats)
+    """
+    # 1. Decode to PCM (in memory) and trim silence
+    vad_stats = None
+    try:
+        audio = decode_audio(data)
+        if settings.vad_enabled:
+            audio, vad_stats = trim_silence(audio)
+    except Exception as e:
+        logger.error(f"Audio processing failed: {e}")
+        return "", "Unknown", None
+
+    # 2. Transcribe Audio
+    try:
+        transcript_text = _get_engine().transcribe(audio)
+    except STTError as e:
+        logger.error(f"Speech Recognition error: {e}")
+        return "", "Unknown", vad_stats
+
+    if not transcript_text:
+        logger.warning("Speech Recognition could not understand audio")
+        return "", "Unknown", vad_stats
+
+    # 3. Detect Language
+    return transcript_text, _detect_language(transcript_text), vad_stats
+
+# Global executor for blocking audio work
+audio_executor = AudioExecutor(initializer=init_worker)
+
+def _record_vad(stats: dict | None) -> None:
+    """Accumulate how much audio VAD removed (workers run in other processes, so tally here)."""
+    if not stats:
+        return
+    metrics.increment("vad.clips")
+    metrics.increment("vad.input_ms", int(stats["input_seconds"] * 1000))
+    metrics.increment("vad.output_ms", int(stats["output_seconds"] * 1000))
+    logger.info(
+        f"VAD: {stats['input_seconds']:.2f}s -> {stats['output_seconds']:.2f}s "
+        f"(speech ratio {stats['speech_ratio']:.2f})"
+    )
+
+def get_vad_stats() -> dict:
+    """
+    Aggregate silence-trimming effect across all processed clips.
+
+    Returns:
+        Dict suitable for the /metrics endpoint
+    """
+    input_ms = metrics.counter("vad.input_ms")
+    output_ms = metrics.counter("vad.output_ms")
+    return {
+        "enabled": settings.vad_enabled,
+        "clips": metrics.counter("vad.clips"),
+        "input_seconds": round(input_ms / 1000, 3),
+        "output_seconds": round(output_ms / 1000, 3),
+        "kept_ratio": round(output_ms / input_ms, 4) if input_ms else 1.0,
+    }
+
+async def process_audio_bytes(data: bytes) -> tuple[str, str]:
+    """
+    Runs decode + transcription of already-read upload bytes in the audio worker pool.
+    Returns: (transcript_text, detected_language)
+    """
+    try:
+        transcript_text, detected_lang, stats = await audio_executor.run(transcribe_bytes, data)
+        _record_vad(stats)
         return transcript_text, detected_lang
 
+    except JobTimeoutError as e:
+        logger.error(f"Audio processing timed out: {e}")
+        return "", "Unknown"
+
     except Exception as e:
         logger.error(f"Unexpected error in audio processing: {e}")
         return "", "Unknown"
-    
-    finally:
-        # Cleanup temp files
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
-        if os.path.exists(temp_wav):
-            os.remove(temp_wav)
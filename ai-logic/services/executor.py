@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, Optional
+
+from config import settings
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class JobTimeoutError(Exception):
+    """Raised when a pooled job does not finish within its timeout."""
+
+
+class AudioExecutor:
+    """
+    Process pool for CPU-bound and blocking audio work (decode, recognition, language detection).
+
+    Keeps the event loop free: each job runs in a worker process and the caller
+    awaits its result with a per-job timeout. Workers are started once with an
+    initializer so per-worker state (e.g. the recognizer) is reused across jobs.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, initializer: Optional[Callable] = None):
+        self.max_workers = max_workers or settings.audio_workers or os.cpu_count() or 1
+        self.initializer = initializer
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+        # Queue depth / throughput counters
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._timeouts = 0
+        self._restarts = 0
+
+    def start(self) -> None:
+        """Start the worker processes (spawned, so no event-loop state is forked)."""
+        if self._pool is not None:
+            return
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.max_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=self.initializer
+        )
+        logger.info(f"Audio executor started with {self.max_workers} worker processes")
+
+    def shutdown(self) -> None:
+        """Stop the workers, cancelling jobs that have not started."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            logger.info("Audio executor stopped")
+
+    def _restart(self) -> None:
+        """Replace a pool whose worker died (BrokenProcessPool)."""
+        logger.error("Audio worker pool broken - restarting")
+        self._restarts += 1
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        self.start()
+
+    async def run(self, fn: Callable, *args: Any, timeout: Optional[float] = None) -> Any:
+        """
+        Run fn(*args) in a worker process.
+
+        Args:
+            fn: Picklable module-level function
+            *args: Picklable arguments
+            timeout: Seconds to wait (defaults to settings.audio_job_timeout)
+
+        Returns:
+            fn's return value
+
+        Raises:
+            JobTimeoutError: If the job does not finish in time. The worker keeps
+                running it to completion; only the caller stops waiting.
+        """
+        if self._pool is None:
+            self.start()
+
+        loop = asyncio.get_running_loop()
+        self._pending += 1
+        start = time.perf_counter()
+        try:
+            try:
+                future = loop.run_in_executor(self._pool, fn, *args)
+            except BrokenProcessPool:
+                self._restart()
+                future = loop.run_in_executor(self._pool, fn, *args)
+            result = await asyncio.wait_for(future, timeout=timeout or settings.audio_job_timeout)
+            self._completed += 1
+            return result
+        except asyncio.TimeoutError:
+            self._timeouts += 1
+            raise JobTimeoutError(f"{fn.__name__} exceeded {timeout or settings.audio_job_timeout}s")
+        except BrokenProcessPool:
+            self._failed += 1
+            self._restart()
+            raise
+        except Exception:
+            self._failed += 1
+            raise
+        finally:
+            self._pending -= 1
+            metrics.observe(f"executor.{fn.__name__}", time.perf_counter() - start)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of pool load.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        return {
+            "workers": self.max_workers,
+            "running": self._pool is not None,
+            "pending": self._pending,
+            "queue_depth": max(0, self._pending - self.max_workers),
+            "completed": self._completed,
+            "failed": self._failed,
+            "timeouts": self._timeouts,
+            "restarts": self._restarts,
+        }
@@ -0,0 +1,176 @@
+"""
+Deterministic transcript language identification for the languages the IVR routes.
+
+Two stages:
+1. Unicode-script fast path: Devanagari letters mean Hindi or Marathi, Latin
+   letters mean English or Hinglish (romanized Hindi); anything else is Unknown.
+2. A character 1-3 gram model, built once at import from the seed phrases
+   below, picks between the two candidates of that script.
+
+No randomness and no lazy profile loading: the same text always gives the
+same answer, and a typical transcript takes well under a millisecond
+(repeats are served from an LRU).
+"""
+
+import math
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, Iterable, List, Tuple
+
+
+# code -> display name
+LANGUAGES = {
+    "hi": "Hindi",
+    "mr": "Marathi",
+    "en": "English",
+    "hi-Latn": "Hinglish",
+}
+
+SCRIPT_CANDIDATES = {
+    "Devanagari": ("hi", "mr"),
+    "Latin": ("en", "hi-Latn"),
+}
+
+NGRAM_ORDERS = (1, 2, 3)
+SMOOTHING = 0.5
+# Scales the mean per-gram log-likelihood gap into a confidence
+CONFIDENCE_SHARPNESS = 6.0
+
+# Seed phrases: everyday speech plus the IVR domain (billing, accounts, passwords, outages)
+SEED_TEXT = {
+    "hi": """
+        मेरा बिल ज़्यादा आ गया है मुझे अपने खाते में लॉगिन नहीं हो रहा है
+        मेरा पासवर्ड भूल गया हूँ कृपया मदद कीजिए इंटरनेट काम नहीं कर रहा है
+        मैं नया कनेक्शन लेना चाहता हूँ मेरे पैसे कट गए लेकिन रिचार्ज नहीं हुआ
+        आप मेरी शिकायत दर्ज कर दीजिए यह बहुत ज़रूरी है मुझे एजेंट से बात करनी है
+        कल से नेटवर्क नहीं आ रहा है मेरा खाता बंद हो गया है क्या आप बता सकते हैं
+        मुझे अपना पता बदलना है भुगतान करने में समस्या आ रही है और ओटीपी नहीं आया
+        हम लोग बहुत परेशान हैं इसे जल्दी ठीक करो मेरा नंबर ब्लॉक हो गया है
+        मुझे नहीं पता क्या करना है सेवा शुरू करवानी है बिल में गलत चार्ज लगा है
+    """,
+    "mr": """
+        माझं बिल जास्त आलं आहे मला माझ्या खात्यात लॉगिन करता येत नाही
+        माझा पासवर्ड विसरलो आहे कृपया मदत करा इंटरनेट चालत नाही आहे
+        मला नवीन कनेक्शन घ्यायचं आहे माझे पैसे कापले गेले पण रिचार्ज झालं नाही
+        तुम्ही माझी तक्रार नोंदवा हे खूप महत्त्वाचं आहे मला एजंटशी बोलायचं आहे
+        कालपासून नेटवर्क येत नाहीये माझं खातं बंद झालं आहे तुम्ही सांगू शकता का
+        मला माझा पत्ता बदलायचा आहे पेमेंट करताना अडचण येते आणि ओटीपी आला नाही
+        आम्ही खूप त्रासलो आहोत हे लवकर दुरुस्त करा माझा नंबर ब्लॉक झाला आहे
+        मला काय करायचं ते कळत नाही सेवा सुरू करायची आहे बिलात चुकीचा चार्ज लावला आहे
+    """,
+    "en": """
+        my bill is too high this month I cannot log in to my account
+        I forgot my password please help me reset it the internet is not working
+        I want a new connection the money was deducted but the recharge failed
+        please register my complaint this is very urgent I want to talk to an agent
+        there has been no network since yesterday my account has been blocked can you tell me why
+        I need to change my address there is a problem with the payment and I did not get the otp
+        we are very upset please fix this quickly my number is blocked
+        I do not know what to do I want to start the service there is a wrong charge on my bill
+    """,
+    "hi-Latn": """
+        mera bill zyada aa gaya hai mujhe apne account mein login nahi ho raha hai
+        mera password bhool gaya hoon please madad kijiye internet kaam nahi kar raha hai
+        main naya connection lena chahta hoon mere paise kat gaye lekin recharge nahi hua
+        aap meri complaint darj kar dijiye yeh bahut zaroori hai mujhe agent se baat karni hai
+        kal se network nahi aa raha hai mera account band ho gaya hai kya aap bata sakte hain
+        mujhe apna address badalna hai payment karne mein problem aa rahi hai aur otp nahi aaya
+        hum log bahut pareshan hain ise jaldi theek karo mera number block ho gaya hai
+        mujhe nahi pata kya karna hai service shuru karwani hai bill mein galat charge laga hai
+    """,
+}
+
+
+def _script_of(ch: str) -> str:
+    if "\u0900" <= ch <= "\u097f" or "\ua8e0" <= ch <= "\ua8ff":
+        return "Devanagari"
+    if ch.isascii() or unicodedata.name(ch, "").startswith("LATIN"):
+        return "Latin"
+    return "Other"
+
+
+def script_counts(text: str) -> Counter:
+    """Count letters per script (digits, punctuation and spaces are ignored)."""
+    counts: Counter = Counter()
+    for ch in text:
+        if ch.isalpha() or unicodedata.category(ch).startswith("M"):
+            counts[_script_of(ch)] += 1
+    return counts
+
+
+def _ngrams(words: Iterable[str]) -> List[str]:
+    grams = []
+    for word in words:
+        padded = f" {word} "
+        for n in NGRAM_ORDERS:
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+
+def _words(text: str, script: str) -> List[str]:
+    """Lowercased words written in the given script."""
+    words = []
+    for token in text.casefold().split():
+        token = "".join(ch for ch in token if ch.isalpha() or unicodedata.category(ch).startswith("M"))
+        if token and _script_of(token[0]) == script:
+            words.append(token)
+    return words
+
+
+def _build_model() -> Dict[str, Tuple[Dict[str, float], float]]:
+    """Per-language n-gram log-probabilities (add-k smoothed within each script group)."""
+    model = {}
+    for script, codes in SCRIPT_CANDIDATES.items():
+        counts = {code: Counter(_ngrams(_words(SEED_TEXT[code], script))) for code in codes}
+        vocabulary = set().union(*counts.values())
+        for code in codes:
+            total = sum(counts[code].values()) + SMOOTHING * len(vocabulary)
+            log_probs = {gram: math.log((count + SMOOTHING) / total) for gram, count in counts[code].items()}
+            model[code] = (log_probs, math.log(SMOOTHING / total))
+    return model
+
+
+_MODEL = _build_model()
+
+
+def identify_language(text: str) -> Dict[str, object]:
+    """
+    Identify the language of a transcript.
+
+    Args:
+        text: Transcript (any script, code-mixed allowed)
+
+    Returns:
+        Dict with language (display name), code, confidence (0-1) and script.
+        Code-mixed Devanagari + Latin text is judged on its Devanagari part,
+        e.g. "माझं password reset करायचं आहे" is Marathi.
+    """
+    return dict(_identify(text or ""))
+
+
+@lru_cache(maxsize=4096)
+def _identify(text: str) -> Dict[str, object]:
+    counts = script_counts(text)
+    if not counts:
+        return {"language": "Unknown", "code": "und", "confidence": 0.0, "script": "None"}
+
+    script = "Devanagari" if counts["Devanagari"] else counts.most_common(1)[0][0]
+    if script not in SCRIPT_CANDIDATES:
+        return {"language": "Unknown", "code": "und", "confidence": 0.0, "script": script}
+
+    grams = _ngrams(_words(text, script))
+    scores = {}
+    for code in SCRIPT_CANDIDATES[script]:
+        log_probs, unseen = _MODEL[code]
+        scores[code] = sum(log_probs.get(gram, unseen) for gram in grams) / max(1, len(grams))
+
+    best, other = sorted(scores, key=scores.get, reverse=True)
+    gap = scores[best] - scores[other]
+    confidence = 1.0 / (1.0 + math.exp(-CONFIDENCE_SHARPNESS * gap))
+    return {
+        "language": LANGUAGES[best],
+        "code": best,
+        "confidence": round(confidence, 4),
+        "script": script,
+    }
@@ -1,26 +1,190 @@
+import asyncio
 import json
 import logging
-from openai import OpenAI
+import time
+from typing import Any, Dict, List, Optional, Tuple
 from config import settings
+from metrics import metrics
 from models import AnalysisResponse
+from services.admission import AdmissionController
+from services.batching import MicroBatcher
+from services.cache import TTLCache, normalize_text
+from services.llm_gateway import DeadlineExceeded, llm_gateway
+from services.resilience import CircuitOpenError
+from services.runtime_config import ConfigSnapshot, runtime_config
 
 logger = logging.getLogger(__name__)
 
-# Initialize xAI (Grok) Client
-if not settings.xai_api_key:
-    logger.warning("XAI_API_KEY is missing! Logic will fail unless set.")
+# LLM analyses keyed on normalized transcript + language + category set
+intent_cache = TTLCache(
+    max_size=settings.intent_cache_size,
+    ttl=settings.intent_cache_ttl,
+    persist_path=settings.intent_cache_path,
+    name="intent cache"
+)
+
+# (transcript, detected language, deadline, snapshot) waiting for an LLM answer
+IntentItem = Tuple[str, str, float, ConfigSnapshot]
+
+
+def _parse_content(content: str) -> Any:
+    # Clean up markdown code blocks if present
+    return json.loads(content.replace("```json", "").replace("```", "").strip())
+
+
+def _to_response(data: Dict[str, Any], transcript_text: str, detected_lang: str) -> AnalysisResponse:
+    return AnalysisResponse(
+        language=data.get("language", detected_lang),
+        transcript=data.get("transcript", transcript_text),
+        intent=data.get("intent", "General Support"),
+        confidence=float(data.get("confidence", 0.0))
+    )
+
+
+async def _analyze_single(item: IntentItem) -> AnalysisResponse:
+    """One intent prompt for one transcript (raises on API / parsing errors)."""
+    transcript_text, detected_lang, deadline, snapshot = item
+    content = await llm_gateway.complete(
+        messages=[
+            {"role": "system", "content": snapshot.build_prompt(transcript_text, detected_lang)},
+            {"role": "user", "content": transcript_text},
+        ],
+        deadline=deadline,
+        temperature=0.0,
+    )
+    return _to_response(_parse_content(content), transcript_text, detected_lang)
+
+
+def _parse_batch(content: str, items: List[IntentItem]) -> List[Optional[AnalysisResponse]]:
+    """Split a multi-item reply into per-item responses by id (None where unusable)."""
+    results: List[Optional[AnalysisResponse]] = [None] * len(items)
+    try:
+        data = _parse_content(content)
+    except ValueError as e:
+        logger.warning(f"Unparseable batch intent reply: {e}")
+        return results
+
+    entries = data.get("results", []) if isinstance(data, dict) else data
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict) or not isinstance(entry.get("intent"), str):
+            continue
+        position = entry.get("id")
+        if isinstance(position, int) and 0 <= position < len(items):
+            transcript_text, detected_lang, _, _ = items[position]
+            try:
+                results[position] = _to_response(entry, transcript_text, detected_lang)
+            except (TypeError, ValueError):
+                continue
+    return results
 
-client = OpenAI(
-    api_key=settings.xai_api_key or "missing_key_placeholder",
-    base_url=settings.xai_base_url,
+
+async def _analyze_group(items: List[IntentItem]) -> List[Any]:
+    """Analyze items sharing one configuration snapshot in one prompt, falling back per item."""
+    results: List[Any] = [None] * len(items)
+    if len(items) > 1:
+        snapshot = items[0][3]
+        try:
+            content = await llm_gateway.complete(
+                messages=[{"role": "system", "content": snapshot.build_batch_prompt(
+                    [(transcript_text, detected_lang) for transcript_text, detected_lang, _, _ in items]
+                )}],
+                # The longest budget: a caller with less left stops waiting on its own
+                # (see analyze_intent) instead of failing the whole batch
+                deadline=max(deadline for _, _, deadline, _ in items),
+                temperature=0.0,
+            )
+        except Exception as e:
+            # Provider failure (or even the longest budget is spent): individual
+            # calls would fare no better
+            return [e] * len(items)
+        results = _parse_batch(content, items)
+
+    missing = [position for position, result in enumerate(results) if result is None]
+    if missing and len(items) > 1:
+        metrics.increment("llm.batch_fallbacks", len(missing))
+        logger.info(f"Batch intent analysis: {len(missing)}/{len(items)} items retried individually")
+    singles = await asyncio.gather(*(_analyze_single(items[position]) for position in missing), return_exceptions=True)
+    for position, result in zip(missing, singles):
+        results[position] = result
+    return results
+
+
+async def _analyze_batch(items: List[IntentItem]) -> List[Any]:
+    """MicroBatcher handler: one multi-item prompt per configuration snapshot in the batch."""
+    groups: Dict[int, List[int]] = {}
+    for position, item in enumerate(items):
+        groups.setdefault(id(item[3]), []).append(position)
+
+    group_results = await asyncio.gather(*(
+        _analyze_group([items[position] for position in positions])
+        for positions in groups.values()
+    ))
+    results: List[Any] = [None] * len(items)
+    for positions, answers in zip(groups.values(), group_results):
+        for position, answer in zip(positions, answers):
+            results[position] = answer
+    return results
+
+
+# Concurrent cache misses share one multi-item prompt
+intent_batcher = MicroBatcher(
+    _analyze_batch,
+    max_batch=settings.llm_batch_size,
+    window=settings.llm_batch_window_ms / 1000,
+    name="intent batcher"
+) if settings.llm_batch_size > 1 else None
+
+
+# Adaptive cap on concurrent LLM analyses; beyond it the fallback answer is returned at once
+llm_admission = AdmissionController(
+    "llm admission",
+    initial_limit=settings.llm_admission_initial_limit,
+    min_limit=settings.llm_admission_min_limit,
+    max_limit=settings.llm_admission_max_limit,
+    latency_target=settings.llm_admission_latency_target,
+    backoff=settings.admission_backoff,
+    enabled=settings.admission_enabled
 )
-logger.info(f"LLM Client Initialized with Base URL: {settings.xai_base_url}")
-logger.info(f"API Key Prefix: {str(settings.xai_api_key)[:8]}...")
 
-def analyze_intent(transcript_text: str, detected_lang: str) -> AnalysisResponse:
+
+def _fallback(transcript_text: str, detected_lang: str, reason: str) -> AnalysisResponse:
+    # We fall back to general support but keep the transcript
+    return AnalysisResponse(
+        language=detected_lang,
+        transcript=transcript_text,
+        intent="General Support",
+        confidence=0.0,
+        fallback_reason=reason
+    )
+
+
+def get_batching_stats() -> Dict[str, Any]:
+    """
+    Intent micro-batching effectiveness.
+
+    Returns:
+        Dict suitable for the /metrics endpoint
+    """
+    stats = intent_batcher.get_stats() if intent_batcher is not None else {"max_batch": 1}
+    stats["single_call_fallbacks"] = metrics.counter("llm.batch_fallbacks")
+    return stats
+
+
+async def analyze_intent(
+    transcript_text: str,
+    detected_lang: str,
+    deadline: Optional[float] = None,
+    snapshot: Optional[ConfigSnapshot] = None
+) -> AnalysisResponse:
     """
     Analyzes the transcript using Grok to determine intent and confidence.
+    deadline is a time.monotonic() value (the request's remaining budget);
+    defaults to llm_timeout from now. snapshot pins the category set / prompt
+    version (defaults to the current one). Concurrent cache misses are
+    micro-batched into one multi-item prompt; when the LLM stage is over its
+    adaptive concurrency limit the fallback answer is returned immediately.
     """
+    snapshot = snapshot or runtime_config.current
     if not transcript_text:
         return AnalysisResponse(
             language=detected_lang,
@@ -29,58 +193,50 @@ def analyze_intent(transcript_text: str, detected_lang: str) -> AnalysisResponse
             confidence=0.0
         )
 
-    system_prompt = f"""
-You are the intelligence layer for an IVR system.
-Your task is to analyze the following user transcript and extract structured data.
-
-Allowed issue categories: {', '.join(settings.allowed_categories)}
-
-Rules:
-1. Detect the intent and map it to EXACTLY ONE category.
-2. Estimate confidence (0.0 to 1.0). Be conservative.
-3. If unclear, use "General Support".
-4. Output MUST be valid JSON only. No markdown. No comments.
-
-JSON Structure:
-{{
-  "language": "{detected_lang}", 
-  "transcript": "{transcript_text}",
-  "intent": "category",
-  "confidence": 0.5
-}}
-Note: Use the detected language code I provided, or correct it if the text is clearly another language.
-"""
-    
-    try:
-        completion = client.chat.completions.create(
-            model=settings.xai_model,
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": transcript_text},
-            ],
-            temperature=0.0,
-        )
-
-        content = completion.choices[0].message.content
-        
-        # Clean up markdown code blocks if present
-        clean_content = content.replace("```json", "").replace("```", "").strip()
-        data = json.loads(clean_content)
-        
-        # Return strict response
+    cache_key = "|".join([
+        snapshot.categories_version,
+        (detected_lang or "").casefold(),
+        normalize_text(transcript_text)
+    ])
+    cached = intent_cache.get(cache_key)
+    if cached is not None:
+        logger.info(f"Intent cache hit: {cached['intent']}")
+        # Only the classification is shared; transcript and language are this caller's
         return AnalysisResponse(
-            language=data.get("language", detected_lang),
-            transcript=data.get("transcript", transcript_text),
-            intent=data.get("intent", "General Support"),
-            confidence=float(data.get("confidence", 0.0))
+            language=detected_lang,
+            transcript=transcript_text,
+            intent=cached["intent"],
+            confidence=cached["confidence"]
         )
 
+    if not llm_admission.try_acquire():
+        logger.warning(f"LLM stage at its limit ({llm_admission.limit:.0f}), skipping analysis")
+        return _fallback(transcript_text, detected_lang, "llm_overloaded")
+
+    item = (transcript_text, detected_lang, deadline or time.monotonic() + settings.llm_timeout, snapshot)
+    started = time.perf_counter()
+    succeeded = False
+
+    try:
+        if intent_batcher is not None:
+            try:
+                result = await asyncio.wait_for(intent_batcher.submit(item), timeout=max(0.0, item[2] - time.monotonic()))
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("Budget spent waiting for a batched LLM answer")
+        else:
+            result = await _analyze_single(item)
+        succeeded = True
+        intent_cache.set(cache_key, {"intent": result.intent, "confidence": result.confidence})
+        return result
+
+    except CircuitOpenError as e:
+        # Provider degraded: answer with the fallback immediately
+        logger.warning(f"LLM skipped: {e}")
+        return _fallback(transcript_text, detected_lang, "llm_unavailable")
+
     except Exception as e:
         logger.error(f"LLM/Parsing error: {e}")
-        # If LLM fails, we fall back to general support but keep the transcript
-        return AnalysisResponse(
-            language=detected_lang,
-            transcript=transcript_text,
-            intent="General Support",
-            confidence=0.0
-        )
+        return _fallback(transcript_text, detected_lang, "llm_error")
+
+    finally:
+        llm_admission.release(time.perf_counter() - started, succeeded)
@@ -0,0 +1,252 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+import openai
+from openai import AsyncOpenAI
+from config import settings
+from metrics import metrics
+from services.resilience import CircuitBreaker, CircuitOpenError, hedged
+
+logger = logging.getLogger(__name__)
+
+# Minimum latency samples before the observed p95 replaces llm_hedge_delay
+HEDGE_MIN_SAMPLES = 20
+
+# Errors worth another attempt if the deadline allows
+RETRYABLE_ERRORS = (
+    asyncio.TimeoutError,
+    openai.APITimeoutError,
+    openai.APIConnectionError,
+    openai.RateLimitError,
+    openai.InternalServerError,
+)
+
+
+class DeadlineExceeded(Exception):
+    """Raised when the request's remaining budget is too small for another LLM attempt."""
+
+
+class LLMGateway:
+    """
+    Async gateway for Groq chat completions.
+
+    - One shared AsyncOpenAI client (keep-alive connections)
+    - A global semaphore caps concurrent completions across all requests
+    - Every call carries an absolute deadline (time.monotonic()); each attempt's
+      timeout is the remaining budget, and jittered retries happen only while
+      enough budget remains for another useful attempt
+    - A circuit breaker per target ("primary" or "hedge" endpoint, plus model)
+      fails calls fast (CircuitOpenError) while that target is erroring or slow,
+      so callers fall back without burning the budget
+    - With LLM_HEDGE_MODEL and/or LLM_HEDGE_BASE_URL set, an attempt still running
+      after the primary's p95 latency is duplicated to the hedge target and the
+      first answer wins; while the primary's breaker is open the hedge is used directly
+    - Latency, error and retry counts are recorded per target
+    """
+
+    def __init__(self):
+        self._client: Optional[AsyncOpenAI] = None
+        self._hedge_client: Optional[AsyncOpenAI] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        # Keyed by target name ("primary.<model>" / "hedge.<model>"), so a hedge
+        # endpoint serving the same model keeps its own breaker and latency stats
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def _ensure_client(self) -> None:
+        if self._client is not None:
+            return
+        if not settings.xai_api_key:
+            logger.warning("XAI_API_KEY is missing! Logic will fail unless set.")
+        self._client = AsyncOpenAI(
+            api_key=settings.xai_api_key or "missing_key_placeholder",
+            base_url=settings.xai_base_url,
+            max_retries=0  # retries are deadline-aware and handled here
+        )
+        self._hedge_client = self._client
+        if settings.llm_hedge_base_url:
+            self._hedge_client = AsyncOpenAI(
+                api_key=settings.llm_hedge_api_key or settings.xai_api_key or "missing_key_placeholder",
+                base_url=settings.llm_hedge_base_url,
+                max_retries=0
+            )
+        self._semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+        logger.info(f"LLM Client Initialized with Base URL: {settings.xai_base_url}")
+        logger.info(f"API Key Prefix: {str(settings.xai_api_key)[:8]}...")
+
+    async def close(self) -> None:
+        if self._hedge_client is not None and self._hedge_client is not self._client:
+            await self._hedge_client.close()
+        if self._client is not None:
+            await self._client.close()
+        self._client = None
+        self._hedge_client = None
+
+    def _breaker(self, target: str) -> CircuitBreaker:
+        breaker = self._breakers.get(target)
+        if breaker is None:
+            breaker = self._breakers[target] = CircuitBreaker(
+                f"llm.{target}",
+                window=settings.llm_breaker_window,
+                min_calls=settings.llm_breaker_min_calls,
+                failure_rate=settings.llm_breaker_failure_rate,
+                slow_call_seconds=settings.llm_breaker_slow_seconds,
+                slow_call_rate=settings.llm_breaker_slow_rate,
+                open_seconds=settings.llm_breaker_open_seconds
+            )
+        return breaker
+
+    def _hedge_delay(self, target: str) -> float:
+        """Start the hedge once the primary has run longer than its recent p95."""
+        stats = metrics.latency(f"llm.{target}")
+        if stats.count < HEDGE_MIN_SAMPLES:
+            return settings.llm_hedge_delay
+        return max(settings.llm_hedge_min_delay, stats.percentile(95))
+
+    async def _attempt(
+        self,
+        target: str,
+        client: AsyncOpenAI,
+        model: str,
+        messages: List[Dict[str, str]],
+        deadline: float,
+        temperature: float
+    ) -> str:
+        """One completion against one target, guarded by its breaker and the shared semaphore."""
+        breaker = self._breaker(target)
+        if not breaker.allow():
+            raise CircuitOpenError(f"LLM circuit {target} is open")
+
+        # Released on this object even if close() runs while the call is in flight
+        semaphore = self._semaphore
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=max(0.0, deadline - time.monotonic()))
+        except BaseException as e:
+            # Timed out, lost a hedge race or the caller went away before the call
+            # started: no outcome to record, so hand back a half-open trial slot
+            breaker.release()
+            if isinstance(e, asyncio.TimeoutError):
+                metrics.increment(f"llm.{target}.deadline_exceeded")
+                raise DeadlineExceeded("Budget spent waiting for an LLM concurrency slot")
+            raise
+
+        try:
+            remaining = deadline - time.monotonic()
+            completion = await client.with_options(timeout=remaining).chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+            )
+            latency = time.perf_counter() - start
+            breaker.record(True, latency)
+            metrics.observe(f"llm.{target}", latency)
+            return completion.choices[0].message.content
+        except asyncio.CancelledError:
+            # Lost a hedge race: not the provider's fault
+            breaker.release()
+            raise
+        except Exception:
+            breaker.record(False, time.perf_counter() - start)
+            metrics.increment(f"llm.{target}.errors")
+            raise
+        finally:
+            semaphore.release()
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        deadline: float,
+        model: Optional[str] = None,
+        temperature: float = 0.0
+    ) -> str:
+        """
+        Run a chat completion within an absolute deadline.
+
+        Args:
+            messages: Chat messages in OpenAI format
+            deadline: time.monotonic() value by which the answer is needed
+            model: Model name (defaults to settings.xai_model)
+            temperature: Sampling temperature
+
+        Returns:
+            Raw message content
+
+        Raises:
+            DeadlineExceeded: If the budget runs out before an attempt succeeds
+            CircuitOpenError: If the primary's circuit breaker is open (and no hedge target can answer)
+            Exception: Non-retryable API errors
+        """
+        self._ensure_client()
+        model = model or settings.xai_model
+        hedge_model = settings.llm_hedge_model or (model if settings.llm_hedge_base_url else "")
+        primary_target = f"primary.{model}"
+        hedge_target = f"hedge.{hedge_model}"
+        attempt = 0
+
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining < settings.llm_min_attempt_seconds:
+                metrics.increment(f"llm.{primary_target}.deadline_exceeded")
+                raise DeadlineExceeded(f"{remaining:.2f}s left, not enough for an LLM attempt")
+
+            primary = lambda: self._attempt(primary_target, self._client, model, messages, deadline, temperature)
+            secondary = None
+            if hedge_model:
+                secondary = lambda: self._attempt(
+                    hedge_target, self._hedge_client, hedge_model, messages, deadline, temperature
+                )
+
+            try:
+                if secondary is not None and self._breaker(primary_target).is_open:
+                    return await secondary()
+                content, winner = await hedged(primary, secondary, self._hedge_delay(primary_target))
+                if winner == "hedge":
+                    metrics.increment(f"llm.{primary_target}.hedge_wins")
+                return content
+            except RETRYABLE_ERRORS as e:
+                attempt += 1
+                if attempt > settings.llm_max_retries:
+                    raise
+                backoff = min(settings.llm_retry_max_delay, settings.llm_retry_base_delay * 2 ** (attempt - 1))
+                backoff *= random.uniform(0.5, 1.0)
+                if deadline - time.monotonic() - backoff < settings.llm_min_attempt_seconds:
+                    raise
+                logger.warning(f"LLM attempt {attempt} failed ({e}); retrying in {backoff:.2f}s")
+
+            # Back off without holding a concurrency slot
+            metrics.increment(f"llm.{primary_target}.retries")
+            await asyncio.sleep(backoff)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Per-target latency, error counts and circuit state.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        default = f"primary.{settings.xai_model}"
+        targets = [default] + [t for t in self._breakers if t != default]
+        return {
+            "max_concurrency": settings.llm_max_concurrency,
+            "hedge_model": settings.llm_hedge_model or None,
+            "hedge_base_url": settings.llm_hedge_base_url or None,
+            "hedge_delay_seconds": round(self._hedge_delay(default), 3),
+            "targets": {
+                target: {
+                    "latency": metrics.latency(f"llm.{target}").snapshot(),
+                    "errors": metrics.counter(f"llm.{target}.errors"),
+                    "retries": metrics.counter(f"llm.{target}.retries"),
+                    "deadline_exceeded": metrics.counter(f"llm.{target}.deadline_exceeded"),
+                    "hedge_wins": metrics.counter(f"llm.{target}.hedge_wins"),
+                    "circuit": self._breaker(target).get_stats(),
+                }
+                for target in targets
+            },
+        }
+
+
+# Global LLM gateway instance
+llm_gateway = LLMGateway()
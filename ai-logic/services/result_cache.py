@@ -0,0 +1,186 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from fastapi import UploadFile
+from config import settings
+from services.cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+async def read_and_hash(file: UploadFile) -> Tuple[bytes, str]:
+    """
+    Read an upload chunk by chunk, hashing it as it streams in.
+
+    Returns:
+        (data, hex_digest) - BLAKE2b-128 of the raw upload bytes
+    """
+    hasher = hashlib.blake2b(digest_size=16)
+    buffer = bytearray()
+    while True:
+        chunk = await file.read(UPLOAD_CHUNK_SIZE)
+        if not chunk:
+            break
+        hasher.update(chunk)
+        buffer.extend(chunk)
+    return bytes(buffer), hasher.hexdigest()
+
+
+class DiskTier:
+    """
+    One JSON file per entry under directory/<2-char shard>/<key>.json.
+
+    Expiry is judged from the file's mtime, and when the tier grows past
+    max_entries the oldest tenth is pruned in one directory scan. All methods
+    block on file I/O; AudioResultCache calls them through asyncio.to_thread.
+    """
+
+    def __init__(self, directory: str, ttl: float, max_entries: int):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._count: Optional[int] = None
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _scan(self):
+        for shard in os.scandir(self.directory):
+            if shard.is_dir():
+                yield from (entry for entry in os.scandir(shard.path) if entry.name.endswith(".json"))
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl <= time.time():
+                os.remove(path)
+                return None
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.error(f"Disk cache read failed for {key}: {e}")
+            return None
+
+    def set(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        tmp_path = f"{path}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, ensure_ascii=False)
+            existed = os.path.exists(path)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.error(f"Disk cache write failed for {key}: {e}")
+            return
+
+        with self._lock:
+            if self._count is None:
+                self._count = sum(1 for _ in self._scan())
+            elif not existed:
+                self._count += 1
+            if self._count > self.max_entries:
+                self._prune()
+
+    def _prune(self) -> None:
+        """Drop expired files and then the oldest entries down to 90% of max_entries."""
+        entries = sorted(self._scan(), key=lambda entry: entry.stat().st_mtime)
+        cutoff = time.time() - self.ttl
+        target = int(self.max_entries * 0.9)
+        remaining = len(entries)
+        for entry in entries:
+            if remaining <= target and entry.stat().st_mtime > cutoff:
+                break
+            try:
+                os.remove(entry.path)
+                remaining -= 1
+                self.evictions += 1
+            except OSError:
+                pass
+        self._count = remaining
+
+    def size(self) -> int:
+        """Entry count (0 until the first write has counted the directory)."""
+        return self._count or 0
+
+
+class AudioResultCache:
+    """
+    Content-addressed cache of finished analyses for /analyze_audio.
+
+    Keys are the upload's content hash plus the category-set version (see
+    runtime_config), so re-uploads of the same bytes skip decoding, STT and the LLM entirely.
+    Lookups hit the in-memory LRU first, then the optional disk tier
+    (entries found on disk are promoted back into memory).
+    """
+
+    def __init__(self, max_size: int, ttl: float, directory: str = "", disk_max_entries: int = 50000):
+        self.memory = TTLCache(max_size=max_size, ttl=ttl, name="audio result cache")
+        self.disk = DiskTier(directory, ttl, disk_max_entries) if directory else None
+        self.disk_hits = 0
+
+    def key_for(self, digest: str, categories_version: str) -> str:
+        return f"{digest}-{categories_version}"
+
+    async def get(self, digest: str, categories_version: str) -> Optional[Dict[str, Any]]:
+        key = self.key_for(digest, categories_version)
+        value = self.memory.get(key)
+        if value is not None or self.disk is None:
+            return value
+
+        value = await asyncio.to_thread(self.disk.get, key)
+        if value is not None:
+            self.disk_hits += 1
+            self.memory.set(key, value)
+        return value
+
+    async def set(self, digest: str, categories_version: str, value: Dict[str, Any]) -> None:
+        key = self.key_for(digest, categories_version)
+        self.memory.set(key, value)
+        if self.disk is not None:
+            # File write, plus the first directory count and any pruning, off the event loop
+            await asyncio.to_thread(self.disk.set, key, value)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Memory and disk tier sizes plus the combined hit rate.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        stats = self.memory.get_stats()
+        del stats["persistent"]
+        # Memory misses include the lookups that the disk tier then answered
+        hits = stats["hits"] + self.disk_hits
+        lookups = stats["hits"] + stats["misses"]
+        stats.update({
+            "memory_hits": stats.pop("hits"),
+            "disk_hits": self.disk_hits,
+            "misses": lookups - hits,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "disk_enabled": self.disk is not None,
+            "disk_size": self.disk.size() if self.disk else 0,
+            "disk_evictions": self.disk.evictions if self.disk else 0,
+        })
+        return stats
+
+
+# Global cache for /analyze_audio results
+audio_result_cache = AudioResultCache(
+    max_size=settings.audio_cache_size,
+    ttl=settings.audio_cache_ttl,
+    directory=settings.audio_cache_dir,
+    disk_max_entries=settings.audio_cache_disk_max_entries
+)
@@ -0,0 +1,212 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from services.cache import version_of
+
+logger = logging.getLogger(__name__)
+
+
+def _compile_prompt(categories: List[str]) -> str:
+    """Intent prompt with the category list baked in; format() fills language and transcript."""
+    listing = ", ".join(categories).replace("{", "{{").replace("}", "}}")
+    return f"""
+You are the intelligence layer for an IVR system.
+Your task is to analyze the following user transcript and extract structured data.
+
+Allowed issue categories: {listing}
+
+Rules:
+1. Detect the intent and map it to EXACTLY ONE category.
+2. Estimate confidence (0.0 to 1.0). Be conservative.
+3. If unclear, use "General Support".
+4. Output MUST be valid JSON only. No markdown. No comments.
+
+JSON Structure:
+{{{{
+  "language": "{{language}}",
+  "transcript": "{{transcript}}",
+  "intent": "category",
+  "confidence": 0.5
+}}}}
+Note: Use the detected language code I provided, or correct it if the text is clearly another language.
+"""
+
+
+def _compile_batch_prompt(categories: List[str]) -> str:
+    """Multi-item intent prompt; format() fills items (a JSON list of id/language/transcript)."""
+    listing = ", ".join(categories).replace("{", "{{").replace("}", "}}")
+    return f"""
+You are the intelligence layer for an IVR system.
+Your task is to analyze EACH of the following user transcripts and extract structured data.
+
+Allowed issue categories: {listing}
+
+Rules:
+1. For each transcript, detect the intent and map it to EXACTLY ONE category.
+2. Estimate confidence (0.0 to 1.0). Be conservative.
+3. If unclear, use "General Support".
+4. Output MUST be valid JSON only. No markdown. No comments.
+
+Transcripts (JSON list; each has an id, its detected language code and the text):
+{{items}}
+
+JSON Structure, with one result per transcript id:
+{{{{
+  "results": [
+    {{{{"id": 0, "language": "code", "transcript": "text", "intent": "category", "confidence": 0.5}}}}
+  ]
+}}}}
+Note: Use the detected language code I provided, or correct it if the text is clearly another language.
+"""
+
+
+class ConfigSnapshot:
+    """
+    One immutable, compiled configuration version (category set + prompt template).
+
+    Each request reads runtime_config.current once, so the prompt, the cache
+    keys and the category list it uses always belong to the same version.
+    """
+
+    def __init__(self, raw: Dict[str, Any], source: str):
+        """
+        Args:
+            raw: Mapping with an optional allowed_categories list
+            source: Where it came from (settings or file path)
+
+        Raises:
+            ValueError: If the document is malformed
+        """
+        categories = raw.get("allowed_categories", settings.allowed_categories)
+        if not isinstance(categories, list) or not categories or not all(isinstance(c, str) for c in categories):
+            raise ValueError("allowed_categories must be a non-empty list of strings")
+
+        canonical = json.dumps(categories, ensure_ascii=False)
+        self.version = raw.get("version") or hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]
+        self.source = source
+        self.loaded_at = time.time()
+        self.allowed_categories: List[str] = list(categories)
+        self.categories_version = version_of(self.allowed_categories)
+        self.prompt_template = _compile_prompt(self.allowed_categories)
+        self.batch_prompt_template = _compile_batch_prompt(self.allowed_categories)
+
+    def build_prompt(self, transcript: str, language: str) -> str:
+        return self.prompt_template.format(language=language, transcript=transcript)
+
+    def build_batch_prompt(self, items: List[Tuple[str, str]]) -> str:
+        """Prompt analyzing several (transcript, language) pairs at once; result ids are list positions."""
+        listing = [
+            {"id": position, "language": language, "transcript": transcript}
+            for position, (transcript, language) in enumerate(items)
+        ]
+        return self.batch_prompt_template.format(items=json.dumps(listing, ensure_ascii=False, indent=2))
+
+
+class RuntimeConfig:
+    """
+    Holds the current ConfigSnapshot and reloads it when RUNTIME_CONFIG_PATH changes.
+
+    A background task polls the file's mtime; a changed document is compiled in a
+    worker thread and swapped in with a single assignment. A bad document is
+    logged and the previous snapshot stays active.
+    """
+
+    def __init__(self):
+        self.current = ConfigSnapshot({}, "settings")
+        self._marker: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.reloads = 0
+        self.failures = 0
+
+    async def start(self) -> None:
+        """Load the config file once, then watch it."""
+        if not settings.runtime_config_path:
+            return
+        await self.reload()
+        self._task = asyncio.create_task(self._watch_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.runtime_config_poll_interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Runtime config watch failed: {e}")
+
+    async def reload(self) -> bool:
+        """
+        Load, compile and install the config file if it changed.
+
+        Returns:
+            True if a new snapshot was installed
+        """
+        path = settings.runtime_config_path
+        try:
+            marker = os.stat(path).st_mtime_ns
+        except OSError as e:
+            logger.error(f"Runtime config file unavailable: {e}")
+            return False
+        if marker == self._marker:
+            return False
+
+        def load() -> ConfigSnapshot:
+            with open(path, "r", encoding="utf-8") as f:
+                document = json.load(f)
+            if not isinstance(document, dict):
+                raise ValueError("configuration document must be a JSON object")
+            return ConfigSnapshot(document, path)
+
+        try:
+            snapshot = await asyncio.to_thread(load)
+        except json.JSONDecodeError as e:
+            # Possibly caught mid-write; try again next poll
+            logger.error(f"Runtime config at {path} is not valid JSON: {e}")
+            return False
+        except Exception as e:
+            self.failures += 1
+            self._marker = marker
+            logger.error(f"Rejected runtime config from {path}: {e}")
+            return False
+
+        self.current = snapshot
+        self._marker = marker
+        self.reloads += 1
+        logger.info(f"Runtime config version {snapshot.version} active (from {path})")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Active version and reload counts.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        return {
+            "version": self.current.version,
+            "source": self.current.source,
+            "allowed_categories": self.current.allowed_categories,
+            "watching": self._task is not None,
+            "reloads": self.reloads,
+            "failures": self.failures,
+        }
+
+
+# Global runtime configuration
+runtime_config = RuntimeConfig()
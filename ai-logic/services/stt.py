@@ -0,0 +1,101 @@
+import json
+import logging
+from abc import ABC, abstractmethod
+import speech_recognition as sr
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# PCM format local engines are fed with
+ENGINE_SAMPLE_RATE = 16000
+ENGINE_SAMPLE_WIDTH = 2
+
+
+class STTError(Exception):
+    """Raised when an engine cannot produce a transcript (service/model failure)."""
+
+
+class STTEngine(ABC):
+    """
+    Speech-to-text engine interface.
+
+    Engines are created once per audio worker process, warmed up in the pool
+    initializer and then reused for every job that worker runs.
+    transcribe() returns "" when the audio contains no recognizable speech and
+    raises STTError when the engine itself fails.
+    """
+
+    name = "base"
+
+    def warmup(self) -> None:
+        """Load models / open connections before the first real job."""
+
+    @abstractmethod
+    def transcribe(self, audio: sr.AudioData) -> str:
+        """Transcript of one clip ("" if no speech was recognized)."""
+
+
+class GoogleSTTEngine(STTEngine):
+    """Google Web Speech API via speech_recognition (network round trip, rate-limited)."""
+
+    name = "google"
+
+    def __init__(self):
+        self.recognizer = sr.Recognizer()
+        self.recognizer.operation_timeout = settings.audio_job_timeout
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        try:
+            return self.recognizer.recognize_google(audio)
+        except sr.UnknownValueError:
+            return ""
+        except sr.RequestError as e:
+            raise STTError(f"Google speech API error: {e}") from e
+
+
+class VoskSTTEngine(STTEngine):
+    """
+    Offline CPU engine backed by a Vosk/Kaldi model directory on local disk.
+    The model is loaded once per worker; each clip gets a lightweight recognizer.
+    """
+
+    name = "vosk"
+
+    def __init__(self, model_path: str = settings.stt_model_path):
+        self.model_path = model_path
+        self._model = None
+
+    def warmup(self) -> None:
+        if self._model is not None:
+            return
+        try:
+            import vosk
+        except ImportError as e:
+            raise STTError("STT_ENGINE=vosk requires the 'vosk' package") from e
+        vosk.SetLogLevel(-1)
+        self._model = vosk.Model(self.model_path)
+        logger.info(f"Loaded Vosk model from {self.model_path}")
+
+    def transcribe(self, audio: sr.AudioData) -> str:
+        import vosk
+
+        self.warmup()
+        pcm = audio.get_raw_data(convert_rate=ENGINE_SAMPLE_RATE, convert_width=ENGINE_SAMPLE_WIDTH)
+        recognizer = vosk.KaldiRecognizer(self._model, ENGINE_SAMPLE_RATE)
+        recognizer.AcceptWaveform(pcm)
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+
+ENGINES = {
+    GoogleSTTEngine.name: GoogleSTTEngine,
+    VoskSTTEngine.name: VoskSTTEngine,
+}
+
+
+def create_engine(name: str = settings.stt_engine) -> STTEngine:
+    """Build the configured engine (falls back to Google for unknown names)."""
+    engine_cls = ENGINES.get(name.lower())
+    if engine_cls is None:
+        logger.warning(f"Unknown STT_ENGINE '{name}', using google")
+        engine_cls = GoogleSTTEngine
+    return engine_cls()
@@ -0,0 +1,97 @@
+import logging
+from typing import Any, Dict, Tuple
+
+import numpy as np
+import speech_recognition as sr
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+# Analysis format: 16 kHz mono int16, 20 ms frames
+VAD_SAMPLE_RATE = 16000
+VAD_SAMPLE_WIDTH = 2
+FRAME_MS = 20
+FRAME_SAMPLES = VAD_SAMPLE_RATE * FRAME_MS // 1000
+
+
+def frame_features(samples: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Per-frame RMS energy and zero-crossing rate.
+
+    Args:
+        samples: int16 mono PCM at VAD_SAMPLE_RATE
+
+    Returns:
+        (energy, zcr) arrays with one value per full frame
+    """
+    n_frames = len(samples) // FRAME_SAMPLES
+    frames = samples[:n_frames * FRAME_SAMPLES].reshape(n_frames, FRAME_SAMPLES).astype(np.float32)
+    energy = np.sqrt(np.mean(frames * frames, axis=1))
+    signs = np.signbit(frames)
+    zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (FRAME_SAMPLES - 1)
+    return energy, zcr
+
+
+def speech_mask(energy: np.ndarray, zcr: np.ndarray) -> np.ndarray:
+    """
+    Classify frames as speech.
+
+    The energy threshold adapts to the recording's own noise floor (a low
+    percentile of frame energy). Quieter frames with a high zero-crossing rate
+    are kept too, so unvoiced consonants (s, sh, f) at word edges survive.
+    The mask is then widened by vad_padding_ms on both sides of every speech run.
+    """
+    noise_floor = np.percentile(energy, 10)
+    threshold = max(settings.vad_min_energy, noise_floor * settings.vad_energy_ratio)
+    voiced = energy > threshold
+    unvoiced = (energy > threshold * 0.5) & (zcr > settings.vad_zcr_threshold)
+    mask = voiced | unvoiced
+
+    pad = int(settings.vad_padding_ms // FRAME_MS)
+    if pad and mask.any():
+        mask = np.convolve(mask.astype(np.int8), np.ones(2 * pad + 1, dtype=np.int8), mode="same") > 0
+    return mask
+
+
+def trim_silence(audio: sr.AudioData) -> Tuple[sr.AudioData, Dict[str, Any]]:
+    """
+    Drop leading/trailing silence and shorten long pauses before STT.
+
+    Pauses between speech runs longer than vad_max_pause_ms are cut down to that
+    length so word boundaries stay intact. If no frame looks like speech the
+    original audio is returned untouched (a quiet line must not become an empty clip).
+
+    Args:
+        audio: Decoded clip
+
+    Returns:
+        (trimmed_audio, stats) where stats has input_seconds, output_seconds and speech_ratio
+    """
+    pcm = audio.get_raw_data(convert_rate=VAD_SAMPLE_RATE, convert_width=VAD_SAMPLE_WIDTH)
+    samples = np.frombuffer(pcm, dtype=np.int16)
+    input_seconds = len(samples) / VAD_SAMPLE_RATE
+    stats = {"input_seconds": input_seconds, "output_seconds": input_seconds, "speech_ratio": 1.0}
+
+    energy, zcr = frame_features(samples)
+    if len(energy) == 0:
+        return audio, stats
+
+    mask = speech_mask(energy, zcr)
+    stats["speech_ratio"] = float(mask.mean())
+    if not mask.any():
+        return audio, stats
+
+    # Keep every speech frame, plus at most max_pause frames of each inner pause
+    speech_idx = np.flatnonzero(mask)
+    keep = np.zeros_like(mask)
+    keep[speech_idx[0]:speech_idx[-1] + 1] = True
+    max_pause = int(settings.vad_max_pause_ms // FRAME_MS)
+    gaps = np.flatnonzero(np.diff(speech_idx) > max_pause + 1)
+    for g in gaps:
+        start, end = speech_idx[g] + 1 + max_pause, speech_idx[g + 1]
+        keep[start:end] = False
+
+    frames = samples[:len(mask) * FRAME_SAMPLES].reshape(len(mask), FRAME_SAMPLES)
+    trimmed = frames[keep].tobytes()
+    stats["output_seconds"] = len(trimmed) / (VAD_SAMPLE_RATE * VAD_SAMPLE_WIDTH)
+    return sr.AudioData(trimmed, VAD_SAMPLE_RATE, VAD_SAMPLE_WIDTH), stats
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Tests import the ai-logic modules the way main.py does (from config import settings, ...)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
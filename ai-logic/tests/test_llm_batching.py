@@ -0,0 +1,64 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from services import llm
+from services.batching import MicroBatcher
+from services.runtime_config import runtime_config
+
+
+@pytest.fixture
+def batched(monkeypatch):
+    """Route analyze_intent through a fresh batcher and a fake gateway that answers after 50 ms."""
+    calls = []
+
+    async def complete(messages, deadline, temperature=0.0, model=None):
+        calls.append(deadline)
+        await asyncio.sleep(0.05)
+        if time.monotonic() > deadline:
+            raise llm.DeadlineExceeded("spent")
+        if len(messages) > 1:
+            # Single-item prompt (system + user transcript)
+            return json.dumps({"intent": "Billing", "confidence": 0.9})
+        return json.dumps({"results": [
+            {"id": position, "intent": "Billing", "confidence": 0.9} for position in range(8)
+        ]})
+
+    monkeypatch.setattr(llm.llm_gateway, "complete", complete)
+    monkeypatch.setattr(llm, "intent_batcher", MicroBatcher(llm._analyze_batch, max_batch=2, window=0.01))
+    llm.intent_cache.clear()
+    return calls
+
+
+def test_short_budget_does_not_fail_co_batched_callers(batched):
+    async def run():
+        now = time.monotonic()
+        snapshot = runtime_config.current
+        return await asyncio.gather(
+            llm.analyze_intent("mera bill galat hai", "hi", deadline=now + 0.02, snapshot=snapshot),
+            llm.analyze_intent("internet nahi chal raha", "hi", deadline=now + 5, snapshot=snapshot),
+        )
+
+    short, long = asyncio.run(run())
+    assert short.fallback_reason == "llm_error"
+    assert long.intent == "Billing"
+    assert long.fallback_reason is None
+    # One batched call, under the longest budget
+    assert len(batched) == 1
+
+
+def test_cache_hit_keeps_the_callers_transcript(batched):
+    async def run():
+        snapshot = runtime_config.current
+        deadline = time.monotonic() + 5
+        first = await llm.analyze_intent("Mera bill galat hai!", "hi", deadline=deadline, snapshot=snapshot)
+        second = await llm.analyze_intent("mera  bill galat hai", "HI", deadline=deadline, snapshot=snapshot)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert len(batched) == 1  # second call was a cache hit (same normalized text)
+    assert second.intent == first.intent == "Billing"
+    assert second.transcript == "mera  bill galat hai"
+    assert second.language == "HI"
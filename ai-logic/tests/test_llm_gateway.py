@@ -0,0 +1,60 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from config import settings
+from metrics import metrics
+from services.llm_gateway import LLMGateway
+
+
+class FakeClient:
+    """Stands in for AsyncOpenAI: answers with a fixed reply and records each model asked."""
+
+    def __init__(self, reply: str):
+        self.reply = reply
+        self.models = []
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def with_options(self, timeout):
+        return self
+
+    async def _create(self, model, messages, temperature):
+        self.models.append(model)
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=self.reply))])
+
+
+def make_gateway(monkeypatch):
+    """Hedge configured as a second endpoint serving the primary's model."""
+    monkeypatch.setattr(settings, "llm_hedge_model", "")
+    monkeypatch.setattr(settings, "llm_hedge_base_url", "https://hedge.example/v1")
+    gateway = LLMGateway()
+    gateway._client = FakeClient("primary")
+    gateway._hedge_client = FakeClient("hedge")
+    gateway._semaphore = asyncio.Semaphore(4)
+    return gateway
+
+
+def test_endpoint_only_hedge_answers_while_primary_circuit_is_open(monkeypatch):
+    gateway = make_gateway(monkeypatch)
+    model = settings.xai_model
+    gateway._breaker(f"primary.{model}")._open("test")
+
+    content = asyncio.run(gateway.complete([{"role": "user", "content": "hi"}], deadline=time.monotonic() + 5))
+
+    assert content == "hedge"
+    assert gateway._client.models == []
+    assert gateway._hedge_client.models == [model]
+    assert not gateway._breaker(f"hedge.{model}").is_open
+
+
+def test_endpoint_only_hedge_keeps_its_own_latency_stats(monkeypatch):
+    gateway = make_gateway(monkeypatch)
+    model = settings.xai_model
+    gateway._breaker(f"primary.{model}")._open("test")
+    primary_samples = metrics.latency(f"llm.primary.{model}").count
+    hedge_samples = metrics.latency(f"llm.hedge.{model}").count
+
+    asyncio.run(gateway.complete([{"role": "user", "content": "hi"}], deadline=time.monotonic() + 5))
+
+    assert metrics.latency(f"llm.primary.{model}").count == primary_samples
+    assert metrics.latency(f"llm.hedge.{model}").count == hedge_samples + 1
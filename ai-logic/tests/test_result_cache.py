@@ -0,0 +1,35 @@
+import asyncio
+
+from services.result_cache import AudioResultCache, DiskTier
+
+
+def test_overwrite_does_not_grow_count(tmp_path):
+    disk = DiskTier(str(tmp_path), ttl=60, max_entries=10)
+    disk.set("aa01", {"intent": "Billing"})
+    disk.set("aa01", {"intent": "Refund"})
+    disk.set("bb02", {"intent": "Billing"})
+    assert disk.size() == 2
+    assert disk.get("aa01") == {"intent": "Refund"}
+
+
+def test_prune_keeps_tier_under_max_entries(tmp_path):
+    disk = DiskTier(str(tmp_path), ttl=60, max_entries=10)
+    for n in range(15):
+        disk.set(f"{n:04x}", {"n": n})
+    assert disk.size() <= 10
+    assert disk.evictions >= 5
+
+
+def test_disk_hit_is_promoted_to_memory(tmp_path):
+    async def run():
+        first = AudioResultCache(max_size=10, ttl=60, directory=str(tmp_path))
+        await first.set("digest", "v1", {"intent": "Billing"})
+        # A fresh process: empty memory tier, same directory
+        second = AudioResultCache(max_size=10, ttl=60, directory=str(tmp_path))
+        assert await second.get("digest", "v1") == {"intent": "Billing"}
+        assert second.disk_hits == 1
+        assert await second.get("digest", "v1") == {"intent": "Billing"}
+        assert second.disk_hits == 1
+        assert await second.get("digest", "v2") is None
+
+    asyncio.run(run())
@@ -9,20 +9,138 @@ class Settings(BaseSettings):
     # Supabase - Using PostgreSQL Connection String
     database_url: str = os.getenv("DATABASE_URL", "")
     
+    # Database connection pool
+    db_pool_min_size: int = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+    db_pool_max_size: int = int(os.getenv("DB_POOL_MAX_SIZE", "10"))
+    db_acquire_timeout: float = float(os.getenv("DB_ACQUIRE_TIMEOUT", "2.0"))
+    db_command_timeout: float = float(os.getenv("DB_COMMAND_TIMEOUT", "5.0"))
+    db_max_inactive_lifetime: float = float(os.getenv("DB_MAX_INACTIVE_LIFETIME", "300"))
+    db_health_check_interval: float = float(os.getenv("DB_HEALTH_CHECK_INTERVAL", "30"))
+    # Prepared statement cache per connection (forced to 0 behind the port 6543 transaction pooler)
+    db_statement_cache_size: int = int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100"))
+    
+    # Write-behind call log sink: local SQLite WAL spool replayed to Postgres
+    call_log_spool_path: str = os.getenv("CALL_LOG_SPOOL_PATH", "call_log_spool.db")
+    # NORMAL survives process crashes; FULL also power loss (one fsync per call)
+    call_log_spool_synchronous: str = os.getenv("CALL_LOG_SPOOL_SYNCHRONOUS", "NORMAL").upper()
+    call_log_batch_size: int = int(os.getenv("CALL_LOG_BATCH_SIZE", "200"))
+    call_log_flush_interval: float = float(os.getenv("CALL_LOG_FLUSH_INTERVAL", "0.5"))
+    # Upper bound of the replayer's exponential backoff while Postgres is unreachable
+    call_log_retry_max: float = float(os.getenv("CALL_LOG_RETRY_MAX", "30"))
+    call_log_drain_timeout: float = float(os.getenv("CALL_LOG_DRAIN_TIMEOUT", "10.0"))
+    
+    # call_logs daily partitions (database/migrations/001_partition_call_logs.sql)
+    # 0 disables the in-app maintenance loop (run manage_partitions.py from cron instead)
+    partition_maintenance_interval: float = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", "3600"))
+    partition_days_ahead: int = int(os.getenv("PARTITION_DAYS_AHEAD", "3"))
+    # Partitions older than this have raw_ai_response moved to archive files
+    partition_archive_after_days: int = int(os.getenv("PARTITION_ARCHIVE_AFTER_DAYS", "7"))
+    # Archived partitions older than this are dropped (0 = keep forever)
+    partition_retention_days: int = int(os.getenv("PARTITION_RETENTION_DAYS", "90"))
+    partition_statement_timeout: float = float(os.getenv("PARTITION_STATEMENT_TIMEOUT", "600"))
+    archive_dir: str = os.getenv("ARCHIVE_DIR", "call_log_archive")
+    archive_row_group_size: int = int(os.getenv("ARCHIVE_ROW_GROUP_SIZE", "50000"))
+    # Archive files older than this are deleted (0 = keep forever)
+    archive_retention_days: int = int(os.getenv("ARCHIVE_RETENTION_DAYS", "365"))
+    # VACUUM FULL returns the space to the OS but locks the (cold) partition while it runs
+    archive_vacuum_full: bool = os.getenv("ARCHIVE_VACUUM_FULL", "false").lower() == "true"
+    # get_recent_calls looks at this window first, so only the newest partitions are scanned
+    recent_calls_window_hours: float = float(os.getenv("RECENT_CALLS_WINDOW_HOURS", "24"))
+    
     # xAI (Grok)
     xai_api_key: str = os.getenv("XAI_API_KEY", "")
     xai_base_url: str = "https://api.x.ai/v1"
     xai_model: str = "grok-2-latest" 
     
+    # Shared LLM client (keep-alive pool, concurrency cap, timeouts)
+    llm_max_concurrency: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    llm_queue_timeout: float = float(os.getenv("LLM_QUEUE_TIMEOUT", "1.0"))
+    llm_timeout: float = float(os.getenv("LLM_TIMEOUT", "8.0"))
+    llm_connect_timeout: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "2.0"))
+    llm_max_retries: int = int(os.getenv("LLM_MAX_RETRIES", "1"))
+    llm_max_connections: int = int(os.getenv("LLM_MAX_CONNECTIONS", "32"))
+    llm_max_keepalive_connections: int = int(os.getenv("LLM_MAX_KEEPALIVE_CONNECTIONS", "16"))
+    llm_keepalive_expiry: float = float(os.getenv("LLM_KEEPALIVE_EXPIRY", "60"))
+    
+    # Circuit breaker per LLM target: opens on failure rate or slow-call rate over the
+    # last llm_breaker_window calls, then fails fast for llm_breaker_open_seconds
+    llm_breaker_window: int = int(os.getenv("LLM_BREAKER_WINDOW", "20"))
+    llm_breaker_min_calls: int = int(os.getenv("LLM_BREAKER_MIN_CALLS", "10"))
+    llm_breaker_failure_rate: float = float(os.getenv("LLM_BREAKER_FAILURE_RATE", "0.5"))
+    llm_breaker_slow_seconds: float = float(os.getenv("LLM_BREAKER_SLOW_SECONDS", "5"))
+    llm_breaker_slow_rate: float = float(os.getenv("LLM_BREAKER_SLOW_RATE", "0.5"))
+    llm_breaker_open_seconds: float = float(os.getenv("LLM_BREAKER_OPEN_SECONDS", "30"))
+    # Optional hedge target (another model and/or endpoint); empty = no hedging.
+    # A call still running after the primary's p95 latency (llm_hedge_delay until
+    # enough samples exist) is duplicated to it.
+    llm_hedge_model: str = os.getenv("LLM_HEDGE_MODEL", "")
+    llm_hedge_base_url: str = os.getenv("LLM_HEDGE_BASE_URL", "")
+    llm_hedge_api_key: str = os.getenv("LLM_HEDGE_API_KEY", "")
+    llm_hedge_delay: float = float(os.getenv("LLM_HEDGE_DELAY", "1.5"))
+    llm_hedge_min_delay: float = float(os.getenv("LLM_HEDGE_MIN_DELAY", "0.3"))
+    # Adaptive admission control (AIMD): requests beyond the limit get an immediate
+    # fallback_routing answer; LLM calls beyond theirs use the keyword answer
+    admission_enabled: bool = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    admission_backoff: float = float(os.getenv("ADMISSION_BACKOFF", "0.7"))
+    admission_initial_limit: float = float(os.getenv("ADMISSION_INITIAL_LIMIT", "32"))
+    admission_min_limit: float = float(os.getenv("ADMISSION_MIN_LIMIT", "4"))
+    admission_max_limit: float = float(os.getenv("ADMISSION_MAX_LIMIT", "256"))
+    admission_latency_target: float = float(os.getenv("ADMISSION_LATENCY_TARGET", "3.0"))
+    llm_admission_initial_limit: float = float(os.getenv("LLM_ADMISSION_INITIAL_LIMIT", "16"))
+    llm_admission_min_limit: float = float(os.getenv("LLM_ADMISSION_MIN_LIMIT", "2"))
+    llm_admission_max_limit: float = float(os.getenv("LLM_ADMISSION_MAX_LIMIT", "64"))
+    llm_admission_latency_target: float = float(os.getenv("LLM_ADMISSION_LATENCY_TARGET", "2.0"))
+    
+    # Concurrent LLM classifications arriving within the window share one
+    # multi-item prompt (up to llm_batch_size items; 1 disables batching)
+    llm_batch_size: int = int(os.getenv("LLM_BATCH_SIZE", "8"))
+    llm_batch_window_ms: float = float(os.getenv("LLM_BATCH_WINDOW_MS", "5"))
+    llm_batch_item_tokens: int = int(os.getenv("LLM_BATCH_ITEM_TOKENS", "100"))
+    
+    # Classification cache (LRU + TTL, optional JSON persistence across restarts)
+    classification_cache_size: int = int(os.getenv("CLASSIFICATION_CACHE_SIZE", "5000"))
+    classification_cache_ttl: float = float(os.getenv("CLASSIFICATION_CACHE_TTL", "86400"))
+    classification_cache_path: str = os.getenv("CLASSIFICATION_CACHE_PATH", "")
+    
     # Application
     confidence_threshold: float = float(os.getenv("CONFIDENCE_THRESHOLD", "0.6"))
     fallback_routing: str = os.getenv("FALLBACK_ROUTING", "General Support")
+    # Transcription starts with this language while detection runs (empty = sequential)
+    speculative_language: str = os.getenv("SPECULATIVE_LANGUAGE", "Hindi")
+    # Batch endpoint (/process-issues)
+    batch_max_items: int = int(os.getenv("BATCH_MAX_ITEMS", "10000"))
+    batch_max_concurrency: int = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+    
+    # Streaming endpoint commits a routing decision mid-call at this keyword confidence
+    early_routing_confidence: float = float(os.getenv("EARLY_ROUTING_CONFIDENCE", "0.85"))
+    # Keyword tier answers without the LLM when its confidence is at least this
+    local_confidence_gate: float = float(os.getenv("LOCAL_CONFIDENCE_GATE", "0.8"))
+    
+    # Nearest-neighbour tier over labelled call_logs transcripts (hashed char n-grams)
+    history_classifier_enabled: bool = os.getenv("HISTORY_CLASSIFIER_ENABLED", "true").lower() == "true"
+    history_min_confidence: float = float(os.getenv("HISTORY_MIN_CONFIDENCE", "0.8"))
+    history_vector_dim: int = int(os.getenv("HISTORY_VECTOR_DIM", "1024"))
+    history_max_rows: int = int(os.getenv("HISTORY_MAX_ROWS", "5000"))
+    history_top_k: int = int(os.getenv("HISTORY_TOP_K", "5"))
+    history_min_similarity: float = float(os.getenv("HISTORY_MIN_SIMILARITY", "0.5"))
+    # History tier answers without the LLM when its confidence is at least this
+    history_confidence_gate: float = float(os.getenv("HISTORY_CONFIDENCE_GATE", "0.75"))
+    history_page_size: int = int(os.getenv("HISTORY_PAGE_SIZE", "1000"))
+    history_refresh_interval: float = float(os.getenv("HISTORY_REFRESH_INTERVAL", "30"))
+    # Each refresh rescans this many seconds behind the newest row seen, so rows
+    # committed late (other instances' spool replays, slow transactions) are not missed
+    history_rescan_window: float = float(os.getenv("HISTORY_RESCAN_WINDOW", "300"))
+    
+    # Hot-reloadable categories/routing/keywords ("" = settings only, "file" or "db")
+    runtime_config_source: str = os.getenv("RUNTIME_CONFIG_SOURCE", "")
+    runtime_config_path: str = os.getenv("RUNTIME_CONFIG_PATH", "ivr_config.json")
+    runtime_config_poll_interval: float = float(os.getenv("RUNTIME_CONFIG_POLL_INTERVAL", "5"))
     
     # Server
     host: str = os.getenv("HOST", "0.0.0.0")
     port: int = int(os.getenv("PORT", "8000"))
     
-    # Hardcoded Categories (MVP - Intentionally fixed)
+    # Default categories (a runtime config document may replace them)
     issue_categories: List[str] = [
         "billing",
         "technical_issue",
@@ -31,7 +149,7 @@ class Settings(BaseSettings):
         "service_request"
     ]
     
-    # Hardcoded Routing Rules (MVP - Intentionally fixed)
+    # Default routing rules (a runtime config document may replace them)
     routing_rules: Dict[str, str] = {
         "billing": "Billing Support",
         "technical_issue": "Technical Support",
@@ -41,6 +159,49 @@ class Settings(BaseSettings):
         "general_support": "General Support"  # Fallback
     }
     
+    # Destination pools: pool (a routing_rules value) -> queue names.
+    # Pools not listed here have a single queue named after the pool.
+    routing_pools: Dict[str, List[str]] = {}
+    # Pool -> {overflow pool: weight}, used when the pool's least-loaded queue
+    # has routing_overflow_load or more waiting calls per available agent
+    routing_overflow: Dict[str, Dict[str, float]] = {
+        "Billing Support": {"Customer Service": 1.0},
+        "Technical Support": {"Customer Service": 0.7, "General Support": 0.3},
+        "Account Security": {"Customer Service": 1.0}
+    }
+    routing_overflow_load: float = float(os.getenv("ROUTING_OVERFLOW_LOAD", "5"))
+    
+    # Keyword classifier vocabulary: category -> {keyword or phrase: weight}
+    # Override with a JSON file of the same shape via KEYWORD_CONFIG_PATH
+    keyword_config_path: str = os.getenv("KEYWORD_CONFIG_PATH", "")
+    keyword_confidence_base: float = float(os.getenv("KEYWORD_CONFIDENCE_BASE", "0.5"))
+    keyword_confidence_span: float = float(os.getenv("KEYWORD_CONFIDENCE_SPAN", "0.45"))
+    keyword_weights: Dict[str, Dict[str, float]] = {
+        "billing": {
+            "bill": 1.0, "billing": 1.0, "payment": 1.0, "charge": 0.8, "charged": 0.8,
+            "refund": 0.9, "invoice": 1.0, "zyada": 0.6, "paisa": 0.6, "paise": 0.6,
+            "बिल": 1.0, "भुगतान": 1.0, "पैसा": 0.6, "पैसे": 0.6, "ज्यादा": 0.6, "जास्त": 0.6
+        },
+        "password_reset": {
+            "password": 1.0, "reset": 0.8, "forgot password": 1.5, "bhool": 0.7, "bhul": 0.7,
+            "gaya": 0.2, "otp": 0.6, "pin": 0.6,
+            "पासवर्ड": 1.0, "भूल": 0.7, "विसरलो": 0.7
+        },
+        "account_access": {
+            "access": 0.8, "login": 1.0, "log in": 1.0, "account": 0.6, "locked": 0.8,
+            "blocked": 0.8, "khata": 0.8, "खाता": 0.8, "खाते": 0.8, "लॉगिन": 1.0
+        },
+        "technical_issue": {
+            "not working": 1.2, "error": 1.0, "problem": 0.6, "technical": 1.0,
+            "network": 0.8, "internet": 0.8, "slow": 0.5, "kaam nahi": 1.0,
+            "band ho gaya": 0.8, "काम नहीं": 1.0, "नेटवर्क": 0.8, "समस्या": 0.6
+        },
+        "service_request": {
+            "new connection": 1.2, "request": 0.6, "change address": 1.0,
+            "upgrade": 0.8, "cancel": 0.6
+        }
+    }
+    
     class Config:
         env_file = ".env"
         case_sensitive = False
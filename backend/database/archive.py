@@ -0,0 +1,179 @@
+# Compressed columnar archive files for call_logs.raw_ai_response
+import json
+import lzma
+import os
+import struct
+from datetime import datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence
+
+MAGIC = b"IVRARCH1"
+# Footer: JSON index, then its length (uint64 little-endian), then MAGIC
+_FOOTER_TAIL = struct.Struct("<Q")
+_MISSING = ""
+
+
+def _encode_value(value: Any) -> str:
+    return _MISSING if value is None else json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _compress_column(values: Sequence[str]) -> bytes:
+    # json.dumps escapes newlines, so one value per line is unambiguous
+    return lzma.compress("\n".join(values).encode("utf-8"), preset=6)
+
+
+def _decompress_column(block: bytes) -> List[str]:
+    return lzma.decompress(block).decode("utf-8").split("\n")
+
+
+class ArchiveWriter:
+    """
+    Writes call log rows to an archive file, one row group at a time.
+
+    Layout (Parquet-like, stdlib only):
+    - MAGIC
+    - row groups: for each column an LZMA-compressed block of newline-separated values
+      (id, created_at as ISO text, and one column per top-level raw_ai_response key
+      holding that key's JSON, so similar blobs compress together)
+    - footer: JSON index of row groups -> column -> (offset, length), its length, MAGIC
+
+    The file is written under a temporary name and renamed into place on close(),
+    so a crash never leaves a truncated archive behind.
+    """
+
+    def __init__(self, path: str, metadata: Optional[Dict[str, Any]] = None):
+        self.path = path
+        self.metadata = metadata or {}
+        self.rows = 0
+        self._tmp_path = f"{path}.tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(self._tmp_path, "wb")
+        self._file.write(MAGIC)
+        self._groups: List[Dict[str, Any]] = []
+
+    def write_group(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Append one row group.
+
+        Args:
+            rows: Dicts with id, created_at and raw_ai_response
+
+        Returns:
+            Number of rows written
+        """
+        rows = list(rows)
+        if not rows:
+            return 0
+
+        keys: List[str] = []
+        for row in rows:
+            for key in (row.get("raw_ai_response") or {}):
+                if key not in keys:
+                    keys.append(key)
+
+        columns = {
+            "id": [str(row["id"]) for row in rows],
+            "created_at": [
+                row["created_at"].isoformat() if isinstance(row["created_at"], datetime) else str(row["created_at"])
+                for row in rows
+            ],
+        }
+        for key in keys:
+            columns[f"raw.{key}"] = [_encode_value((row.get("raw_ai_response") or {}).get(key)) for row in rows]
+
+        index = {}
+        for name, values in columns.items():
+            block = _compress_column(values)
+            index[name] = [self._file.tell(), len(block)]
+            self._file.write(block)
+
+        self._groups.append({"rows": len(rows), "columns": index})
+        self.rows += len(rows)
+        return len(rows)
+
+    def close(self) -> int:
+        """
+        Write the footer, fsync and move the file into place.
+
+        Returns:
+            Final file size in bytes
+        """
+        footer = json.dumps({"metadata": self.metadata, "rows": self.rows, "groups": self._groups}).encode("utf-8")
+        self._file.write(footer)
+        self._file.write(_FOOTER_TAIL.pack(len(footer)))
+        self._file.write(MAGIC)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        size = self._file.tell()
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        return size
+
+    def abort(self) -> None:
+        """Discard a partially written archive."""
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+
+
+def read_footer(path: str) -> Dict[str, Any]:
+    """
+    Read an archive's index.
+
+    Returns:
+        Dict with metadata, rows and groups
+
+    Raises:
+        ValueError: If the file is not a complete archive
+    """
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        tail = _FOOTER_TAIL.size + len(MAGIC)
+        if size < len(MAGIC) + tail:
+            raise ValueError(f"{path} is too small to be an archive")
+        f.seek(size - tail)
+        (footer_length,) = _FOOTER_TAIL.unpack(f.read(_FOOTER_TAIL.size))
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} has no archive footer")
+        f.seek(size - tail - footer_length)
+        return json.loads(f.read(footer_length).decode("utf-8"))
+
+
+def read_archive(path: str, keys: Optional[List[str]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate the rows of an archive file.
+
+    Only the requested raw_ai_response keys are decompressed, so reading e.g.
+    just "classification" from a large archive is cheap.
+
+    Args:
+        path: Archive file
+        keys: raw_ai_response keys to load (default: all)
+
+    Yields:
+        Dicts with id, created_at and raw_ai_response
+    """
+    footer = read_footer(path)
+    with open(path, "rb") as f:
+        for group in footer["groups"]:
+            wanted = {
+                name: span for name, span in group["columns"].items()
+                if not name.startswith("raw.") or keys is None or name[4:] in keys
+            }
+            columns = {}
+            for name, (offset, length) in wanted.items():
+                f.seek(offset)
+                columns[name] = _decompress_column(f.read(length))
+
+            for position in range(group["rows"]):
+                raw = {}
+                for name, values in columns.items():
+                    if name.startswith("raw.") and values[position] != _MISSING:
+                        raw[name[4:]] = json.loads(values[position])
+                yield {
+                    "id": columns["id"][position],
+                    "created_at": columns["created_at"][position],
+                    "raw_ai_response": raw,
+                }
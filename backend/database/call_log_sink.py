@@ -0,0 +1,277 @@
+# Write-behind call log sink
+import asyncio
+import logging
+import sqlite3
+import time
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+
+import asyncpg
+
+from config import settings
+from metrics import metrics
+from models import CallLog
+from database.spool import CallLogSpool
+from database.supabase_client import DatabaseClient, db_client
+
+logger = logging.getLogger(__name__)
+
+# Errors caused by the row itself: retrying can never succeed, so the row is dead-lettered.
+# Anything else (unreachable database, timeouts, schema drift) is retried with backoff.
+REJECTED_ROW_ERRORS = (asyncpg.DataError, asyncpg.IntegrityConstraintViolationError)
+
+
+class CallLogSink:
+    """
+    Durable local spool plus a background replayer that ships call logs to Postgres.
+
+    submit() appends the row to a SQLite WAL spool (see database/spool.py) and
+    returns; no request ever waits on the database. The replayer ships the
+    oldest spooled rows in order, batch_size at a time, with one staged COPY
+    that skips rows already written (every row carries its id as an idempotency
+    key), and only then removes them from the spool. While Postgres is down or
+    slow rows simply accumulate on disk and are shipped, still in order, once it
+    recovers - also across restarts. Lag (age of the oldest unshipped row) is
+    reported by get_stats().
+    """
+
+    def __init__(
+        self,
+        client: DatabaseClient,
+        batch_size: int = settings.call_log_batch_size,
+        flush_interval: float = settings.call_log_flush_interval,
+        retry_max: float = settings.call_log_retry_max,
+        spool_path: str = settings.call_log_spool_path
+    ):
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_max = retry_max
+        self.spool = CallLogSpool(spool_path, settings.call_log_spool_synchronous)
+
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._stopping: Optional[asyncio.Event] = None
+        self._closing = False
+        self._retry_delay = 0.0
+        self._oldest_shipped: Optional[datetime] = None
+
+        # Counters
+        self._submitted = 0
+        self._written = 0
+        self._duplicates = 0
+        self._batches = 0
+        self._failures = 0
+        self._dead_lettered = 0
+        self._direct_writes = 0
+        self._last_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        """Open the spool and start the replayer (rows left by a previous run ship first)."""
+        if self.running or not self.client.connection_params:
+            return
+        try:
+            self.spool.open()
+        except sqlite3.Error as e:
+            logger.error(f"Call log spool unavailable ({e}) - writing call logs directly")
+            return
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._closing = False
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Call log sink started (spool={self.spool.path}, batch={self.batch_size}, "
+            f"interval={self.flush_interval}s, backlog={self.spool.depth})"
+        )
+
+    async def stop(self, timeout: float = settings.call_log_drain_timeout) -> None:
+        """
+        Ship what the database accepts within the timeout and stop the replayer.
+        Anything left stays in the spool for the next start.
+        """
+        if not self.running:
+            return
+        self._closing = True
+        self._stopping.set()
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        logger.info(f"Call log sink stopped (written={self._written}, left in spool={self.spool.depth})")
+        self.spool.close()
+
+    async def submit(self, call_log: CallLog) -> bool:
+        """
+        Durably queue a call log for background writing.
+
+        Args:
+            call_log: CallLog model instance
+
+        Returns:
+            True if the row was spooled or written, False otherwise
+        """
+        self._submitted += 1
+
+        if not self.client.connection_params:
+            # Database not configured (demo mode) - nothing to write
+            return False
+
+        if self.running:
+            try:
+                self.spool.append([call_log])
+                self._wakeup.set()
+                return True
+            except sqlite3.Error as e:
+                logger.error(f"Call log spool write failed ({e}) - writing directly")
+
+        # No replayer (e.g. scripts without app startup) or spool broken - write directly
+        self._direct_writes += 1
+        return await self.client.log_call(call_log) is not None
+
+    async def submit_many(self, call_logs: List[CallLog]) -> int:
+        """
+        Durably queue several call logs with a single spool transaction.
+
+        Args:
+            call_logs: CallLog model instances
+
+        Returns:
+            Number of rows spooled or written
+        """
+        if not call_logs:
+            return 0
+        if self.running and self.client.connection_params:
+            try:
+                self.spool.append(call_logs)
+                self._submitted += len(call_logs)
+                self._wakeup.set()
+                return len(call_logs)
+            except sqlite3.Error as e:
+                logger.error(f"Call log spool write failed ({e}) - writing directly")
+
+        written = 0
+        for call_log in call_logs:
+            written += await self.submit(call_log)
+        return written
+
+    async def _run(self) -> None:
+        """Ship spooled rows until stopped (and drained, if the database allows)."""
+        while True:
+            self._wakeup.clear()
+            rows = self.spool.read(self.batch_size)
+            if not rows:
+                if self._closing:
+                    return
+                await self._sleep(self.flush_interval, wake_on_submit=True)
+                continue
+
+            shipped = await self._ship(rows)
+            if not shipped:
+                # Database unreachable: back off, rows stay spooled
+                if self._closing:
+                    return
+                self._retry_delay = min(self.retry_max, max(self.flush_interval, self._retry_delay * 2))
+                await self._sleep(self._retry_delay)
+                continue
+
+            self._retry_delay = 0.0
+            if len(rows) < self.batch_size:
+                # Partial batch: let the next one fill up for one interval
+                await self._sleep(self.flush_interval)
+
+    async def _sleep(self, seconds: float, wake_on_submit: bool = False) -> None:
+        """Wait, returning early on stop() (or on a new row, if wake_on_submit)."""
+        event = self._wakeup if wake_on_submit else self._stopping
+        try:
+            await asyncio.wait_for(event.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _ship(self, rows: List[Tuple[int, CallLog]]) -> bool:
+        """
+        Write one batch and remove it from the spool.
+
+        Returns:
+            False if the database could not be reached (rows stay spooled)
+        """
+        start = time.perf_counter()
+        try:
+            written = await self.client.log_calls_idempotent([call_log for _, call_log in rows])
+        except REJECTED_ROW_ERRORS as e:
+            if len(rows) == 1:
+                seq, call_log = rows[0]
+                logger.error(f"Call log {call_log.id} rejected by the database, dead-lettered: {e}")
+                self.spool.bury(seq, str(e))
+                self._dead_lettered += 1
+                metrics.increment("call_log.dead_lettered")
+                return True
+            # Find the offending row(s) one at a time, keeping order
+            for row in rows:
+                if not await self._ship([row]):
+                    return False
+            return True
+        except Exception as e:
+            logger.error(f"Failed to ship {len(rows)} call logs: {e}")
+            written = None
+
+        self._last_flush_ms = (time.perf_counter() - start) * 1000
+        if written is None:
+            self._failures += 1
+            metrics.increment("call_log.ship_failures")
+            return False
+
+        self.spool.ack(rows[-1][0])
+        oldest = min(call_log.created_at for _, call_log in rows)
+        if self._oldest_shipped is None or oldest < self._oldest_shipped:
+            self._oldest_shipped = oldest
+        self._batches += 1
+        self._written += written
+        self._duplicates += len(rows) - written
+        return True
+
+    def pop_oldest_shipped(self) -> Optional[datetime]:
+        """
+        created_at of the oldest row shipped since the last call.
+
+        Spooled rows keep the created_at of the call, so after an outage they
+        land in call_logs behind readers that poll by created_at; this tells
+        such a reader how far back to look.
+        """
+        oldest, self._oldest_shipped = self._oldest_shipped, None
+        return oldest
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of sink throughput and backlog.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        return {
+            "running": self.running,
+            "spooled": self.spool.depth,
+            "lag_seconds": round(self.spool.lag(), 3),
+            "submitted": self._submitted,
+            "written": self._written,
+            "duplicates_skipped": self._duplicates,
+            "batches": self._batches,
+            "ship_failures": self._failures,
+            "dead_lettered": self._dead_lettered,
+            "direct_writes": self._direct_writes,
+            "retry_delay_seconds": self._retry_delay,
+            "last_flush_ms": round(self._last_flush_ms, 3),
+        }
+
+
+# Global call log sink instance
+call_log_sink = CallLogSink(db_client)
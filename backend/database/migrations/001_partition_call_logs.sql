@@ -0,0 +1,70 @@
+-- Convert an existing, unpartitioned call_logs table to daily range partitions.
+--
+-- The existing table is kept as one partition (call_logs_legacy) covering
+-- everything up to tomorrow 00:00 UTC; from then on rows go to daily
+-- partitions created by the backend (PARTITION_MAINTENANCE_INTERVAL) or by
+-- `python manage_partitions.py maintain`. The legacy partition is archived and,
+-- after PARTITION_RETENTION_DAYS, dropped like any other partition.
+--
+-- Run once, in a quiet period (it briefly locks call_logs and builds a new
+-- primary key on the existing rows):
+--   psql "$DATABASE_URL" -f database/migrations/001_partition_call_logs.sql
+-- or: python manage_partitions.py migrate
+
+BEGIN;
+
+-- 1. Move the existing table and its index/constraint names out of the way
+ALTER TABLE call_logs RENAME TO call_logs_legacy;
+ALTER INDEX IF EXISTS idx_call_logs_created_at RENAME TO idx_call_logs_legacy_created_at;
+ALTER INDEX IF EXISTS idx_call_logs_category RENAME TO idx_call_logs_legacy_category;
+ALTER INDEX IF EXISTS idx_call_logs_confidence RENAME TO idx_call_logs_legacy_confidence;
+
+-- 2. Partition key must be NOT NULL and part of the primary key
+UPDATE call_logs_legacy SET created_at = NOW() WHERE created_at IS NULL;
+ALTER TABLE call_logs_legacy ALTER COLUMN created_at SET NOT NULL;
+ALTER TABLE call_logs_legacy DROP CONSTRAINT call_logs_pkey;
+ALTER TABLE call_logs_legacy ADD CONSTRAINT call_logs_legacy_pkey PRIMARY KEY (id, created_at);
+
+-- 3. Partitioned parent (same columns as before)
+CREATE TABLE call_logs (
+    id UUID DEFAULT gen_random_uuid(),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
+    audio_url TEXT NOT NULL,
+    detected_language TEXT NOT NULL,
+    transcript TEXT NOT NULL,
+    issue_category TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    routed_to TEXT NOT NULL,
+    raw_ai_response JSONB,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE INDEX idx_call_logs_created_at ON call_logs(created_at DESC);
+CREATE INDEX idx_call_logs_category ON call_logs(issue_category);
+CREATE INDEX idx_call_logs_confidence ON call_logs(confidence);
+
+CREATE TABLE call_logs_default PARTITION OF call_logs DEFAULT;
+
+-- 4. Attach the old rows; the CHECK constraint lets ATTACH skip its validation scan
+DO $$
+DECLARE
+    cutover TIMESTAMP WITH TIME ZONE := date_trunc('day', NOW() AT TIME ZONE 'UTC') AT TIME ZONE 'UTC' + INTERVAL '1 day';
+BEGIN
+    EXECUTE format('ALTER TABLE call_logs_legacy ADD CONSTRAINT call_logs_legacy_range CHECK (created_at < %L)', cutover);
+    EXECUTE format('ALTER TABLE call_logs ATTACH PARTITION call_logs_legacy FOR VALUES FROM (MINVALUE) TO (%L)', cutover);
+END $$;
+
+ALTER TABLE call_logs_legacy DROP CONSTRAINT call_logs_legacy_range;
+
+-- 5. Archive catalog
+CREATE TABLE IF NOT EXISTS call_logs_archive (
+    partition_name TEXT PRIMARY KEY,
+    range_start TIMESTAMP WITH TIME ZONE,
+    range_end TIMESTAMP WITH TIME ZONE,
+    path TEXT NOT NULL,
+    rows BIGINT NOT NULL,
+    bytes BIGINT NOT NULL,
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMIT;
@@ -0,0 +1,394 @@
+# Daily call_logs partitions: creation ahead of time, JSON archival, retention
+import asyncio
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from config import settings
+from database.archive import ArchiveWriter, read_archive
+from database.supabase_client import DatabaseClient, db_client
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "call_logs"
+ARCHIVE_TABLE = "call_logs_archive"
+# Session advisory lock so only one replica (or the CLI) maintains partitions at a time
+MAINTENANCE_LOCK_KEY = 820240001
+
+LIST_PARTITIONS = """
+    SELECT c.relname AS name, pg_get_expr(c.relpartbound, c.oid) AS bound
+    FROM pg_inherits i
+    JOIN pg_class c ON c.oid = i.inhrelid
+    JOIN pg_class p ON p.oid = i.inhparent
+    WHERE p.relname = $1
+"""
+
+LIST_ARCHIVES = f"SELECT partition_name, range_end, path, rows, bytes FROM {ARCHIVE_TABLE}"
+
+UPSERT_ARCHIVE = f"""
+    INSERT INTO {ARCHIVE_TABLE} (partition_name, range_start, range_end, path, rows, bytes)
+    VALUES ($1, $2, $3, $4, $5, $6)
+    ON CONFLICT (partition_name) DO UPDATE
+    SET path = EXCLUDED.path, rows = EXCLUDED.rows, bytes = EXCLUDED.bytes, archived_at = NOW()
+"""
+
+_BOUND = re.compile(r"FOR VALUES FROM \((.+?)\) TO \((.+?)\)")
+
+
+def _parse_bound(value: str) -> Optional[datetime]:
+    """One side of a range bound: a quoted timestamptz, or None for MINVALUE/MAXVALUE."""
+    value = value.strip()
+    if not value.startswith("'"):
+        return None
+    text = value.strip("'")
+    if re.search(r"[+-]\d{2}$", text):
+        text += ":00"
+    return datetime.fromisoformat(text).astimezone(timezone.utc)
+
+
+def partition_name(day: datetime) -> str:
+    return f"{PARENT_TABLE}_p{day:%Y%m%d}"
+
+
+class Partition:
+    """One attached partition of call_logs and its range (None = unbounded / default)."""
+
+    def __init__(self, name: str, bound: str):
+        self.name = name
+        self.is_default = bound.strip() == "DEFAULT"
+        self.start: Optional[datetime] = None
+        self.end: Optional[datetime] = None
+        match = _BOUND.search(bound)
+        if match:
+            self.start, self.end = _parse_bound(match.group(1)), _parse_bound(match.group(2))
+
+    def overlaps(self, start: datetime, end: datetime) -> bool:
+        if self.is_default:
+            return False
+        return (self.start is None or self.start < end) and (self.end is None or self.end > start)
+
+
+class PartitionManager:
+    """
+    Keeps call_logs partitioned by UTC day (see database/migrations/001_partition_call_logs.sql).
+
+    Each maintenance pass:
+    1. Creates the partitions for today and the next partition_days_ahead days,
+       so inserts never fall into the default partition
+    2. Archives partitions that ended more than archive_after_days ago: their
+       raw_ai_response JSON is written to a compressed columnar file under
+       archive_dir (see database/archive.py), recorded in call_logs_archive, and
+       cleared from the partition, which is then vacuumed. Rows that land in an
+       archived partition later (call logs replayed from the spool after a long
+       outage keep their original created_at) are merged into its archive file
+       on the next pass
+    3. Detaches and drops partitions that ended more than retention_days ago
+       (only once archived and holding no JSON), and deletes archive files past
+       archive_retention_days
+
+    Hot queries (get_recent_calls) only touch the newest, slim partitions.
+    """
+
+    def __init__(self, client: DatabaseClient):
+        self.client = client
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.runs = 0
+        self.failures = 0
+        self.created = 0
+        self.archived = 0
+        self.archived_rows = 0
+        self.dropped = 0
+        self.last_run: Optional[float] = None
+
+    async def start(self) -> None:
+        """Run maintenance periodically in the background (if enabled)."""
+        if not settings.partition_maintenance_interval or not self.client.connection_params:
+            return
+        self._task = asyncio.create_task(self._maintenance_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _maintenance_loop(self) -> None:
+        while True:
+            try:
+                await self.maintain()
+            except Exception as e:
+                logger.error(f"Partition maintenance failed: {e}")
+            await asyncio.sleep(settings.partition_maintenance_interval)
+
+    async def maintain(self, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Run one maintenance pass (skipped if another process holds the maintenance lock).
+
+        Args:
+            now: Reference time (defaults to the current UTC time)
+
+        Returns:
+            Summary of created, archived and dropped partitions
+        """
+        now = now or datetime.now(timezone.utc)
+        today = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        summary: Dict[str, Any] = {"created": [], "archived": [], "dropped": [], "skipped": False}
+
+        async with self.client.get_connection() as conn:
+            if conn is None:
+                raise RuntimeError("database unavailable")
+            if not await conn.fetchval("SELECT pg_try_advisory_lock($1)", MAINTENANCE_LOCK_KEY):
+                summary["skipped"] = True
+                return summary
+            self.runs += 1
+            try:
+                summary["created"] = await self._create_ahead(conn, today)
+                summary["archived"] = await self._archive_old(conn, today - timedelta(days=settings.partition_archive_after_days))
+                summary["dropped"] = await self._drop_expired(conn, today)
+            except Exception:
+                self.failures += 1
+                raise
+            finally:
+                await conn.execute("SELECT pg_advisory_unlock($1)", MAINTENANCE_LOCK_KEY)
+                self.last_run = time.time()
+
+        if any(summary[key] for key in ("created", "archived", "dropped")):
+            logger.info(f"Partition maintenance: {summary}")
+        return summary
+
+    async def _partitions(self, conn) -> List[Partition]:
+        rows = await conn.fetch(LIST_PARTITIONS, PARENT_TABLE)
+        return [Partition(row["name"], row["bound"]) for row in rows]
+
+    async def _archives(self, conn) -> Dict[str, Dict[str, Any]]:
+        return {row["partition_name"]: dict(row) for row in await conn.fetch(LIST_ARCHIVES)}
+
+    async def _create_ahead(self, conn, today: datetime) -> List[str]:
+        partitions = await self._partitions(conn)
+        created = []
+        for offset in range(settings.partition_days_ahead + 1):
+            start = today + timedelta(days=offset)
+            end = start + timedelta(days=1)
+            if any(p.overlaps(start, end) for p in partitions):
+                continue
+            name = partition_name(start)
+            try:
+                await conn.execute(
+                    f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {PARENT_TABLE} "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')",
+                    timeout=settings.partition_statement_timeout
+                )
+            except Exception as e:
+                # Usually rows for this day already sit in the default partition
+                logger.error(f"Could not create partition {name}: {e}")
+                continue
+            created.append(name)
+            self.created += 1
+        return created
+
+    async def _archive_old(self, conn, cutoff: datetime) -> List[str]:
+        archives = await self._archives(conn)
+        archived = []
+        for partition in await self._partitions(conn):
+            if partition.is_default or partition.end is None or partition.end > cutoff:
+                continue
+            existing = archives.get(partition.name)
+            if existing is not None and not await self._has_json(conn, partition.name):
+                continue
+            rows = await self.archive_partition(conn, partition, existing)
+            archived.append(partition.name)
+            self.archived += 1
+            self.archived_rows += rows
+        return archived
+
+    async def _has_json(self, conn, table: str) -> bool:
+        return await conn.fetchval(
+            f"SELECT EXISTS (SELECT 1 FROM {table} WHERE raw_ai_response IS NOT NULL)",
+            timeout=settings.partition_statement_timeout
+        )
+
+    async def archive_partition(self, conn, partition: Partition, existing: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Move one partition's raw_ai_response JSON into an archive file.
+
+        Runs in one transaction holding a SHARE lock on the (cold) partition, so
+        no row can change between being read and having its JSON cleared. The
+        file is complete (fsynced and renamed) before the catalog row is written
+        and the JSON cleared; a crash at any point leaves either the JSON in the
+        table or a recorded archive (a stray file is simply rewritten next time).
+
+        Args:
+            conn: Connection holding the maintenance lock
+            partition: Partition to archive
+            existing: Its call_logs_archive row if it was archived before; the
+                rows already in that file are carried over into the new one
+
+        Returns:
+            Number of rows newly archived
+        """
+        path = os.path.join(settings.archive_dir, f"{partition.name}.ivrarch")
+        writer = ArchiveWriter(path, metadata={
+            "table": PARENT_TABLE,
+            "partition": partition.name,
+            "range_start": partition.start.isoformat() if partition.start else None,
+            "range_end": partition.end.isoformat() if partition.end else None,
+        })
+        async with conn.transaction():
+            await conn.execute(f"LOCK TABLE {partition.name} IN SHARE MODE", timeout=settings.partition_statement_timeout)
+            try:
+                cursor = await conn.cursor(
+                    f"SELECT id, created_at, raw_ai_response FROM {partition.name} "
+                    f"WHERE raw_ai_response IS NOT NULL ORDER BY created_at, id"
+                )
+                archived_ids = set()
+                while True:
+                    rows = await cursor.fetch(settings.archive_row_group_size, timeout=settings.partition_statement_timeout)
+                    if not rows:
+                        break
+                    await asyncio.to_thread(writer.write_group, [dict(row) for row in rows])
+                    if existing is not None:
+                        archived_ids.update(str(row["id"]) for row in rows)
+                added = writer.rows
+                if existing is not None:
+                    # Skipping ids written just now keeps the merge idempotent if a
+                    # previous merge replaced the file but its transaction rolled back
+                    await asyncio.to_thread(self._carry_over, existing["path"], writer, archived_ids)
+                size = await asyncio.to_thread(writer.close)
+            except BaseException:
+                writer.abort()
+                raise
+
+            await conn.execute(
+                UPSERT_ARCHIVE, partition.name, partition.start, partition.end, path, writer.rows, size
+            )
+            await conn.execute(
+                f"UPDATE {partition.name} SET raw_ai_response = NULL WHERE raw_ai_response IS NOT NULL",
+                timeout=settings.partition_statement_timeout
+            )
+        vacuum = "VACUUM (FULL, ANALYZE)" if settings.archive_vacuum_full else "VACUUM (ANALYZE)"
+        await conn.execute(f"{vacuum} {partition.name}", timeout=settings.partition_statement_timeout)
+
+        logger.info(f"Archived {added} rows of {partition.name} to {path} ({writer.rows} in file, {size} bytes)")
+        return added
+
+    @staticmethod
+    def _carry_over(path: str, writer: ArchiveWriter, skip_ids: set) -> None:
+        """Copy the rows of an earlier archive file into writer, one row group at a time."""
+        if not os.path.exists(path):
+            logger.error(f"Archive file {path} is missing; its earlier rows cannot be carried over")
+            return
+        group = []
+        for row in read_archive(path):
+            if row["id"] in skip_ids:
+                continue
+            group.append(row)
+            if len(group) >= settings.archive_row_group_size:
+                writer.write_group(group)
+                group = []
+        if group:
+            writer.write_group(group)
+
+    async def _drop_expired(self, conn, today: datetime) -> List[str]:
+        dropped = []
+        if settings.partition_retention_days:
+            cutoff = today - timedelta(days=settings.partition_retention_days)
+            archives = await self._archives(conn)
+            for partition in await self._partitions(conn):
+                if partition.is_default or partition.end is None or partition.end > cutoff:
+                    continue
+                if partition.name not in archives:
+                    continue  # never drop JSON that was not archived
+                async with conn.transaction():
+                    # No insert can slip in between the check and the drop
+                    await conn.execute(f"LOCK TABLE {partition.name} IN ACCESS EXCLUSIVE MODE", timeout=settings.partition_statement_timeout)
+                    if await self._has_json(conn, partition.name):
+                        logger.warning(f"Not dropping {partition.name}: it gained unarchived rows (archived next pass)")
+                        continue
+                    await conn.execute(f"ALTER TABLE {PARENT_TABLE} DETACH PARTITION {partition.name}")
+                    await conn.execute(f"DROP TABLE {partition.name}")
+                dropped.append(partition.name)
+                self.dropped += 1
+
+        if settings.archive_retention_days:
+            cutoff = today - timedelta(days=settings.archive_retention_days)
+            attached = {partition.name for partition in await self._partitions(conn)}
+            for name, archive in (await self._archives(conn)).items():
+                if archive["range_end"] is None or archive["range_end"] > cutoff:
+                    continue
+                if name in attached:
+                    continue  # its catalog row is what keeps the partition from being archived again
+                try:
+                    os.remove(archive["path"])
+                except FileNotFoundError:
+                    pass
+                await conn.execute(f"DELETE FROM {ARCHIVE_TABLE} WHERE partition_name = $1", name)
+                logger.info(f"Deleted expired archive {archive['path']}")
+        return dropped
+
+    async def describe(self) -> Dict[str, Any]:
+        """
+        Attached partitions with their ranges and row estimates, plus archive files.
+
+        Returns:
+            Dict for the CLI and diagnostics
+        """
+        async with self.client.get_connection() as conn:
+            if conn is None:
+                return {"available": False}
+            partitions = await self._partitions(conn)
+            estimates = {
+                row["relname"]: row["n_live_tup"]
+                for row in await conn.fetch(
+                    "SELECT relname, n_live_tup FROM pg_stat_user_tables WHERE relname = ANY($1::text[])",
+                    [p.name for p in partitions]
+                )
+            }
+            archives = await self._archives(conn)
+        return {
+            "available": True,
+            "partitions": [
+                {
+                    "name": p.name,
+                    "start": p.start.isoformat() if p.start else None,
+                    "end": p.end.isoformat() if p.end else ("DEFAULT" if p.is_default else None),
+                    "rows_estimate": estimates.get(p.name),
+                    "archived": p.name in archives,
+                }
+                for p in sorted(partitions, key=lambda p: (p.is_default, p.start or datetime.min.replace(tzinfo=timezone.utc)))
+            ],
+            "archives": [
+                {**archive, "range_end": archive["range_end"].isoformat() if archive["range_end"] else None}
+                for archive in archives.values()
+            ],
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Maintenance counters.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        return {
+            "interval_seconds": settings.partition_maintenance_interval,
+            "running": self._task is not None,
+            "runs": self.runs,
+            "failures": self.failures,
+            "partitions_created": self.created,
+            "partitions_archived": self.archived,
+            "rows_archived": self.archived_rows,
+            "partitions_dropped": self.dropped,
+            "last_run": self.last_run,
+        }
+
+
+# Global partition manager
+partition_manager = PartitionManager(db_client)
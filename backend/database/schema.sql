@@ -1,17 +1,25 @@
 -- Smart-IVR Call Logs Table
 -- This table stores all call processing results for transparency and debugging
 
+-- Partitioned by UTC day: the backend creates daily partitions ahead of time,
+-- archives old partitions' raw_ai_response to files and drops expired ones
+-- (database/partitions.py, manage_partitions.py). Existing unpartitioned
+-- installs: run database/migrations/001_partition_call_logs.sql.
 CREATE TABLE IF NOT EXISTS call_logs (
-    id UUID DEFAULT gen_random_uuid() PRIMARY KEY,
-    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    id UUID DEFAULT gen_random_uuid(),
+    created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW(),
     audio_url TEXT NOT NULL,
     detected_language TEXT NOT NULL,
     transcript TEXT NOT NULL,
     issue_category TEXT NOT NULL,
     confidence REAL NOT NULL,
     routed_to TEXT NOT NULL,
-    raw_ai_response JSONB
-);
+    raw_ai_response JSONB,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+-- Catch-all for rows outside every daily partition (should stay empty)
+CREATE TABLE IF NOT EXISTS call_logs_default PARTITION OF call_logs DEFAULT;
 
 -- Index for faster queries by timestamp
 CREATE INDEX IF NOT EXISTS idx_call_logs_created_at ON call_logs(created_at DESC);
@@ -30,4 +38,28 @@ COMMENT ON COLUMN call_logs.transcript IS 'Transcribed text from the audio';
 COMMENT ON COLUMN call_logs.issue_category IS 'Classified issue category';
 COMMENT ON COLUMN call_logs.confidence IS 'Confidence score of the classification (0.0-1.0)';
 COMMENT ON COLUMN call_logs.routed_to IS 'Final routing destination';
-COMMENT ON COLUMN call_logs.raw_ai_response IS 'Complete AI response for debugging and analysis';
+COMMENT ON COLUMN call_logs.raw_ai_response IS 'Complete AI response for debugging and analysis (NULL once the partition is archived)';
+
+-- Archived partitions: raw_ai_response moved to compressed columnar files on the backend host
+CREATE TABLE IF NOT EXISTS call_logs_archive (
+    partition_name TEXT PRIMARY KEY,
+    range_start TIMESTAMP WITH TIME ZONE,
+    range_end TIMESTAMP WITH TIME ZONE,
+    path TEXT NOT NULL,
+    rows BIGINT NOT NULL,
+    bytes BIGINT NOT NULL,
+    archived_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+COMMENT ON TABLE call_logs_archive IS 'call_logs partitions whose raw_ai_response JSON was moved to archive files (read with manage_partitions.py read-archive)';
+
+-- Runtime configuration (hot-reloaded by the backend when RUNTIME_CONFIG_SOURCE=db)
+-- Insert a new row to publish a version; the newest row (highest id) is active.
+CREATE TABLE IF NOT EXISTS ivr_config (
+    id BIGSERIAL PRIMARY KEY,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    version TEXT,
+    config JSONB NOT NULL
+);
+
+COMMENT ON TABLE ivr_config IS 'Versioned routing/category configuration: issue_categories, routing_rules, routing_pools, routing_overflow, keyword_weights';
@@ -0,0 +1,132 @@
+# Durable local spool for call logs (SQLite in WAL mode)
+import logging
+import sqlite3
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from models import CallLog
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS spool (
+        seq INTEGER PRIMARY KEY AUTOINCREMENT,
+        enqueued_at REAL NOT NULL,
+        payload TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS dead_letter (
+        seq INTEGER PRIMARY KEY,
+        enqueued_at REAL NOT NULL,
+        payload TEXT NOT NULL,
+        error TEXT,
+        buried_at REAL NOT NULL
+    );
+"""
+
+
+class CallLogSpool:
+    """
+    Append-only queue of call logs in a local SQLite database.
+
+    Every row gets its idempotency key (id) and created_at when it is appended,
+    so replaying it any number of times yields one call_logs row with the time
+    the call actually happened. In WAL mode with synchronous=NORMAL an append
+    is a single page write without fsync (tens of microseconds) and survives a
+    process crash; synchronous=FULL also survives power loss at the cost of an
+    fsync per append.
+
+    Rows leave the spool in seq order: read() returns the oldest rows, ack()
+    removes them once written, and bury() moves a row Postgres will never accept
+    to dead_letter so it cannot block the rows behind it.
+    """
+
+    def __init__(self, path: str, synchronous: str = "NORMAL"):
+        self.path = path
+        self.synchronous = synchronous
+        self.depth = 0
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None
+
+    def open(self) -> None:
+        """Open (creating if needed) the spool database."""
+        if self._conn is not None:
+            return
+        conn = sqlite3.connect(self.path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(f"PRAGMA synchronous={self.synchronous}")
+        conn.executescript(SCHEMA)
+        self.depth = conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+        self._conn = conn
+        if self.depth:
+            logger.info(f"Call log spool {self.path} holds {self.depth} unshipped rows")
+
+    def close(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def append(self, call_logs: List[CallLog]) -> None:
+        """
+        Durably queue call logs (assigning id / created_at where missing).
+
+        Raises:
+            sqlite3.Error: If the spool cannot be written (e.g. disk full)
+        """
+        now = time.time()
+        rows = []
+        for call_log in call_logs:
+            if call_log.id is None:
+                call_log.id = str(uuid.uuid4())
+            if call_log.created_at is None:
+                call_log.created_at = datetime.fromtimestamp(now, timezone.utc)
+            rows.append((now, call_log.model_dump_json()))
+        with self._conn:
+            self._conn.executemany("INSERT INTO spool (enqueued_at, payload) VALUES (?, ?)", rows)
+        self.depth += len(rows)
+
+    def read(self, limit: int) -> List[Tuple[int, CallLog]]:
+        """
+        Oldest unshipped rows.
+
+        Args:
+            limit: Maximum number of rows
+
+        Returns:
+            (seq, CallLog) pairs in append order
+        """
+        rows = self._conn.execute("SELECT seq, payload FROM spool ORDER BY seq LIMIT ?", (limit,)).fetchall()
+        return [(seq, CallLog.model_validate_json(payload)) for seq, payload in rows]
+
+    def ack(self, last_seq: int) -> None:
+        """Remove every row up to and including last_seq."""
+        with self._conn:
+            removed = self._conn.execute("DELETE FROM spool WHERE seq <= ?", (last_seq,)).rowcount
+        self.depth = max(0, self.depth - removed)
+
+    def bury(self, seq: int, error: str) -> None:
+        """Move one row to dead_letter."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO dead_letter (seq, enqueued_at, payload, error, buried_at) "
+                "SELECT seq, enqueued_at, payload, ?, ? FROM spool WHERE seq = ?",
+                (error, time.time(), seq)
+            )
+            removed = self._conn.execute("DELETE FROM spool WHERE seq = ?", (seq,)).rowcount
+        self.depth = max(0, self.depth - removed)
+
+    def lag(self) -> float:
+        """Seconds the oldest unshipped row has been waiting (0 when empty)."""
+        if self._conn is None or not self.depth:
+            return 0.0
+        row = self._conn.execute("SELECT enqueued_at FROM spool ORDER BY seq LIMIT 1").fetchone()
+        return max(0.0, time.time() - row[0]) if row else 0.0
+
+    def dead_letters(self) -> int:
+        if self._conn is None:
+            return 0
+        return self._conn.execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0]
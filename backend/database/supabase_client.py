@@ -1,21 +1,137 @@
-import psycopg2
-from psycopg2.extras import RealDictCursor, Json
+# Database module
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+import asyncpg
 from config import settings
 from models import CallLog
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
 import logging
-from contextlib import contextmanager
+from contextlib import asynccontextmanager
 from urllib.parse import urlparse, unquote
 
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between pool (re)open attempts while the database is unreachable
+RECONNECT_BACKOFF_SECONDS = 5.0
+
+# Supabase's transaction-mode pooler (PgBouncer) cannot hold named prepared statements
+SUPABASE_TRANSACTION_POOLER_PORT = 6543
+
+INSERT_CALL_LOG = """
+    INSERT INTO call_logs
+    (audio_url, detected_language, transcript, issue_category,
+     confidence, routed_to, raw_ai_response)
+    VALUES ($1, $2, $3, $4, $5, $6, $7)
+    RETURNING *
+"""
+
+CALL_LOG_COLUMNS = [
+    'audio_url', 'detected_language', 'transcript', 'issue_category',
+    'confidence', 'routed_to', 'raw_ai_response'
+]
+
+# Idempotent bulk write: COPY into a transaction-scoped staging table, then insert
+# skipping rows whose (id, created_at) already exists (a replayed batch)
+CALL_LOG_KEYED_COLUMNS = ['id', 'created_at'] + CALL_LOG_COLUMNS
+
+CREATE_CALL_LOG_STAGING = """
+    CREATE TEMP TABLE call_logs_staging (LIKE call_logs INCLUDING DEFAULTS) ON COMMIT DROP
+"""
+
+INSERT_STAGED_CALL_LOGS = f"""
+    INSERT INTO call_logs ({', '.join(CALL_LOG_KEYED_COLUMNS)})
+    SELECT {', '.join(CALL_LOG_KEYED_COLUMNS)} FROM call_logs_staging
+    ON CONFLICT DO NOTHING
+"""
+
+SELECT_RECENT_CALLS = """
+    SELECT * FROM call_logs
+    ORDER BY created_at DESC
+    LIMIT $1
+"""
+
+# Same, restricted to a recent window so partition pruning skips old partitions
+SELECT_RECENT_CALLS_SINCE = """
+    SELECT * FROM call_logs
+    WHERE created_at >= $2
+    ORDER BY created_at DESC
+    LIMIT $1
+"""
+
+# Labelled transcripts for the history classifier, paged by (created_at, id).
+# Rows the history tier labelled itself are skipped so it never learns from its own answers.
+SELECT_LABELLED_TRANSCRIPTS = """
+    SELECT id, created_at, transcript, issue_category FROM call_logs
+    WHERE confidence >= $3
+      AND ($1::timestamptz IS NULL OR (created_at, id) > ($1::timestamptz, $2::uuid))
+      AND COALESCE(raw_ai_response->'classification'->>'tier', '') <> 'history'
+    ORDER BY created_at, id
+    LIMIT $4
+"""
+
+# Newest labelled transcripts, to seed the history classifier without a full-history scan
+SELECT_LATEST_LABELLED_TRANSCRIPTS = """
+    SELECT id, created_at, transcript, issue_category FROM call_logs
+    WHERE confidence >= $1
+      AND COALESCE(raw_ai_response->'classification'->>'tier', '') <> 'history'
+    ORDER BY created_at DESC, id DESC
+    LIMIT $2
+"""
+
+SELECT_LATEST_CONFIG = """
+    SELECT id, version, config FROM ivr_config
+    ORDER BY id DESC
+    LIMIT 1
+"""
+
+
+def _encode_jsonb(value: Any) -> bytes:
+    """Encode a Python value as binary JSONB (version byte + JSON text)."""
+    return b'\x01' + json.dumps(value).encode('utf-8')
+
+
+def _decode_jsonb(data: bytes) -> Any:
+    """Decode binary JSONB (version byte + JSON text)."""
+    return json.loads(data[1:].decode('utf-8'))
+
+
+def _call_log_record(call_log: CallLog) -> tuple:
+    """Flatten a CallLog into a tuple ordered like CALL_LOG_COLUMNS."""
+    return (
+        call_log.audio_url,
+        call_log.detected_language,
+        call_log.transcript,
+        call_log.issue_category,
+        call_log.confidence,
+        call_log.routed_to,
+        call_log.raw_ai_response
+    )
+
 
 class DatabaseClient:
-    """PostgreSQL database client for Supabase using connection string."""
-    
+    """PostgreSQL database client for Supabase backed by an asyncpg connection pool."""
+
     def __init__(self):
-        """Initialize database connection pool."""
+        """Parse the connection string. The pool itself is opened by connect()."""
         self.database_url = settings.database_url
+        self.pool: Optional[asyncpg.Pool] = None
+        self._pool_lock: Optional[asyncio.Lock] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._next_connect_attempt = 0.0
+        self.statement_cache_size = settings.db_statement_cache_size
+
+        # Pool saturation metrics
+        self._acquire_count = 0
+        self._acquire_timeouts = 0
+        self._acquire_wait_total = 0.0
+        self._acquire_wait_max = 0.0
+        self._waiting = 0
+        self._healthy = False
+        self._last_health_check: Optional[float] = None
+
         if not self.database_url:
             logger.warning("DATABASE_URL not set. Database operations will fail gracefully.")
             self.connection_params = None
@@ -30,149 +146,429 @@ class DatabaseClient:
                     'user': parsed.username or 'postgres',
                     'password': unquote(parsed.password) if parsed.password else None,
                 }
+                if self.connection_params['port'] == SUPABASE_TRANSACTION_POOLER_PORT and self.statement_cache_size:
+                    logger.info("Transaction pooler detected - disabling prepared statement cache")
+                    self.statement_cache_size = 0
                 logger.info("Database client initialized with connection string")
             except Exception as e:
                 logger.error(f"Failed to parse DATABASE_URL: {e}")
                 self.connection_params = None
-    
-    @contextmanager
-    def get_connection(self):
+
+    async def _init_connection(self, conn: asyncpg.Connection) -> None:
+        """
+        Prepare a freshly opened pool connection.
+        Registers the JSONB codec. The codec uses the binary wire format so it
+        also works for binary COPY. Hot queries are prepared on first use by
+        asyncpg's per-connection statement cache.
+        """
+        await conn.set_type_codec(
+            'jsonb',
+            encoder=_encode_jsonb,
+            decoder=_decode_jsonb,
+            schema='pg_catalog',
+            format='binary'
+        )
+
+    async def connect(self) -> None:
         """
-        Context manager for database connections.
-        Automatically handles connection closing.
+        Open the connection pool and start the background health check.
+        Safe to call more than once; failures leave the client in degraded mode.
+        """
+        if not self.connection_params or self.pool is not None:
+            return
+        if time.monotonic() < self._next_connect_attempt:
+            return
+
+        if self._pool_lock is None:
+            self._pool_lock = asyncio.Lock()
+
+        async with self._pool_lock:
+            if self.pool is not None:
+                return
+            try:
+                self.pool = await asyncpg.create_pool(
+                    **self.connection_params,
+                    min_size=settings.db_pool_min_size,
+                    max_size=settings.db_pool_max_size,
+                    command_timeout=settings.db_command_timeout,
+                    max_inactive_connection_lifetime=settings.db_max_inactive_lifetime,
+                    statement_cache_size=self.statement_cache_size,
+                    init=self._init_connection
+                )
+                self._healthy = True
+                self._last_health_check = time.time()
+                self._health_task = asyncio.create_task(self._health_check_loop())
+                logger.info(
+                    f"Database pool opened (min={settings.db_pool_min_size}, "
+                    f"max={settings.db_pool_max_size})"
+                )
+            except Exception as e:
+                logger.error(f"Failed to open database pool: {e}")
+                self.pool = None
+                self._healthy = False
+                self._next_connect_attempt = time.monotonic() + RECONNECT_BACKOFF_SECONDS
+
+    async def close(self) -> None:
+        """Stop the health check and close all pooled connections."""
+        if self._health_task:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+
+        if self.pool is not None:
+            try:
+                await asyncio.wait_for(self.pool.close(), timeout=settings.db_command_timeout)
+            except Exception as e:
+                logger.warning(f"Database pool did not close cleanly: {e}")
+                self.pool.terminate()
+            self.pool = None
+            logger.info("Database pool closed")
+
+    async def _health_check_loop(self) -> None:
+        """Periodically run SELECT 1 through the pool so broken connections are recycled early."""
+        while True:
+            await asyncio.sleep(settings.db_health_check_interval)
+            try:
+                async with self.get_connection() as conn:
+                    if conn is None:
+                        self._healthy = False
+                        continue
+                    await conn.fetchval("SELECT 1")
+                    self._healthy = True
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._healthy = False
+                logger.warning(f"Database health check failed: {e}")
+            finally:
+                self._last_health_check = time.time()
+
+    @asynccontextmanager
+    async def get_connection(self):
+        """
+        Async context manager for pooled database connections.
+        Yields None when the database is unavailable so callers can degrade gracefully.
         """
         if not self.connection_params:
             logger.error("DATABASE_URL not configured or invalid")
             yield None
             return
-            
+
+        if self.pool is None:
+            await self.connect()
+        if self.pool is None:
+            yield None
+            return
+
         conn = None
+        self._waiting += 1
+        start = time.perf_counter()
         try:
-            conn = psycopg2.connect(**self.connection_params)
-            yield conn
-            conn.commit()
+            conn = await self.pool.acquire(timeout=settings.db_acquire_timeout)
+        except asyncio.TimeoutError:
+            self._acquire_timeouts += 1
+            logger.error("Timed out waiting for a database connection (pool saturated)")
         except Exception as e:
-            if conn:
-                conn.rollback()
             logger.error(f"Database connection error: {e}")
+        finally:
+            self._waiting -= 1
+            waited = time.perf_counter() - start
+            self._acquire_count += 1
+            self._acquire_wait_total += waited
+            self._acquire_wait_max = max(self._acquire_wait_max, waited)
+
+        if conn is None:
             yield None
+            return
+
+        try:
+            yield conn
         finally:
-            if conn:
-                conn.close()
-    
+            await self.pool.release(conn)
+
     async def log_call(self, call_log: CallLog) -> Optional[Dict[str, Any]]:
         """
         Log a call to the database.
-        
+
         Args:
             call_log: CallLog model instance
-            
+
         Returns:
             Inserted record or None on failure
         """
         if not self.connection_params:
             logger.warning("Skipping database logging - DATABASE_URL not configured")
             return None
-            
+
         try:
-            with self.get_connection() as conn:
+            async with self.get_connection() as conn:
                 if conn is None:
                     return None
-                
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-                
-                query = """
-                    INSERT INTO call_logs 
-                    (audio_url, detected_language, transcript, issue_category, 
-                     confidence, routed_to, raw_ai_response)
-                    VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    RETURNING *
-                """
-                
-                cursor.execute(query, (
-                    call_log.audio_url,
-                    call_log.detected_language,
-                    call_log.transcript,
-                    call_log.issue_category,
-                    call_log.confidence,
-                    call_log.routed_to,
-                    Json(call_log.raw_ai_response) if call_log.raw_ai_response else None
-                ))
-                
-                result = cursor.fetchone()
-                cursor.close()
-                
+
+                result = await conn.fetchrow(INSERT_CALL_LOG, *_call_log_record(call_log))
+
                 if result:
                     logger.info(f"Call logged successfully: {call_log.issue_category}")
                     return dict(result)
                 return None
-                
+
         except Exception as e:
             logger.error(f"Failed to log call: {e}")
             # Don't raise - logging failure shouldn't break the API
             return None
-    
+
+    async def log_calls_bulk(self, call_logs: List[CallLog]) -> int:
+        """
+        Write a batch of calls in a single binary COPY round trip.
+
+        Args:
+            call_logs: CallLog model instances
+
+        Returns:
+            Number of rows written (0 on failure)
+        """
+        if not call_logs:
+            return 0
+        if not self.connection_params:
+            logger.warning("Skipping bulk database logging - DATABASE_URL not configured")
+            return 0
+
+        try:
+            async with self.get_connection() as conn:
+                if conn is None:
+                    return 0
+
+                await conn.copy_records_to_table(
+                    'call_logs',
+                    records=[_call_log_record(call_log) for call_log in call_logs],
+                    columns=CALL_LOG_COLUMNS
+                )
+
+                logger.info(f"Bulk logged {len(call_logs)} calls")
+                return len(call_logs)
+
+        except Exception as e:
+            logger.error(f"Failed to bulk log {len(call_logs)} calls: {e}")
+            return 0
+
+    async def log_calls_idempotent(self, call_logs: List[CallLog]) -> Optional[int]:
+        """
+        Write a batch of keyed calls (id and created_at set) exactly once.
+
+        Rows already present - a batch replayed after a lost acknowledgement -
+        are skipped, so the caller can safely retry until it gets an answer.
+        Unlike log_calls_bulk this raises on statement errors, so the caller can
+        tell a rejected row from an unreachable database.
+
+        Args:
+            call_logs: CallLog model instances with id and created_at
+
+        Returns:
+            Number of new rows written, or None if no connection was available
+        """
+        if not call_logs:
+            return 0
+        async with self.get_connection() as conn:
+            if conn is None:
+                return None
+            async with conn.transaction():
+                await conn.execute(CREATE_CALL_LOG_STAGING)
+                await conn.copy_records_to_table(
+                    'call_logs_staging',
+                    records=[
+                        (uuid.UUID(call_log.id), call_log.created_at) + _call_log_record(call_log)
+                        for call_log in call_logs
+                    ],
+                    columns=CALL_LOG_KEYED_COLUMNS
+                )
+                status = await conn.execute(INSERT_STAGED_CALL_LOGS)
+        # Command tag: "INSERT 0 <rows>"
+        return int(status.split()[-1])
+
     async def get_recent_calls(self, limit: int = 10) -> List[Dict[str, Any]]:
         """
         Get recent call logs.
-        
+
+        Looks at the last recent_calls_window_hours first (partition pruning keeps
+        this on the newest partitions) and only scans further back if needed.
+
         Args:
             limit: Number of records to retrieve
-            
+
         Returns:
             List of call logs
         """
         if not self.connection_params:
             logger.warning("Skipping database query - DATABASE_URL not configured")
             return []
-            
+
         try:
-            with self.get_connection() as conn:
+            async with self.get_connection() as conn:
                 if conn is None:
                     return []
-                
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-                
-                query = """
-                    SELECT * FROM call_logs
-                    ORDER BY created_at DESC
-                    LIMIT %s
-                """
-                
-                cursor.execute(query, (limit,))
-                results = cursor.fetchall()
-                cursor.close()
-                
+
+                # Hot path: only the newest partitions; widen only if the window is too quiet
+                since = datetime.now(timezone.utc) - timedelta(hours=settings.recent_calls_window_hours)
+                results = await conn.fetch(SELECT_RECENT_CALLS_SINCE, limit, since)
+                if len(results) < limit:
+                    results = await conn.fetch(SELECT_RECENT_CALLS, limit)
+
                 if results:
                     return [dict(row) for row in results]
                 return []
-                
+
         except Exception as e:
             logger.error(f"Failed to retrieve calls: {e}")
             return []
-    
-    def test_connection(self) -> bool:
+
+    async def get_latest_config(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the newest runtime configuration document.
+
+        Returns:
+            Dict with id, version and config, or None if unavailable
+        """
+        if not self.connection_params:
+            return None
+
+        try:
+            async with self.get_connection() as conn:
+                if conn is None:
+                    return None
+
+                row = await conn.fetchrow(SELECT_LATEST_CONFIG)
+                return dict(row) if row else None
+
+        except Exception as e:
+            logger.error(f"Failed to retrieve runtime config: {e}")
+            return None
+
+    async def get_labelled_transcripts(
+        self,
+        after: Optional[Tuple[Any, Any]],
+        min_confidence: float,
+        limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Get classified transcripts logged after a (created_at, id) watermark.
+
+        Args:
+            after: Watermark of the last row already read, or None for the beginning
+            min_confidence: Only rows classified at least this confidently
+            limit: Page size
+
+        Returns:
+            Rows with id, created_at, transcript and issue_category, oldest first
+        """
+        if not self.connection_params:
+            return []
+
+        created_at, row_id = after or (None, None)
+        try:
+            async with self.get_connection() as conn:
+                if conn is None:
+                    return []
+
+                rows = await conn.fetch(SELECT_LABELLED_TRANSCRIPTS, created_at, row_id, min_confidence, limit)
+                return [dict(row) for row in rows]
+
+        except Exception as e:
+            logger.error(f"Failed to retrieve labelled transcripts: {e}")
+            return []
+
+    async def get_latest_labelled_transcripts(self, min_confidence: float, limit: int) -> List[Dict[str, Any]]:
+        """
+        Get the newest classified transcripts.
+
+        Args:
+            min_confidence: Only rows classified at least this confidently
+            limit: Maximum number of rows
+
+        Returns:
+            Rows with id, created_at, transcript and issue_category, oldest first
+        """
+        if not self.connection_params:
+            return []
+
+        try:
+            async with self.get_connection() as conn:
+                if conn is None:
+                    return []
+
+                rows = await conn.fetch(SELECT_LATEST_LABELLED_TRANSCRIPTS, min_confidence, limit)
+                return [dict(row) for row in reversed(rows)]
+
+        except Exception as e:
+            logger.error(f"Failed to retrieve latest labelled transcripts: {e}")
+            return []
+
+    async def test_connection(self) -> bool:
         """
         Test database connection.
-        
+
+        Opens a dedicated connection (bypassing the pool) so it reports raw reachability.
+
         Returns:
             True if connection successful, False otherwise
         """
+        if not self.connection_params:
+            return False
+
+        conn = None
         try:
-            with self.get_connection() as conn:
-                if conn is None:
-                    return False
-                
-                cursor = conn.cursor()
-                cursor.execute("SELECT 1")
-                result = cursor.fetchone()
-                cursor.close()
-                
-                return result is not None
-                
+            conn = await asyncpg.connect(
+                **self.connection_params,
+                statement_cache_size=self.statement_cache_size,
+                timeout=settings.db_command_timeout
+            )
+            result = await conn.fetchval("SELECT 1")
+            return result is not None
+
         except Exception as e:
             logger.error(f"Database connection test failed: {e}")
             return False
+        finally:
+            if conn is not None:
+                await conn.close()
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of pool size and saturation metrics.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        stats: Dict[str, Any] = {
+            "configured": self.connection_params is not None,
+            "connected": self.pool is not None,
+            "healthy": self._healthy,
+            "last_health_check": self._last_health_check,
+            "acquire_count": self._acquire_count,
+            "acquire_timeouts": self._acquire_timeouts,
+            "acquire_wait_avg_ms": round(
+                self._acquire_wait_total / self._acquire_count * 1000, 3
+            ) if self._acquire_count else 0.0,
+            "acquire_wait_max_ms": round(self._acquire_wait_max * 1000, 3),
+            "waiting": self._waiting,
+        }
+
+        if self.pool is not None:
+            size = self.pool.get_size()
+            idle = self.pool.get_idle_size()
+            max_size = self.pool.get_max_size()
+            stats.update({
+                "size": size,
+                "idle": idle,
+                "in_use": size - idle,
+                "min_size": self.pool.get_min_size(),
+                "max_size": max_size,
+                "saturation": round((size - idle) / max_size, 3) if max_size else 0.0,
+            })
+
+        return stats
 
 
 # Global database client instance
@@ -1,16 +1,29 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, Header, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
 from datetime import datetime
+import json
 import logging
-from typing import Dict, Any
+import time
+from typing import Dict, Any, Optional
 
-from models import ProcessIssueRequest, ProcessIssueResponse, HealthResponse, CallLog
+from models import ProcessIssueRequest, ProcessIssueResponse, BatchProcessRequest, QueueStateRequest, HealthResponse
 from config import settings
 from database.supabase_client import db_client
-from services.language_detection import detect_language
-from services.transcription import transcribe_audio
-from services.classification import classify_issue
-from services.routing import determine_routing
+from database.call_log_sink import call_log_sink
+from database.partitions import partition_manager
+from services.classification import classification_cache, get_tier_stats
+from services.llm_client import llm_client
+from services.pipeline import run_pipeline, build_fallback_response, get_pipeline_stats
+from services.streaming import StreamingSession, get_streaming_stats
+from services.batch import process_batch
+from services.routing_engine import routing_engine
+from services.runtime_config import runtime_config
+from services.single_flight import SingleFlight
+from services.admission import AdmissionController
+from services.history_classifier import history_classifier
 
 # Configure logging
 logging.basicConfig(
@@ -19,13 +32,50 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open shared resources on startup and release them on shutdown."""
+    # Database pool and LLM connection warmup overlap
+    await asyncio.gather(db_client.connect(), llm_client.warmup())
+    await call_log_sink.start()
+    await partition_manager.start()
+    await runtime_config.start()
+    classification_cache.load()
+    await history_classifier.start()
+    yield
+    await history_classifier.stop()
+    classification_cache.save()
+    await runtime_config.stop()
+    await llm_client.close()
+    await partition_manager.stop()
+    await call_log_sink.stop()
+    await db_client.close()
+
+
+# Concurrent duplicate /process-issue requests (webhook retries) share one pipeline run
+process_issue_flight = SingleFlight("process_issue")
+
+# Adaptive cap on concurrent pipeline runs; beyond it callers get fallback_routing at once
+request_admission = AdmissionController(
+    "request admission",
+    initial_limit=settings.admission_initial_limit,
+    min_limit=settings.admission_min_limit,
+    max_limit=settings.admission_max_limit,
+    latency_target=settings.admission_latency_target,
+    backoff=settings.admission_backoff,
+    enabled=settings.admission_enabled
+)
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Smart-IVR Backend",
     description="Multilingual IVR Routing System with Language + Intent Detection",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # CORS middleware for frontend integration
@@ -64,89 +114,239 @@ async def health_check():
     )
 
 
+@app.get("/metrics", tags=["Health"])
+async def get_metrics():
+    """
+    Runtime metrics for capacity tuning.
+    
+    Returns:
+        Connection pool, call log sink, LLM client and cache statistics
+    """
+    return {
+        "database": db_client.get_pool_stats(),
+        "call_log_sink": call_log_sink.get_stats(),
+        "partitions": partition_manager.get_stats(),
+        "llm": llm_client.get_stats(),
+        "classification_cache": classification_cache.get_stats(),
+        "classification": get_tier_stats(),
+        "history_classifier": history_classifier.get_stats(),
+        "pipeline": get_pipeline_stats(),
+        "streaming": get_streaming_stats(),
+        "routing": routing_engine.get_state(),
+        "config": runtime_config.get_stats(),
+        "process_issue_coalescing": process_issue_flight.get_stats(),
+        "admission": request_admission.get_stats()
+    }
+
+
+async def _process_and_log(audio_url: str) -> ProcessIssueResponse:
+    """Run the pipeline and queue its call log (once per coalesced group)."""
+    # Overloaded: answer within the SLA instead of queueing behind the AI tier
+    if not request_admission.try_acquire():
+        logger.warning(f"Shedding request at limit {request_admission.limit:.0f}: {audio_url}")
+        return build_fallback_response("overloaded")
+    
+    started = time.perf_counter()
+    succeeded = False
+    try:
+        # Steps 1-4: language, transcript, classification, routing
+        response, call_log = await run_pipeline(audio_url)
+        succeeded = True
+    finally:
+        request_admission.release(time.perf_counter() - started, succeeded)
+    
+    # Step 5: Queue for batched background write (failure won't affect response)
+    await call_log_sink.submit(call_log)
+    return response
+
+
 @app.post("/process-issue", response_model=ProcessIssueResponse, tags=["IVR"])
-async def process_issue(request: ProcessIssueRequest):
+async def process_issue(
+    request: ProcessIssueRequest,
+    idempotency_key: Optional[str] = Header(default=None)
+):
     """
     Main IVR processing endpoint.
     
     Flow:
-    1. Detect language from audio
-    2. Transcribe audio to text
+    1. Detect language from audio    } run concurrently; transcription
+    2. Transcribe audio to text      } is redone only if languages differ
     3. Classify issue into category
     4. Determine routing destination
     5. Log call to database
     
+    Identical requests arriving while one is still processing (keyed on the
+    Idempotency-Key header, the request's idempotency_key, or audio_url) wait for
+    that run and get its response; only one call log row is written.
+    
     Args:
         request: ProcessIssueRequest with audio_url
+        idempotency_key: Optional Idempotency-Key header
         
     Returns:
         ProcessIssueResponse with routing decision
     """
     logger.info(f"Processing issue for audio: {request.audio_url}")
+    key = idempotency_key or request.idempotency_key or request.audio_url
     
     try:
-        # Step 1: Detect Language
-        language_result = await detect_language(request.audio_url)
-        detected_language = language_result.get("language", "Unknown")
-        
-        # Step 2: Transcribe Audio
-        transcript = await transcribe_audio(request.audio_url, detected_language)
-        
-        # Step 3: Classify Issue
-        classification = await classify_issue(transcript, detected_language)
-        issue_category = classification.get("category", "service_request")
-        confidence = classification.get("confidence", 0.5)
-        
-        # Step 4: Determine Routing
-        routing = await determine_routing(issue_category, confidence)
-        routing_to = routing.get("routing_to")
-        fallback = routing.get("fallback", False)
-        
-        # Prepare response
-        response = ProcessIssueResponse(
-            language=detected_language,
-            transcript=transcript,
-            issue_category=issue_category,
-            confidence=confidence,
-            routing_to=routing_to,
-            fallback=fallback
-        )
-        
-        # Step 5: Log to Database (async, don't block response)
-        call_log = CallLog(
-            audio_url=request.audio_url,
-            detected_language=detected_language,
-            transcript=transcript,
-            issue_category=issue_category,
-            confidence=confidence,
-            routed_to=routing_to,
-            raw_ai_response={
-                "language_detection": language_result,
-                "classification": classification,
-                "routing": routing
-            }
-        )
-        
-        # Log asynchronously (failure won't affect response)
-        await db_client.log_call(call_log)
+        response, shared = await process_issue_flight.do(key, lambda: _process_and_log(request.audio_url))
         
-        logger.info(f"Issue processed successfully: {issue_category} -> {routing_to}")
+        origin = " (coalesced)" if shared else ""
+        logger.info(f"Issue processed successfully{origin}: {response.issue_category} -> {response.routing_to}")
         return response
         
     except Exception as e:
         logger.error(f"Error processing issue: {e}", exc_info=True)
         
         # Return fallback response instead of error (demo safety)
-        fallback_response = ProcessIssueResponse(
-            language="Unknown",
-            transcript="Audio processing failed",
-            issue_category="general_support",
-            confidence=0.0,
-            routing_to=settings.fallback_routing,
-            fallback=True
+        return build_fallback_response()
+
+
+@app.post("/process-issues", tags=["IVR"])
+async def process_issues(request: BatchProcessRequest):
+    """
+    Batch IVR processing for recorded calls (e.g. overnight reprocessing).
+    
+    Recordings are processed by a bounded pool of workers and results are
+    streamed back as NDJSON, one line per recording, in completion order.
+    Each line carries the input index and audio_url plus the /process-issue
+    response fields. Call logs are written in bulk.
+    
+    Args:
+        request: BatchProcessRequest with audio_urls and optional concurrency
+        
+    Returns:
+        application/x-ndjson stream of results
+    """
+    if len(request.audio_urls) > settings.batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large (max {settings.batch_max_items} audio_urls)"
         )
+    
+    logger.info(f"Processing batch of {len(request.audio_urls)} recordings")
+    
+    async def ndjson():
+        async for result in process_batch(request.audio_urls, request.concurrency):
+            yield json.dumps(result, ensure_ascii=False) + "\n"
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@app.websocket("/ws/process-issue")
+async def process_issue_stream(websocket: WebSocket):
+    """
+    Streaming IVR endpoint.
+    
+    Protocol (client -> server):
+    - {"type": "start", "audio_url": optional, "language": optional}
+    - binary frames: audio chunks as the caller speaks
+    - {"type": "transcript", "text": "..."}: partial transcript from a client-side recognizer
+    - {"type": "end", "text": optional final transcript}: end of speech
+    
+    Protocol (server -> client):
+    - {"type": "partial", ...}: running transcript and best category so far
+    - {"type": "routing", "early": true, ...}: routing decision as soon as confidence allows
+    - {"type": "final", ...}: committed decision at end of speech (same shape as /process-issue)
+    """
+    await websocket.accept()
+    session = None
+    logged = False
+    
+    try:
+        start = await websocket.receive_json()
+        if start.get("type") != "start":
+            await websocket.send_json({"type": "error", "detail": "First message must be type 'start'"})
+            await websocket.close()
+            return
+        
+        session = StreamingSession(start.get("audio_url"), start.get("language"))
+        await session.start()
+        await websocket.send_json({"type": "started", "session_id": session.session_id, "language": session.language})
         
-        return fallback_response
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            
+            if message.get("bytes") is not None:
+                event = await session.add_audio(message["bytes"])
+                if event:
+                    await websocket.send_json(event)
+                continue
+            
+            payload = json.loads(message.get("text") or "{}")
+            if payload.get("type") == "transcript" and payload.get("text"):
+                await websocket.send_json(await session.update_transcript(payload["text"]))
+            elif payload.get("type") == "end":
+                if payload.get("text"):
+                    session.transcript = payload["text"]
+                await websocket.send_json(await session.finish())
+                await call_log_sink.submit(session.to_call_log())
+                logged = True
+                await websocket.close()
+                return
+        
+    except WebSocketDisconnect:
+        logger.info("Streaming client disconnected")
+    except Exception as e:
+        logger.error(f"Error in streaming session: {e}", exc_info=True)
+        try:
+            await websocket.send_json({"type": "final", "early": False, **build_fallback_response().model_dump()})
+            await websocket.close()
+        except Exception:
+            pass
+    
+    # Caller hung up after an early decision - still record the call
+    if session is not None and session.decided and not logged:
+        await call_log_sink.submit(session.to_call_log())
+
+
+@app.get("/config", tags=["Routing"])
+async def get_runtime_config():
+    """
+    Active configuration version (categories, routing rules) and where it came from.
+    """
+    return runtime_config.current.describe()
+
+
+@app.post("/config/reload", tags=["Routing"])
+async def reload_runtime_config():
+    """
+    Check the configuration source now instead of waiting for the next poll.
+    """
+    reloaded = await runtime_config.reload()
+    return {"reloaded": reloaded, **runtime_config.get_stats()}
+
+
+@app.post("/routing/queues", tags=["Routing"])
+async def update_queue_state(request: QueueStateRequest):
+    """
+    Feed live queue depth / agent availability into the routing engine.
+    
+    Call this from the ACD or agent desktop whenever queue state changes.
+    Unknown queues are added to the given pool.
+    
+    Returns:
+        Applied queue states and the names of ignored (unknown) queues
+    """
+    applied, ignored = [], []
+    for update in request.queues:
+        state = routing_engine.update_queue(update.queue, update.depth, update.available_agents, update.pool)
+        if state is None:
+            ignored.append(update.queue)
+        else:
+            applied.append(state)
+    return {"applied": applied, "ignored": ignored}
+
+
+@app.get("/routing/queues", tags=["Routing"])
+async def get_queue_state():
+    """
+    Current routing pools, queue loads and overflow targets.
+    """
+    return routing_engine.get_state()
 
 
 @app.get("/recent-calls", tags=["Analytics"])
@@ -0,0 +1,100 @@
+"""
+call_logs partition tooling.
+
+Usage:
+    python manage_partitions.py migrate        # convert an unpartitioned call_logs (once)
+    python manage_partitions.py maintain       # create ahead / archive / drop expired, then exit
+    python manage_partitions.py status         # partitions, row estimates and archive files
+    python manage_partitions.py read-archive call_log_archive/call_logs_p20260101.ivrarch [--keys classification] [--id UUID]
+
+`maintain` is what the backend runs every PARTITION_MAINTENANCE_INTERVAL seconds;
+schedule it from cron instead when that is set to 0.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from config import settings
+from database.archive import read_archive, read_footer
+from database.partitions import partition_manager
+from database.supabase_client import db_client
+
+MIGRATION = os.path.join(os.path.dirname(os.path.abspath(__file__)), "database", "migrations", "001_partition_call_logs.sql")
+
+
+async def migrate() -> int:
+    async with db_client.get_connection() as conn:
+        if conn is None:
+            print("❌ Database unavailable")
+            return 1
+        partitioned = await conn.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid WHERE c.relname = 'call_logs')"
+        )
+        if partitioned:
+            print("✅ call_logs is already partitioned")
+            return 0
+        with open(MIGRATION, "r", encoding="utf-8") as f:
+            await conn.execute(f.read(), timeout=settings.partition_statement_timeout)
+    print("✅ call_logs converted to daily partitions")
+    return await maintain()
+
+
+async def maintain() -> int:
+    summary = await partition_manager.maintain()
+    print(json.dumps(summary, indent=2))
+    return 0
+
+
+async def status() -> int:
+    print(json.dumps(await partition_manager.describe(), indent=2, default=str))
+    return 0
+
+
+def show_archive(path: str, keys: str, row_id: str, limit: int) -> int:
+    footer = read_footer(path)
+    print(json.dumps({"metadata": footer["metadata"], "rows": footer["rows"], "row_groups": len(footer["groups"])}, indent=2))
+    shown = 0
+    for row in read_archive(path, keys.split(",") if keys else None):
+        if row_id and row["id"] != row_id:
+            continue
+        print(json.dumps(row, ensure_ascii=False))
+        shown += 1
+        if limit and shown >= limit:
+            break
+    return 0
+
+
+async def run(args: argparse.Namespace) -> int:
+    await db_client.connect()
+    try:
+        if args.command == "migrate":
+            return await migrate()
+        if args.command == "maintain":
+            return await maintain()
+        return await status()
+    finally:
+        await db_client.close()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="call_logs partition tooling")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("migrate", help="convert an unpartitioned call_logs table")
+    commands.add_parser("maintain", help="run one maintenance pass")
+    commands.add_parser("status", help="show partitions and archives")
+    reader = commands.add_parser("read-archive", help="print rows from an archive file")
+    reader.add_argument("path")
+    reader.add_argument("--keys", default="", help="comma-separated raw_ai_response keys (default: all)")
+    reader.add_argument("--id", default="", help="only the row with this id")
+    reader.add_argument("--limit", type=int, default=20, help="max rows to print (0 = all)")
+    args = parser.parse_args()
+
+    if args.command == "read-archive":
+        return show_archive(args.path, args.keys, args.id, args.limit)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
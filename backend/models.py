@@ -1,11 +1,13 @@
-from pydantic import BaseModel, ConfigDict
-from typing import Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, Field
+from typing import Optional, Dict, Any, List
 from datetime import datetime
 
 
 class ProcessIssueRequest(BaseModel):
     """Request model for /process-issue endpoint."""
     audio_url: str
+    # Requests with the same key (default: audio_url) that overlap are coalesced
+    idempotency_key: Optional[str] = None
     
     model_config = ConfigDict(
         json_schema_extra={
@@ -16,6 +18,24 @@ class ProcessIssueRequest(BaseModel):
     )
 
 
+class BatchProcessRequest(BaseModel):
+    """Request model for /process-issues batch endpoint."""
+    audio_urls: List[str] = Field(..., min_length=1)
+    concurrency: Optional[int] = Field(default=None, ge=1)
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "audio_urls": [
+                    "https://example.com/call-001.wav",
+                    "https://example.com/call-002.wav"
+                ],
+                "concurrency": 8
+            }
+        }
+    )
+
+
 class ProcessIssueResponse(BaseModel):
     """Response model for /process-issue endpoint."""
     language: str
@@ -24,6 +44,9 @@ class ProcessIssueResponse(BaseModel):
     confidence: float
     routing_to: str
     fallback: bool
+    # Why the answer is a fallback or degraded: overloaded, llm_overloaded,
+    # low_confidence, unknown_category or error (None for a normal answer)
+    fallback_reason: Optional[str] = None
     
     model_config = ConfigDict(
         json_schema_extra={
@@ -33,7 +56,32 @@ class ProcessIssueResponse(BaseModel):
                 "issue_category": "billing",
                 "confidence": 0.82,
                 "routing_to": "Billing Support",
-                "fallback": False
+                "fallback": False,
+                "fallback_reason": None
+            }
+        }
+    )
+
+
+class QueueStateUpdate(BaseModel):
+    """Live load of one routing queue."""
+    queue: str
+    pool: Optional[str] = None
+    depth: int = Field(..., ge=0)
+    available_agents: int = Field(..., ge=0)
+
+
+class QueueStateRequest(BaseModel):
+    """Request model for /routing/queues endpoint."""
+    queues: List[QueueStateUpdate] = Field(..., min_length=1)
+    
+    model_config = ConfigDict(
+        json_schema_extra={
+            "example": {
+                "queues": [
+                    {"queue": "Billing Support", "depth": 12, "available_agents": 3},
+                    {"queue": "Billing Support - Pune", "pool": "Billing Support", "depth": 2, "available_agents": 4}
+                ]
             }
         }
     )
@@ -0,0 +1,78 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from config import settings
+from metrics import metrics
+from models import CallLog
+from database.supabase_client import db_client
+from database.call_log_sink import call_log_sink
+from services.pipeline import run_pipeline, build_fallback_response
+
+logger = logging.getLogger(__name__)
+
+
+async def _log_bulk(call_logs: List[CallLog]) -> None:
+    """Hand one chunk of batch rows to the sink's spool (direct COPY when the sink is not running)."""
+    if not db_client.connection_params:
+        return
+    if call_log_sink.running or not await db_client.log_calls_bulk(call_logs):
+        await call_log_sink.submit_many(call_logs)
+
+
+async def process_batch(audio_urls: List[str], concurrency: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run the IVR pipeline over many recordings with bounded concurrency.
+
+    A fixed set of workers pulls URLs from a queue, so thousands of inputs never
+    create thousands of tasks. Results are yielded in completion order, and call
+    logs are written in bulk chunks of call_log_batch_size rows.
+
+    Args:
+        audio_urls: Recordings to process
+        concurrency: Worker count (capped at settings.batch_max_concurrency)
+
+    Yields:
+        Dict per recording: index, audio_url and the /process-issue response fields
+    """
+    workers = max(1, min(concurrency or settings.batch_max_concurrency, settings.batch_max_concurrency))
+    pending: asyncio.Queue = asyncio.Queue()
+    results: asyncio.Queue = asyncio.Queue()
+    for index, audio_url in enumerate(audio_urls):
+        pending.put_nowait((index, audio_url))
+
+    async def worker() -> None:
+        while True:
+            try:
+                index, audio_url = pending.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            try:
+                response, call_log = await run_pipeline(audio_url)
+            except Exception as e:
+                logger.error(f"Batch item {index} failed: {e}")
+                metrics.increment("batch.errors")
+                response, call_log = build_fallback_response(), None
+            await results.put((index, audio_url, response, call_log))
+
+    tasks = [asyncio.create_task(worker()) for _ in range(min(workers, len(audio_urls)))]
+    log_buffer: List[CallLog] = []
+    metrics.increment("batch.requests")
+
+    try:
+        for _ in range(len(audio_urls)):
+            index, audio_url, response, call_log = await results.get()
+            metrics.increment("batch.items")
+
+            if call_log is not None:
+                log_buffer.append(call_log)
+                if len(log_buffer) >= settings.call_log_batch_size:
+                    await _log_bulk(log_buffer)
+                    log_buffer = []
+
+            yield {"index": index, "audio_url": audio_url, **response.model_dump()}
+    finally:
+        for task in tasks:
+            task.cancel()
+        if log_buffer:
+            await _log_bulk(log_buffer)
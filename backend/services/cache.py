@@ -0,0 +1,179 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalize a transcript for cache lookups.
+
+    Applies NFKC, case folding, strips punctuation and collapses whitespace so
+    "Mera bill zyada aa gaya hai!" and "mera  bill zyada aa gaya hai" share a key.
+    Devanagari vowel signs are kept (they are marks, not punctuation).
+    """
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = "".join(
+        " " if unicodedata.category(ch).startswith("P") else ch
+        for ch in text
+    )
+    return _WHITESPACE.sub(" ", text).strip()
+
+
+def version_of(items: Iterable[str]) -> str:
+    """Short stable hash of a set of strings (e.g. the category list) for cache keys."""
+    digest = hashlib.sha1("|".join(sorted(items)).encode("utf-8")).hexdigest()
+    return digest[:12]
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache with per-entry TTL and hit/miss counters.
+
+    Values must be JSON-serializable when a persist_path is given: the cache is
+    then loaded from that file on load() and written back on save(), so warm
+    entries survive restarts. Expiry uses wall-clock time for the same reason.
+    """
+
+    def __init__(self, max_size: int, ttl: float, persist_path: str = "", name: str = "cache"):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.persist_path = persist_path
+        self.name = name
+
+        self._data: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value (refreshing its LRU position) or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._data[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Insert or replace a value, evicting least recently used entries when full."""
+        if self.max_size <= 0:
+            return
+        expires_at = time.time() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def load(self) -> int:
+        """
+        Load unexpired entries from persist_path.
+
+        Returns:
+            Number of entries loaded
+        """
+        if not self.persist_path or not os.path.exists(self.persist_path):
+            return 0
+        try:
+            with open(self.persist_path, "r", encoding="utf-8") as f:
+                entries = json.load(f)
+        except Exception as e:
+            logger.error(f"Failed to load {self.name} from {self.persist_path}: {e}")
+            return 0
+
+        now = time.time()
+        loaded = 0
+        with self._lock:
+            # File is written oldest-first, so replaying it restores LRU order
+            for key, expires_at, value in entries:
+                if expires_at > now:
+                    self._data[key] = (expires_at, value)
+                    loaded += 1
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+        logger.info(f"Loaded {loaded} entries into {self.name}")
+        return loaded
+
+    def save(self) -> int:
+        """
+        Write unexpired entries to persist_path (atomically via a temp file).
+
+        Returns:
+            Number of entries written
+        """
+        if not self.persist_path:
+            return 0
+
+        now = time.time()
+        with self._lock:
+            entries = [
+                [key, expires_at, value]
+                for key, (expires_at, value) in self._data.items()
+                if expires_at > now
+            ]
+
+        tmp_path = f"{self.persist_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(entries, f, ensure_ascii=False)
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            logger.error(f"Failed to save {self.name} to {self.persist_path}: {e}")
+            return 0
+
+        logger.info(f"Saved {len(entries)} entries from {self.name}")
+        return len(entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of cache size and effectiveness.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "persistent": bool(self.persist_path),
+        }
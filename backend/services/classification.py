@@ -1,105 +1,306 @@
+import asyncio
 import logging
-from typing import Dict, Any
-from openai import OpenAI
+import time
+from typing import Dict, Any, List, Optional, Tuple
 from config import settings
+from metrics import metrics
+from services.llm_client import llm_client
+from services.admission import AdmissionController
+from services.batching import MicroBatcher
+from services.resilience import CircuitOpenError
+from services.cache import TTLCache, normalize_text
+from services.history_classifier import history_classifier
+from services.runtime_config import ConfigSnapshot, runtime_config
 import json
 
 logger = logging.getLogger(__name__)
 
+# Tiers in the order they are tried, for per-tier stats
+TIERS = ["keyword", "cache", "history", "llm", "keyword_fallback", "keyword_shed"]
 
-async def classify_issue(transcript: str, language: str) -> Dict[str, Any]:
+# LLM classifications keyed on normalized transcript + language + category set
+classification_cache = TTLCache(
+    max_size=settings.classification_cache_size,
+    ttl=settings.classification_cache_ttl,
+    persist_path=settings.classification_cache_path,
+    name="classification cache"
+)
+
+
+def _cache_key(transcript: str, language: str, snapshot: ConfigSnapshot) -> str:
+    """Build the cache key for a transcript under the snapshot's category set."""
+    return "|".join([
+        snapshot.categories_version,
+        (language or "").casefold(),
+        normalize_text(transcript)
+    ])
+
+
+def _answered_by(tier: str, result: Dict[str, Any], started: float) -> Dict[str, Any]:
+    """Tag a result with the tier that produced it and record tier stats."""
+    metrics.increment(f"classification.tier.{tier}")
+    metrics.observe("classification.total", time.perf_counter() - started)
+    result["tier"] = tier
+    return result
+
+
+def _parse_content(content: str) -> Any:
+    """Decode the JSON in an LLM reply, tolerating markdown code fences."""
+    # Handle potential markdown code blocks from LLM
+    return json.loads(content.replace("```json", "").replace("```", "").strip())
+
+
+async def _llm_single(transcript: str, language: str, snapshot: ConfigSnapshot) -> Dict[str, Any]:
+    """
+    One classification prompt for one transcript.
+
+    Raises:
+        Exception: API or parsing errors, for the caller's fallback handling
+    """
+    content = await llm_client.complete(
+        messages=[{"role": "user", "content": snapshot.build_prompt(transcript, language)}],
+        temperature=0.3,
+        max_tokens=150
+    )
+    return _parse_content(content)
+
+
+def _parse_batch(content: str, count: int) -> List[Optional[Dict[str, Any]]]:
+    """
+    Split a multi-item reply into per-item results by id.
+
+    Returns:
+        One entry per item; None where the reply had no usable result for it
+    """
+    results: List[Optional[Dict[str, Any]]] = [None] * count
+    try:
+        data = _parse_content(content)
+    except ValueError as e:
+        logger.warning(f"Unparseable batch classification reply: {e}")
+        return results
+
+    entries = data.get("results", []) if isinstance(data, dict) else data
+    for entry in entries if isinstance(entries, list) else []:
+        if not isinstance(entry, dict) or not isinstance(entry.get("category"), str):
+            continue
+        position = entry.get("id")
+        if isinstance(position, int) and 0 <= position < count:
+            results[position] = {key: value for key, value in entry.items() if key != "id"}
+    return results
+
+
+async def _classify_group(items: List[Tuple[str, str, ConfigSnapshot]], results: List[Any]) -> None:
+    """Classify items sharing one configuration snapshot, filling results in place."""
+    snapshot = items[0][2]
+    if len(items) > 1:
+        try:
+            content = await llm_client.complete(
+                messages=[{"role": "user", "content": snapshot.build_batch_prompt(
+                    [(transcript, language) for transcript, language, _ in items]
+                )}],
+                temperature=0.3,
+                max_tokens=settings.llm_batch_item_tokens * len(items)
+            )
+        except Exception as e:
+            # Provider failure: individual calls would hit the same provider
+            results[:] = [e] * len(items)
+            return
+        results[:] = _parse_batch(content, len(items))
+
+    missing = [position for position, result in enumerate(results) if result is None]
+    if missing and len(items) > 1:
+        metrics.increment("classification.batch_fallbacks", len(missing))
+        logger.info(f"Batch classification: {len(missing)}/{len(items)} items retried individually")
+    singles = await asyncio.gather(
+        *(_llm_single(*items[position]) for position in missing),
+        return_exceptions=True
+    )
+    for position, result in zip(missing, singles):
+        results[position] = result
+
+
+async def _classify_batch(items: List[Tuple[str, str, ConfigSnapshot]]) -> List[Any]:
+    """
+    MicroBatcher handler: one multi-item prompt per configuration snapshot in the batch.
+
+    Items the reply does not cover (or a reply that does not parse) fall back to
+    single-item prompts.
+    """
+    groups: Dict[int, List[int]] = {}
+    for position, (_, _, snapshot) in enumerate(items):
+        groups.setdefault(id(snapshot), []).append(position)
+
+    group_results = {key: [None] * len(positions) for key, positions in groups.items()}
+    await asyncio.gather(*(
+        _classify_group([items[position] for position in positions], group_results[key])
+        for key, positions in groups.items()
+    ))
+
+    results: List[Any] = [None] * len(items)
+    for key, positions in groups.items():
+        for position, result in zip(positions, group_results[key]):
+            results[position] = result
+    return results
+
+
+# Concurrent LLM-tier classifications share one multi-item prompt
+llm_batcher = MicroBatcher(
+    _classify_batch,
+    max_batch=settings.llm_batch_size,
+    window=settings.llm_batch_window_ms / 1000,
+    name="llm batcher"
+) if settings.llm_batch_size > 1 else None
+
+
+# Adaptive cap on concurrent LLM-tier calls; beyond it the keyword answer is used
+llm_admission = AdmissionController(
+    "llm admission",
+    initial_limit=settings.llm_admission_initial_limit,
+    min_limit=settings.llm_admission_min_limit,
+    max_limit=settings.llm_admission_max_limit,
+    latency_target=settings.llm_admission_latency_target,
+    backoff=settings.admission_backoff,
+    enabled=settings.admission_enabled
+)
+
+
+async def _classify_with_llm(transcript: str, language: str, snapshot: ConfigSnapshot) -> Optional[Dict[str, Any]]:
+    """
+    LLM tier: ask Grok for a classification (micro-batched with concurrent callers).
+
+    Returns:
+        Parsed classification, or None if the LLM is unavailable or fails
+    """
+    if not llm_client.is_configured:
+        return None
+
+    try:
+        with metrics.timer("classification.llm"):
+            if llm_batcher is not None:
+                result = await llm_batcher.submit((transcript, language, snapshot))
+            else:
+                result = await _llm_single(transcript, language, snapshot)
+
+        logger.info(f"Grok classification result: {result}")
+        return result
+    except CircuitOpenError:
+        # Provider is degraded: go straight to the local fallback
+        metrics.increment("classification.circuit_open")
+        return None
+    except Exception as api_error:
+        metrics.increment("classification.llm_errors")
+        logger.error(f"Grok API failed: {api_error}")
+        return None
+
+
+async def classify_issue(transcript: str, language: str, snapshot: Optional[ConfigSnapshot] = None) -> Dict[str, Any]:
     """
-    Classify the issue from transcript using OpenAI GPT.
-    
+    Classify the issue from transcript with a tiered pipeline.
+
+    1. Keyword tier - answers immediately when its confidence clears local_confidence_gate
+    2. Cache tier - previous LLM answers for the same normalized transcript
+    3. History tier - nearest neighbours among past high-confidence calls
+    4. LLM tier - Grok, only for ambiguous transcripts, and only while the
+       LLM stage is within its adaptive concurrency limit
+    5. Keyword fallback - the keyword answer if the LLM is unavailable; when the
+       LLM was skipped for load the result carries degraded="llm_overloaded"
+
     Args:
         transcript: Transcribed text
         language: Detected language
-        
+        snapshot: Configuration version to classify against (defaults to the current one)
+
     Returns:
-        Dict with issue_category and confidence score
+        Dict with category, confidence score and the tier that answered
     """
+    started = time.perf_counter()
+    snapshot = snapshot or runtime_config.current
     try:
         logger.info(f"Classifying issue from transcript: {transcript[:50]}...")
-        
-        # Initialize xAI (Grok) client
-        # Grok is API-compatible with OpenAI SDK
-        client = OpenAI(
-            api_key=settings.xai_api_key,
-            base_url=settings.xai_base_url
-        )
-        
-        # Build classification prompt
-        prompt = f"""You are an IVR classification system. Analyze the following customer statement and classify it into ONE of these categories:
-- billing
-- technical_issue
-- password_reset
-- account_access
-- service_request
-
-Customer statement (in {language}): "{transcript}"
-
-Respond ONLY with valid JSON in this exact format:
-{{
-    "category": "one_of_the_categories_above",
-    "confidence": 0.85,
-    "reasoning": "brief explanation"
-}}"""
-
-        # For MVP: Use Grok for classification if key is present
-        if settings.xai_api_key and "your-grok-api-key" not in settings.xai_api_key:
+
+        # Tier 1: local keyword engine (microseconds)
+        with metrics.timer("classification.keyword"):
+            local_result = snapshot.keyword_classifier.classify(transcript)
+        if local_result["confidence"] >= settings.local_confidence_gate:
+            logger.info(f"Keyword tier confident: {local_result['category']} ({local_result['confidence']})")
+            return _answered_by("keyword", local_result, started)
+
+        # Tier 2: repeated phrasings skip the LLM round trip entirely
+        cache_key = _cache_key(transcript, language, snapshot)
+        cached = classification_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"Classification cache hit: {cached['category']}")
+            return _answered_by("cache", dict(cached), started)
+
+        # Tier 3: similar past calls (one matrix-vector product)
+        with metrics.timer("classification.history"):
+            history_result = history_classifier.classify(transcript, snapshot.issue_categories)
+        if history_result is not None and history_result["confidence"] >= settings.history_confidence_gate:
+            logger.info(f"History tier confident: {history_result['category']} ({history_result['confidence']})")
+            return _answered_by("history", history_result, started)
+
+        # Tier 4: LLM for ambiguous transcripts, unless the LLM stage is saturated
+        llm_result = None
+        if llm_client.is_configured:
+            if not llm_admission.try_acquire():
+                logger.warning(f"LLM stage at its limit ({llm_admission.limit:.0f}), answering from keywords")
+                local_result["degraded"] = "llm_overloaded"
+                return _answered_by("keyword_shed", local_result, started)
+            llm_started = time.perf_counter()
             try:
-                response = client.chat.completions.create(
-                    model=settings.xai_model,
-                    messages=[{"role": "user", "content": prompt}],
-                    temperature=0.3,
-                    max_tokens=150
-                )
-                content = response.choices[0].message.content
-                # Handle potential markdown code blocks from LLM
-                content = content.replace("```json", "").replace("```", "").strip()
-                result = json.loads(content)
-                
-                logger.info(f"Grok classification result: {result}")
-                return result
-            except Exception as api_error:
-                logger.error(f"Grok API failed: {api_error}")
-                # Fall through to mock logic
-        
-        # Mock classification based on keywords (Fallback)
-        transcript_lower = transcript.lower()
-        
-        if any(word in transcript_lower for word in ["bill", "payment", "charge", "zyada", "paisa"]):
-            category = "billing"
-            confidence = 0.82
-        elif any(word in transcript_lower for word in ["password", "reset", "bhool", "gaya"]):
-            category = "password_reset"
-            confidence = 0.78
-        elif any(word in transcript_lower for word in ["access", "login", "account", "khata"]):
-            category = "account_access"
-            confidence = 0.75
-        elif any(word in transcript_lower for word in ["not working", "error", "problem", "technical"]):
-            category = "technical_issue"
-            confidence = 0.70
-        else:
-            category = "service_request"
-            confidence = 0.60
-        
-        result = {
-            "category": category,
-            "confidence": confidence,
-            "reasoning": f"Detected keywords related to {category}"
-        }
-        
-        # result = json.loads(response.choices[0].message.content)
-        
-        logger.info(f"Issue classified: {result['category']} (confidence: {result['confidence']})")
-        return result
-        
+                llm_result = await _classify_with_llm(transcript, language, snapshot)
+            finally:
+                llm_admission.release(time.perf_counter() - llm_started, llm_result is not None)
+        if llm_result is not None:
+            classification_cache.set(cache_key, llm_result)
+            return _answered_by("llm", dict(llm_result), started)
+
+        # Tier 5: keyword answer even below the gate
+        logger.info(f"Issue classified: {local_result['category']} (confidence: {local_result['confidence']})")
+        return _answered_by("keyword_fallback", local_result, started)
+
     except Exception as e:
         logger.error(f"Classification failed: {e}")
+        metrics.increment("classification.errors")
         # Fallback to general support
         return {
             "category": "service_request",
             "confidence": 0.30,
             "reasoning": "Classification error - defaulting to general support"
         }
+
+
+def get_tier_stats() -> Dict[str, Any]:
+    """
+    Share of classifications answered by each tier, with tier latencies.
+
+    Returns:
+        Dict suitable for the /metrics endpoint
+    """
+    counts = {tier: metrics.counter(f"classification.tier.{tier}") for tier in TIERS}
+    total = sum(counts.values())
+    return {
+        "total": total,
+        "local_confidence_gate": settings.local_confidence_gate,
+        "history_confidence_gate": settings.history_confidence_gate,
+        "tiers": {
+            tier: {
+                "count": count,
+                "hit_rate": round(count / total, 4) if total else 0.0,
+            }
+            for tier, count in counts.items()
+        },
+        "latency": {
+            "keyword": metrics.latency("classification.keyword").snapshot(),
+            "history": metrics.latency("classification.history").snapshot(),
+            "llm": metrics.latency("classification.llm").snapshot(),
+            "total": metrics.latency("classification.total").snapshot(),
+        },
+        "llm_errors": metrics.counter("classification.llm_errors"),
+        "circuit_open_fallbacks": metrics.counter("classification.circuit_open"),
+        "llm_admission": llm_admission.get_stats(),
+        "llm_batching": dict(
+            llm_batcher.get_stats() if llm_batcher is not None else {"max_batch": 1},
+            single_call_fallbacks=metrics.counter("classification.batch_fallbacks")
+        ),
+    }
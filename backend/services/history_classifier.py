@@ -0,0 +1,324 @@
+import asyncio
+import logging
+import threading
+import uuid
+import zlib
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from database.call_log_sink import call_log_sink
+from database.supabase_client import db_client
+from metrics import metrics
+from services.cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+# Character n-gram sizes hashed into each transcript vector
+NGRAM_SIZES = (3, 4, 5)
+
+# Lowest id, so a rescan cursor includes every row at its timestamp
+NIL_ID = uuid.UUID(int=0)
+
+
+def vectorize(text: str, dim: int) -> Optional[np.ndarray]:
+    """
+    Hashed character n-gram vector of a transcript, L2-normalized.
+
+    N-grams are taken over the normalized text padded with spaces, hashed with
+    CRC32 (stable across processes) into dim buckets with a sign bit to cancel
+    collisions on average.
+
+    Args:
+        text: Raw transcript
+        dim: Vector dimension
+
+    Returns:
+        float32 vector, or None if the text has no usable characters
+    """
+    normalized = normalize_text(text)
+    if not normalized:
+        return None
+    padded = f" {normalized} ".encode("utf-8")
+    hashes = [
+        zlib.crc32(padded[i:i + n])
+        for n in NGRAM_SIZES
+        for i in range(len(padded) - n + 1)
+    ]
+    if not hashes:
+        return None
+    hashes = np.asarray(hashes, dtype=np.uint32)
+    signs = np.where(hashes & 0x80000000, -1.0, 1.0)
+    vector = np.bincount(hashes % dim, weights=signs, minlength=dim).astype(np.float32)
+    norm = np.linalg.norm(vector)
+    if norm == 0:
+        return None
+    return vector / norm
+
+
+class HistoryClassifier:
+    """
+    k-nearest-neighbour intent classifier over labelled call_logs transcripts.
+
+    High-confidence historical rows are vectorized into one float32 matrix
+    stored transposed (dim x rows); a transcript is classified with a single
+    vector-matrix product restricted to its non-zero n-gram buckets (cosine
+    similarity, vectors are unit length) and a similarity-weighted vote of its
+    top-k neighbours. Each distinct normalized transcript occupies one
+    row (relabelled if it shows up again); once max_rows is reached the oldest
+    row is overwritten.
+
+    A background task first seeds the matrix with the newest max_rows rows, then
+    pages through call_logs newer than the last row seen, so the matrix grows
+    incrementally instead of being rebuilt. created_at is set when a call is
+    spooled, not when its row reaches Postgres, so each refresh rescans the
+    trailing HISTORY_RESCAN_WINDOW seconds - further back if the call log sink
+    just replayed older rows - and skips the ids it already ingested there.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        max_rows: int,
+        k: int,
+        min_similarity: float
+    ):
+        self.dim = dim
+        self.max_rows = max_rows
+        self.k = k
+        self.min_similarity = min_similarity
+
+        capacity = min(1024, max_rows)
+        self._matrix = np.zeros((dim, capacity), dtype=np.float32)
+        self._labels = np.full(capacity, -1, dtype=np.int32)
+        self._slot_keys: List[Optional[str]] = [None] * capacity
+        self._slots: Dict[str, int] = {}
+        self._categories: List[str] = []
+        self._category_ids: Dict[str, int] = {}
+        self._size = 0
+        self._next_slot = 0
+        self._lock = threading.Lock()
+
+        # call_logs keyset watermark: (created_at, id) of the newest row ingested
+        self._watermark: Optional[Tuple[Any, Any]] = None
+        # id -> created_at of rows ingested inside the rescan window
+        self._seen: Dict[Any, Any] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def size(self) -> int:
+        return self._size
+
+    def _category_id(self, category: str) -> int:
+        category_id = self._category_ids.get(category)
+        if category_id is None:
+            category_id = self._category_ids[category] = len(self._categories)
+            self._categories.append(category)
+        return category_id
+
+    def _grow(self) -> None:
+        capacity = min(self.max_rows, 2 * len(self._labels))
+        matrix = np.zeros((self.dim, capacity), dtype=np.float32)
+        matrix[:, :self._size] = self._matrix[:, :self._size]
+        labels = np.full(capacity, -1, dtype=np.int32)
+        labels[:self._size] = self._labels[:self._size]
+        self._slot_keys.extend([None] * (capacity - len(self._labels)))
+        self._matrix, self._labels = matrix, labels
+
+    def add(self, examples: Iterable[Tuple[str, str]]) -> int:
+        """
+        Add labelled transcripts to the matrix.
+
+        Args:
+            examples: (transcript, category) pairs
+
+        Returns:
+            Number of rows added or relabelled
+        """
+        added = 0
+        for transcript, category in examples:
+            key = normalize_text(transcript or "")
+            vector = vectorize(key, self.dim) if key else None
+            if vector is None:
+                continue
+            with self._lock:
+                slot = self._slots.get(key)
+                if slot is None:
+                    if self._size < self.max_rows:
+                        if self._size == len(self._labels):
+                            self._grow()
+                        slot = self._size
+                        self._size += 1
+                    else:
+                        slot = self._next_slot
+                        self._next_slot = (self._next_slot + 1) % self.max_rows
+                        self._slots.pop(self._slot_keys[slot], None)
+                    self._slots[key] = slot
+                    self._slot_keys[slot] = key
+                    self._matrix[:, slot] = vector
+                self._labels[slot] = self._category_id(category)
+            added += 1
+        return added
+
+    def classify(self, transcript: str, categories: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Classify a transcript by its nearest historical neighbours.
+
+        Confidence is the winning category's share of the neighbours' summed
+        similarity, scaled by its best similarity, so a lone near-duplicate and
+        a unanimous neighbourhood of close matches both score high.
+
+        Args:
+            transcript: Raw transcript
+            categories: Categories allowed to win (defaults to all known)
+
+        Returns:
+            Dict with category, confidence and reasoning, or None if no neighbour is close enough
+        """
+        vector = vectorize(transcript, self.dim)
+        if vector is None or self._size == 0:
+            return None
+
+        buckets = np.flatnonzero(vector)
+        with self._lock:
+            size = self._size
+            similarities = vector[buckets] @ self._matrix[buckets, :size]
+            labels = self._labels[:size].copy()
+            names = list(self._categories)
+
+        if categories is not None:
+            allowed = [self._category_ids[c] for c in categories if c in self._category_ids]
+            similarities = np.where(np.isin(labels, allowed), similarities, -1.0)
+
+        k = min(self.k, size)
+        top = np.argpartition(-similarities, k - 1)[:k]
+        top = top[similarities[top] >= self.min_similarity]
+        if len(top) == 0:
+            return None
+
+        votes = np.bincount(labels[top], weights=similarities[top], minlength=len(names))
+        winner = int(np.argmax(votes))
+        best = float(similarities[top][labels[top] == winner].max())
+        confidence = float(votes[winner] / votes.sum()) * best
+
+        return {
+            "category": names[winner],
+            "confidence": round(confidence, 2),
+            "reasoning": f"Matched {len(top)} similar past calls (best similarity {best:.2f})"
+        }
+
+    def _rescan_from(self) -> Tuple[Any, Any]:
+        """Keyset cursor trailing the watermark far enough to catch rows that arrived late."""
+        start = self._watermark[0] - timedelta(seconds=settings.history_rescan_window)
+        replayed = call_log_sink.pop_oldest_shipped()
+        if replayed is not None and replayed < start:
+            start = replayed
+        return start, NIL_ID
+
+    async def refresh(self) -> int:
+        """
+        Ingest call_logs rows newer than the rescan cursor, one page at a time.
+
+        Returns:
+            Number of rows added or relabelled
+        """
+        total = 0
+        cursor = None
+        if self._watermark is not None:
+            cursor = self._rescan_from()
+            self._seen = {row_id: created_at for row_id, created_at in self._seen.items() if created_at >= cursor[0]}
+        while True:
+            rows = await db_client.get_labelled_transcripts(
+                after=cursor,
+                min_confidence=settings.history_min_confidence,
+                limit=settings.history_page_size
+            )
+            if not rows:
+                break
+            examples = [(row["transcript"], row["issue_category"]) for row in rows if row["id"] not in self._seen]
+            total += await asyncio.to_thread(self.add, examples)
+            self._seen.update((row["id"], row["created_at"]) for row in rows)
+            cursor = (rows[-1]["created_at"], rows[-1]["id"])
+            if self._watermark is None or cursor > self._watermark:
+                self._watermark = cursor
+            if len(rows) < settings.history_page_size:
+                break
+        if total:
+            metrics.increment("history.ingested", total)
+            logger.info(f"History classifier ingested {total} rows ({self._size} total)")
+        return total
+
+    async def seed(self) -> int:
+        """
+        Load the newest max_rows rows and start the watermark after them.
+
+        Returns:
+            Number of rows added or relabelled
+        """
+        rows = await db_client.get_latest_labelled_transcripts(
+            min_confidence=settings.history_min_confidence,
+            limit=self.max_rows
+        )
+        if not rows:
+            return 0
+        total = await asyncio.to_thread(self.add, [(row["transcript"], row["issue_category"]) for row in rows])
+        self._seen = {row["id"]: row["created_at"] for row in rows}
+        self._watermark = (rows[-1]["created_at"], rows[-1]["id"])
+        metrics.increment("history.ingested", total)
+        logger.info(f"History classifier seeded with {total} rows")
+        return total
+
+    async def start(self) -> None:
+        """Seed and keep ingesting new rows in the background (startup never waits on it)."""
+        if not settings.history_classifier_enabled:
+            return
+        self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                # No watermark yet (empty table or database down): seed from the newest rows
+                if self._watermark is None:
+                    await self.seed()
+                else:
+                    await self.refresh()
+            except Exception as e:
+                logger.error(f"History classifier refresh failed: {e}")
+            await asyncio.sleep(settings.history_refresh_interval)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Matrix size and ingestion progress.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        return {
+            "enabled": settings.history_classifier_enabled,
+            "rows": self._size,
+            "max_rows": self.max_rows,
+            "dim": self.dim,
+            "categories": len(self._categories),
+            "ingested": metrics.counter("history.ingested"),
+            "watermark": self._watermark[0].isoformat() if self._watermark else None,
+        }
+
+
+# Global history classifier
+history_classifier = HistoryClassifier(
+    dim=settings.history_vector_dim,
+    max_rows=settings.history_max_rows,
+    k=settings.history_top_k,
+    min_similarity=settings.history_min_similarity
+)
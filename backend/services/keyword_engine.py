@@ -0,0 +1,204 @@
+import json
+import logging
+import math
+import unicodedata
+from collections import deque
+from typing import Any, Dict, Iterator, List, Tuple
+
+from config import settings
+from services.cache import normalize_text
+
+logger = logging.getLogger(__name__)
+
+
+def _is_word_char(ch: str) -> bool:
+    """Letters, digits and combining marks (Devanagari vowel signs) belong to a word."""
+    return ch.isalnum() or unicodedata.category(ch) in ("Mn", "Mc")
+
+
+class KeywordAutomaton:
+    """
+    Aho-Corasick automaton over a fixed set of patterns.
+
+    Built once; find() then reports every pattern occurrence in a single pass over
+    the text, independent of how many patterns there are.
+    """
+
+    def __init__(self, patterns: Dict[str, Any]):
+        """
+        Args:
+            patterns: Mapping of pattern string to an arbitrary payload
+        """
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[int, Any]]] = [[]]
+
+        for pattern, payload in patterns.items():
+            if pattern:
+                self._add(pattern, payload)
+        self._build_failure_links()
+
+    def _add(self, pattern: str, payload: Any) -> None:
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            state = nxt
+        self._output[state].append((len(pattern), payload))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[nxt] = self._goto[fallback].get(ch, 0)
+                self._output[nxt] = self._output[nxt] + self._output[self._fail[nxt]]
+
+    def find(self, text: str) -> Iterator[Tuple[int, int, Any]]:
+        """
+        Yield (start, end, payload) for every occurrence of every pattern.
+
+        Args:
+            text: Text to scan (patterns are matched case-sensitively)
+        """
+        state = 0
+        goto = self._goto
+        fail = self._fail
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, payload in self._output[state]:
+                yield i - length + 1, i + 1, payload
+
+
+class KeywordClassifier:
+    """
+    Weighted keyword/phrase scorer for issue categories.
+
+    Every category's vocabulary is compiled into one automaton, so scoring all
+    categories costs one pass over the transcript. Each distinct term counts once,
+    and only whole-word matches score.
+    """
+
+    def __init__(
+        self,
+        weights: Dict[str, Dict[str, float]],
+        default_category: str = "service_request",
+        default_confidence: float = 0.60,
+        confidence_base: float = settings.keyword_confidence_base,
+        confidence_span: float = settings.keyword_confidence_span
+    ):
+        """
+        Args:
+            weights: Mapping of category to {keyword or phrase: weight}
+            default_category: Category returned when nothing matches
+            default_confidence: Confidence returned when nothing matches
+            confidence_base: Lowest confidence for a keyword match
+            confidence_span: Range above confidence_base reachable with strong evidence
+        """
+        self.categories = list(weights.keys())
+        self.default_category = default_category
+        self.default_confidence = default_confidence
+        self.confidence_base = confidence_base
+        self.confidence_span = confidence_span
+
+        patterns: Dict[str, List[Tuple[str, str, float]]] = {}
+        for category, terms in weights.items():
+            for term, weight in terms.items():
+                key = normalize_text(term)
+                patterns.setdefault(key, []).append((category, key, float(weight)))
+        self.vocabulary_size = len(patterns)
+        self._automaton = KeywordAutomaton(patterns)
+
+    def score(self, transcript: str) -> Tuple[Dict[str, float], Dict[str, List[str]]]:
+        """
+        Score every category in one pass.
+
+        Args:
+            transcript: Raw transcript
+
+        Returns:
+            (category -> summed weight, category -> matched terms)
+        """
+        text = normalize_text(transcript)
+        scores = {category: 0.0 for category in self.categories}
+        matched: Dict[str, List[str]] = {category: [] for category in self.categories}
+        seen = set()
+
+        for start, end, entries in self._automaton.find(text):
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if end < len(text) and _is_word_char(text[end]):
+                continue
+            for category, term, weight in entries:
+                if (category, term) in seen:
+                    continue
+                seen.add((category, term))
+                scores[category] += weight
+                matched[category].append(term)
+
+        return scores, matched
+
+    def classify(self, transcript: str) -> Dict[str, Any]:
+        """
+        Classify a transcript by keyword evidence.
+
+        Confidence grows with the winning score (saturating) and is scaled by its
+        margin over the runner-up, so ambiguous transcripts come out lower.
+
+        Args:
+            transcript: Raw transcript
+
+        Returns:
+            Dict with category, confidence and reasoning
+        """
+        scores, matched = self.score(transcript)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+        if not ranked or ranked[0][1] <= 0:
+            return {
+                "category": self.default_category,
+                "confidence": self.default_confidence,
+                "reasoning": "No category keywords detected"
+            }
+
+        category, top = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        evidence = 1.0 - math.exp(-top)
+        margin = top / (top + runner_up)
+        confidence = self.confidence_base + self.confidence_span * evidence * margin
+
+        return {
+            "category": category,
+            "confidence": round(confidence, 2),
+            "reasoning": f"Detected keywords related to {category}: {', '.join(matched[category])}"
+        }
+
+
+def load_keyword_weights() -> Dict[str, Dict[str, float]]:
+    """
+    Load the keyword vocabulary.
+
+    Uses KEYWORD_CONFIG_PATH (JSON: {category: {term: weight}}) when set,
+    otherwise the defaults in settings.keyword_weights.
+    """
+    if settings.keyword_config_path:
+        try:
+            with open(settings.keyword_config_path, "r", encoding="utf-8") as f:
+                weights = json.load(f)
+            logger.info(f"Loaded keyword vocabulary from {settings.keyword_config_path}")
+            return weights
+        except Exception as e:
+            logger.error(f"Failed to load keyword config, using defaults: {e}")
+    return settings.keyword_weights
+
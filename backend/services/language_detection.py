@@ -1,5 +1,7 @@
 import logging
 from typing import Dict, Any
+from metrics import metrics
+from services.langid import identify_language
 
 logger = logging.getLogger(__name__)
 
@@ -23,10 +25,12 @@ async def detect_language(audio_url: str) -> Dict[str, Any]:
         logger.info(f"Detecting language for audio: {audio_url}")
         
         # Mock response - replace with actual API call
-        # In production, Whisper can detect language automatically
+        # In production, Whisper can detect language automatically.
+        # Until then this is only a prior (it picks the speculative transcription
+        # language); confirm_language() settles the language from the transcript.
         result = {
-            "language": "Hindi",  # Will be dynamic with real API
-            "confidence": 0.95
+            "language": "Hindi",
+            "confidence": 0.5
         }
         
         logger.info(f"Language detected: {result['language']}")
@@ -39,3 +43,42 @@ async def detect_language(audio_url: str) -> Dict[str, Any]:
             "language": "Unknown",
             "confidence": 0.0
         }
+
+
+def detect_transcript_language(transcript: str) -> Dict[str, Any]:
+    """
+    Identify the language of a transcript with the built-in script + n-gram model.
+    
+    Deterministic and CPU-only (no API call), so it runs inline on the event loop.
+    
+    Args:
+        transcript: Transcribed text
+        
+    Returns:
+        Dict with language, code, confidence and script
+    """
+    result = identify_language(transcript)
+    logger.info(f"Transcript language: {result['language']} ({result['confidence']:.2f})")
+    return result
+
+
+def confirm_language(audio_result: Dict[str, Any], transcript: str) -> Dict[str, Any]:
+    """
+    Settle the call language once the transcript is known.
+    
+    The transcript's language wins whenever it is identified at least as
+    confidently as the audio-level result.
+    
+    Args:
+        audio_result: Result of detect_language() (or a client-supplied language)
+        transcript: Transcribed text
+        
+    Returns:
+        The chosen language result (transcript results keep the audio guess under "audio_guess")
+    """
+    text_result = detect_transcript_language(transcript)
+    if text_result["code"] == "und" or text_result["confidence"] < audio_result.get("confidence", 0.0):
+        return audio_result
+    if text_result["language"] != audio_result.get("language"):
+        metrics.increment("language.corrections")
+    return {**text_result, "audio_guess": audio_result.get("language", "Unknown")}
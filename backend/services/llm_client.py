@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import time
+from typing import Dict, Any, List, Optional
+
+import httpx
+from openai import AsyncOpenAI
+from config import settings
+from metrics import metrics
+from services.resilience import CircuitBreaker, CircuitOpenError, hedged
+
+logger = logging.getLogger(__name__)
+
+# Minimum latency samples before the observed p95 replaces llm_hedge_delay
+HEDGE_MIN_SAMPLES = 20
+
+
+class LLMTarget:
+    """One provider endpoint + model, with its own circuit breaker and latency stats."""
+
+    def __init__(self, name: str, client: AsyncOpenAI, model: str):
+        self.name = name
+        self.client = client
+        self.model = model
+        self.breaker = CircuitBreaker(
+            f"llm.{name}",
+            window=settings.llm_breaker_window,
+            min_calls=settings.llm_breaker_min_calls,
+            failure_rate=settings.llm_breaker_failure_rate,
+            slow_call_seconds=settings.llm_breaker_slow_seconds,
+            slow_call_rate=settings.llm_breaker_slow_rate,
+            open_seconds=settings.llm_breaker_open_seconds
+        )
+
+
+class LLMClient:
+    """
+    Process-wide async client for the xAI (Grok) chat API.
+
+    One AsyncOpenAI instance (Grok is API-compatible with the OpenAI SDK) shares a
+    keep-alive HTTP connection pool across all requests. A semaphore caps the number
+    of concurrent completions so a slow provider cannot tie up every worker slot.
+
+    Each target (primary, optional hedge) has a circuit breaker: while the primary's
+    is open, calls go to the hedge target or fail fast with CircuitOpenError so the
+    caller's local fallback answers without waiting out a timeout. With a hedge
+    target configured, a call still running after the primary's recent p95 latency
+    is duplicated to the hedge target and the first answer wins.
+    """
+
+    def __init__(self):
+        self._client: Optional[AsyncOpenAI] = None
+        self._http: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._primary: Optional[LLMTarget] = None
+        self._hedge: Optional[LLMTarget] = None
+
+        # Counters
+        self._requests = 0
+        self._errors = 0
+        self._queue_timeouts = 0
+        self._in_flight = 0
+        self._waiting = 0
+
+    @property
+    def is_configured(self) -> bool:
+        """True when a real API key (not the .env.example placeholder) is set."""
+        return bool(settings.xai_api_key) and "your-grok-api-key" not in settings.xai_api_key
+
+    async def start(self) -> None:
+        """Create the shared HTTP pool and API client. Called once at app startup."""
+        if self._client is not None:
+            return
+
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.llm_max_connections,
+                max_keepalive_connections=settings.llm_max_keepalive_connections,
+                keepalive_expiry=settings.llm_keepalive_expiry
+            ),
+            timeout=httpx.Timeout(settings.llm_timeout, connect=settings.llm_connect_timeout)
+        )
+        self._client = AsyncOpenAI(
+            api_key=settings.xai_api_key or "missing_key_placeholder",
+            base_url=settings.xai_base_url,
+            http_client=self._http,
+            timeout=settings.llm_timeout,
+            max_retries=settings.llm_max_retries
+        )
+        self._semaphore = asyncio.Semaphore(settings.llm_max_concurrency)
+        self._primary = LLMTarget("primary", self._client, settings.xai_model)
+
+        if settings.llm_hedge_model or settings.llm_hedge_base_url:
+            hedge_client = self._client
+            if settings.llm_hedge_base_url:
+                # Separate endpoint, same connection pool
+                hedge_client = AsyncOpenAI(
+                    api_key=settings.llm_hedge_api_key or settings.xai_api_key or "missing_key_placeholder",
+                    base_url=settings.llm_hedge_base_url,
+                    http_client=self._http,
+                    timeout=settings.llm_timeout,
+                    max_retries=0
+                )
+            self._hedge = LLMTarget("hedge", hedge_client, settings.llm_hedge_model or settings.xai_model)
+            logger.info(f"LLM hedging enabled (model={self._hedge.model})")
+
+        logger.info(
+            f"LLM client started (base_url={settings.xai_base_url}, "
+            f"max_concurrency={settings.llm_max_concurrency})"
+        )
+
+    async def warmup(self) -> None:
+        """
+        Start the client and open a keep-alive connection to the provider,
+        so the first caller does not pay the TCP/TLS handshake.
+        """
+        await self.start()
+        if not self.is_configured:
+            return
+        try:
+            await asyncio.wait_for(self._client.models.list(), timeout=settings.llm_connect_timeout)
+            logger.info("LLM connection warmed up")
+        except Exception as e:
+            logger.warning(f"LLM warmup failed (will connect on first request): {e}")
+
+    async def close(self) -> None:
+        """Close the shared HTTP connection pool."""
+        if self._client is not None:
+            await self._client.close()
+        if self._hedge is not None and self._hedge.client is not self._client:
+            await self._hedge.client.close()
+        self._client = None
+        self._http = None
+        self._primary = None
+        self._hedge = None
+        logger.info("LLM client closed")
+
+    async def complete(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float = 0.3,
+        max_tokens: int = 150
+    ) -> str:
+        """
+        Run one chat completion and return the message content.
+
+        Args:
+            messages: Chat messages in OpenAI format
+            temperature: Sampling temperature
+            max_tokens: Completion token limit
+
+        Returns:
+            Raw message content
+
+        Raises:
+            CircuitOpenError: If every usable target's circuit breaker is open
+            asyncio.TimeoutError: If no concurrency slot frees up within llm_queue_timeout
+            Exception: Any API error, for the caller's fallback handling
+        """
+        if self._client is None:
+            await self.start()
+
+        primary, hedge = self._primary, self._hedge
+        kwargs = {"messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+
+        if primary.breaker.is_open and hedge is not None:
+            # Primary is known bad: skip it rather than waiting for it to fail again
+            return await self._attempt(hedge, **kwargs)
+
+        secondary = (lambda: self._attempt(hedge, **kwargs)) if hedge is not None else None
+        content, winner = await hedged(lambda: self._attempt(primary, **kwargs), secondary, self._hedge_delay())
+        if winner == "hedge":
+            metrics.increment("llm.hedge_wins")
+        return content
+
+    def _hedge_delay(self) -> float:
+        """Start the hedge once the primary has run longer than its recent p95."""
+        stats = metrics.latency("llm.primary")
+        if stats.count < HEDGE_MIN_SAMPLES:
+            return settings.llm_hedge_delay
+        return max(settings.llm_hedge_min_delay, stats.percentile(95))
+
+    async def _attempt(self, target: LLMTarget, **kwargs) -> str:
+        """One completion against one target, guarded by its breaker and the shared semaphore."""
+        if not target.breaker.allow():
+            raise CircuitOpenError(f"LLM circuit {target.name} is open")
+
+        # Released on this object even if close() runs while the call is in flight
+        semaphore = self._semaphore
+        self._waiting += 1
+        try:
+            await asyncio.wait_for(semaphore.acquire(), timeout=settings.llm_queue_timeout)
+        except BaseException as e:
+            # Timed out, lost a hedge race or the caller went away before the call
+            # started: no outcome to record, so hand back a half-open trial slot
+            target.breaker.release()
+            if isinstance(e, asyncio.TimeoutError):
+                self._queue_timeouts += 1
+            raise
+        finally:
+            self._waiting -= 1
+
+        self._in_flight += 1
+        self._requests += 1
+        start = time.perf_counter()
+        try:
+            response = await target.client.chat.completions.create(model=target.model, **kwargs)
+            latency = time.perf_counter() - start
+            target.breaker.record(True, latency)
+            metrics.observe(f"llm.{target.name}", latency)
+            return response.choices[0].message.content
+        except asyncio.CancelledError:
+            # Lost a hedge race (or the caller gave up): not the provider's fault
+            target.breaker.release()
+            raise
+        except Exception:
+            self._errors += 1
+            target.breaker.record(False, time.perf_counter() - start)
+            raise
+        finally:
+            self._in_flight -= 1
+            semaphore.release()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Snapshot of LLM client usage.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        return {
+            "started": self._client is not None,
+            "max_concurrency": settings.llm_max_concurrency,
+            "in_flight": self._in_flight,
+            "waiting": self._waiting,
+            "requests": self._requests,
+            "errors": self._errors,
+            "queue_timeouts": self._queue_timeouts,
+            "hedge_delay_seconds": round(self._hedge_delay(), 3),
+            "hedge_wins": metrics.counter("llm.hedge_wins"),
+            "targets": {
+                target.name: {
+                    "model": target.model,
+                    "latency": metrics.latency(f"llm.{target.name}").snapshot(),
+                    "circuit": target.breaker.get_stats(),
+                }
+                for target in (self._primary, self._hedge) if target is not None
+            },
+        }
+
+
+# Global LLM client instance
+llm_client = LLMClient()
@@ -0,0 +1,187 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Dict, Optional, Tuple
+
+from config import settings
+from metrics import metrics
+from models import ProcessIssueResponse, CallLog
+from services.language_detection import detect_language, confirm_language
+from services.transcription import transcribe_audio
+from services.classification import classify_issue
+from services.routing import determine_routing
+from services.runtime_config import runtime_config
+
+logger = logging.getLogger(__name__)
+
+
+async def _timed(stage: str, awaitable: Awaitable) -> Any:
+    """
+    Await a stage and record its latency under pipeline.<stage>.
+    A cancelled stage (discarded speculation) records nothing.
+    """
+    start = time.perf_counter()
+    cancelled = False
+    try:
+        return await awaitable
+    except asyncio.CancelledError:
+        cancelled = True
+        raise
+    finally:
+        if not cancelled:
+            metrics.observe(f"pipeline.{stage}", time.perf_counter() - start)
+
+
+async def _discard(task: asyncio.Task) -> None:
+    """Cancel a task and wait for it to finish, ignoring its outcome."""
+    task.cancel()
+    try:
+        await task
+    except BaseException:
+        pass
+
+
+async def _detect_and_transcribe(audio_url: str) -> Tuple[Dict[str, Any], str]:
+    """
+    Run language detection and transcription concurrently.
+
+    Transcription starts speculatively with settings.speculative_language while
+    detection runs. If detection disagrees, the speculative transcript is cancelled
+    (or discarded) and transcription is redone with the detected language, so the
+    common case costs max(detect, transcribe) instead of their sum.
+
+    Returns:
+        (language detection result, transcript)
+    """
+    hint = settings.speculative_language
+    if not hint:
+        language_result = await _timed("language_detection", detect_language(audio_url))
+        detected_language = language_result.get("language", "Unknown")
+        transcript = await _timed("transcription", transcribe_audio(audio_url, detected_language))
+        return language_result, transcript
+
+    detect_task = asyncio.create_task(_timed("language_detection", detect_language(audio_url)))
+    speculative_task = asyncio.create_task(_timed("transcription", transcribe_audio(audio_url, hint)))
+
+    try:
+        language_result = await detect_task
+    except BaseException:
+        await _discard(speculative_task)
+        raise
+
+    detected_language = language_result.get("language", "Unknown")
+    if detected_language.casefold() == hint.casefold():
+        metrics.increment("pipeline.speculation_hits")
+        return language_result, await speculative_task
+
+    metrics.increment("pipeline.speculation_misses")
+    logger.info(f"Speculative transcription ({hint}) discarded - detected {detected_language}")
+    await _discard(speculative_task)
+    transcript = await _timed("transcription", transcribe_audio(audio_url, detected_language))
+    return language_result, transcript
+
+
+async def run_pipeline(audio_url: str) -> Tuple[ProcessIssueResponse, CallLog]:
+    """
+    Run the IVR stages for one recording.
+
+    Language detection and transcription overlap; classification and routing
+    depend on the transcript and run after it.
+
+    Args:
+        audio_url: URL to audio file
+
+    Returns:
+        (response for the caller, call log row to persist)
+    """
+    # One configuration version for the whole call, even if a reload lands mid-way
+    snapshot = runtime_config.current
+
+    with metrics.timer("pipeline.total"):
+        # Steps 1 + 2: Detect Language and Transcribe Audio (concurrently)
+        language_result, transcript = await _detect_and_transcribe(audio_url)
+        language_result = confirm_language(language_result, transcript)
+        detected_language = language_result.get("language", "Unknown")
+
+        # Step 3: Classify Issue
+        classification = await _timed("classification", classify_issue(transcript, detected_language, snapshot))
+        issue_category = classification.get("category", "service_request")
+        confidence = classification.get("confidence", 0.5)
+
+        # Step 4: Determine Routing
+        routing = await _timed("routing", determine_routing(issue_category, confidence, snapshot))
+        routing_to = routing.get("routing_to")
+        fallback = routing.get("fallback", False)
+        fallback_reason = fallback_reason_for(classification, routing)
+
+    response = ProcessIssueResponse(
+        language=detected_language,
+        transcript=transcript,
+        issue_category=issue_category,
+        confidence=confidence,
+        routing_to=routing_to,
+        fallback=fallback,
+        fallback_reason=fallback_reason
+    )
+
+    call_log = CallLog(
+        audio_url=audio_url,
+        detected_language=detected_language,
+        transcript=transcript,
+        issue_category=issue_category,
+        confidence=confidence,
+        routed_to=routing_to,
+        raw_ai_response={
+            "language_detection": language_result,
+            "classification": classification,
+            "routing": routing,
+            "config_version": snapshot.version
+        }
+    )
+
+    return response, call_log
+
+
+def fallback_reason_for(classification: Dict[str, Any], routing: Dict[str, Any]) -> Optional[str]:
+    """Routing's fallback reason, else the classification's degradation (None for a normal answer)."""
+    if routing.get("fallback", False):
+        return routing.get("reason")
+    return classification.get("degraded")
+
+
+def build_fallback_response(reason: str = "error") -> ProcessIssueResponse:
+    """
+    Response used when the pipeline fails or the request is shed (demo safety).
+
+    Args:
+        reason: fallback_reason to report (error, overloaded)
+    """
+    transcript = "Audio processing failed" if reason == "error" else "System busy"
+    return ProcessIssueResponse(
+        language="Unknown",
+        transcript=transcript,
+        issue_category="general_support",
+        confidence=0.0,
+        routing_to=settings.fallback_routing,
+        fallback=True,
+        fallback_reason=reason
+    )
+
+
+def get_pipeline_stats() -> Dict[str, Any]:
+    """
+    Per-stage latency and speculation hit counts.
+
+    Returns:
+        Dict suitable for the /metrics endpoint
+    """
+    return {
+        "speculative_language": settings.speculative_language,
+        "speculation_hits": metrics.counter("pipeline.speculation_hits"),
+        "language_corrections": metrics.counter("language.corrections"),
+        "speculation_misses": metrics.counter("pipeline.speculation_misses"),
+        "latency": {
+            stage: metrics.latency(f"pipeline.{stage}").snapshot()
+            for stage in ["language_detection", "transcription", "classification", "routing", "total"]
+        },
+    }
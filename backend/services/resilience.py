@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Per-provider circuit breaker over a sliding window of recent calls.
+
+    Closed: calls flow; the breaker opens when, over at least min_calls of the
+    last `window` calls, the failure rate or the slow-call rate (latency above
+    slow_call_seconds) reaches its threshold.
+    Open: calls are rejected immediately for open_seconds.
+    Half-open: up to half_open_calls trial calls are let through; one success
+    closes the breaker, one failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        window: int = 20,
+        min_calls: int = 10,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 5.0,
+        slow_call_rate: float = 0.5,
+        open_seconds: float = 30.0,
+        half_open_calls: int = 1
+    ):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+
+        self.state = CLOSED
+        self._calls: deque = deque(maxlen=window)  # (failed, slow)
+        self._opened_at = 0.0
+        self._trials = 0
+
+        # Counters
+        self.rejected = 0
+        self.trips = 0
+
+    @property
+    def is_open(self) -> bool:
+        """True while calls are being rejected outright (open and not yet due for a trial)."""
+        return self.state == OPEN and time.monotonic() - self._opened_at < self.open_seconds
+
+    def allow(self) -> bool:
+        """True if a call may go to the provider now (reserves a trial slot when half-open)."""
+        if self.state == OPEN:
+            if time.monotonic() - self._opened_at < self.open_seconds:
+                self.rejected += 1
+                return False
+            self.state = HALF_OPEN
+            self._trials = 0
+            logger.info(f"Circuit {self.name} half-open, sending trial call")
+
+        if self.state == HALF_OPEN:
+            if self._trials >= self.half_open_calls:
+                self.rejected += 1
+                return False
+            self._trials += 1
+        return True
+
+    def record(self, success: bool, latency: float) -> None:
+        """Record the outcome of a call that allow() let through."""
+        slow = latency >= self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            if success and not slow:
+                self.state = CLOSED
+                self._calls.clear()
+                logger.info(f"Circuit {self.name} closed")
+            else:
+                self._open("trial call failed")
+            return
+
+        self._calls.append((not success, slow))
+        if len(self._calls) < self.min_calls:
+            return
+        failures = sum(1 for failed, _ in self._calls if failed) / len(self._calls)
+        slow_calls = sum(1 for _, was_slow in self._calls if was_slow) / len(self._calls)
+        if failures >= self.failure_rate:
+            self._open(f"failure rate {failures:.0%}")
+        elif slow_calls >= self.slow_call_rate:
+            self._open(f"slow-call rate {slow_calls:.0%}")
+
+    def release(self) -> None:
+        """Give back a trial slot for a call that was cancelled without an outcome."""
+        if self.state == HALF_OPEN and self._trials > 0:
+            self._trials -= 1
+
+    def _open(self, reason: str) -> None:
+        self.state = OPEN
+        self._opened_at = time.monotonic()
+        self._calls.clear()
+        self.trips += 1
+        logger.warning(f"Circuit {self.name} opened ({reason}) for {self.open_seconds}s")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Current state and trip/rejection counts.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        return {
+            "state": self.state,
+            "window_calls": len(self._calls),
+            "window_failures": sum(1 for failed, _ in self._calls if failed),
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+async def hedged(
+    primary: Callable[[], Awaitable[Any]],
+    secondary: Optional[Callable[[], Awaitable[Any]]],
+    hedge_after: float
+) -> Tuple[Any, str]:
+    """
+    Run primary; if it has not finished after hedge_after seconds, also start
+    secondary and take whichever succeeds first (the other is cancelled).
+
+    If one attempt fails the other is still awaited; only when both fail is
+    the primary's error raised.
+
+    Returns:
+        (result, "primary" | "hedge")
+    """
+    primary_task = asyncio.ensure_future(primary())
+    tasks = {primary_task: "primary"}
+    errors: Dict[str, BaseException] = {}
+    try:
+        if secondary is None:
+            return await primary_task, "primary"
+
+        done, _ = await asyncio.wait({primary_task}, timeout=hedge_after)
+        if done and primary_task.exception() is None:
+            return primary_task.result(), "primary"
+        tasks[asyncio.ensure_future(secondary())] = "hedge"
+
+        pending = set(tasks)
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result(), tasks[task]
+                errors[tasks[task]] = task.exception()
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+
+    raise errors.get("primary") or errors["hedge"]
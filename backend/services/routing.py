@@ -1,23 +1,32 @@
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, Optional
 from config import settings
+from services.routing_engine import routing_engine
+from services.runtime_config import ConfigSnapshot, runtime_config
 
 logger = logging.getLogger(__name__)
 
 
-async def determine_routing(issue_category: str, confidence: float) -> Dict[str, Any]:
+async def determine_routing(
+    issue_category: str,
+    confidence: float,
+    snapshot: Optional[ConfigSnapshot] = None
+) -> Dict[str, Any]:
     """
     Determine routing destination based on issue category and confidence.
     
-    Uses hardcoded routing rules (MVP decision).
+    Maps the category to its destination pool and picks the least-loaded
+    queue there (overflowing to weighted targets when it is saturated).
     Applies fallback when confidence is below threshold.
     
     Args:
         issue_category: Classified issue category
         confidence: Classification confidence score
+        snapshot: Configuration version to route with (defaults to the current one)
         
     Returns:
-        Dict with routing_to and fallback flag
+        Dict with routing_to and fallback flag (plus reason when falling back,
+        and pool, overflow and queue_load)
     """
     try:
         logger.info(f"Determining routing for category: {issue_category}, confidence: {confidence}")
@@ -27,25 +36,17 @@ async def determine_routing(issue_category: str, confidence: float) -> Dict[str,
             logger.warning(f"Low confidence ({confidence}), routing to fallback")
             return {
                 "routing_to": settings.fallback_routing,
-                "fallback": True
+                "fallback": True,
+                "reason": "low_confidence"
             }
         
-        # Look up routing rule
-        routing_to = settings.routing_rules.get(
-            issue_category,
-            settings.fallback_routing
-        )
+        # Pick a queue from the category's pool
+        snapshot = snapshot or runtime_config.current
+        result = routing_engine.route(issue_category, snapshot.routing_index)
         
-        # If category not found in rules, use fallback
-        fallback = issue_category not in settings.routing_rules
-        
-        if fallback:
+        if result["fallback"]:
             logger.warning(f"Unknown category: {issue_category}, using fallback")
-        
-        result = {
-            "routing_to": routing_to,
-            "fallback": fallback
-        }
+            result["reason"] = "unknown_category"
         
         logger.info(f"Routing decision: {result}")
         return result
@@ -55,5 +56,6 @@ async def determine_routing(issue_category: str, confidence: float) -> Dict[str,
         # Always return a valid routing decision
         return {
             "routing_to": settings.fallback_routing,
-            "fallback": True
+            "fallback": True,
+            "reason": "error"
         }
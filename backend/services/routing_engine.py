@@ -0,0 +1,285 @@
+import heapq
+import itertools
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Load of a queue with no available agent: above any staffed queue, so it only takes
+# calls when every option is unstaffed (then the shortest such queue wins)
+UNSTAFFED_LOAD = 1e9
+
+
+class QueueState:
+    """Live load of one destination queue, as last reported through the queue-state API."""
+
+    __slots__ = ("name", "pool", "depth", "available_agents", "updated_at", "version")
+
+    def __init__(self, name: str, pool: str):
+        self.name = name
+        self.pool = pool
+        self.depth = 0
+        self.available_agents = 1
+        self.updated_at: Optional[float] = None
+        self.version = 0
+
+    @property
+    def load(self) -> float:
+        """Waiting calls per available agent (an unstaffed queue counts as saturated)."""
+        if self.available_agents <= 0:
+            return UNSTAFFED_LOAD + self.depth
+        return self.depth / self.available_agents
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "queue": self.name,
+            "pool": self.pool,
+            "depth": self.depth,
+            "available_agents": self.available_agents,
+            "load": round(self.load, 3),
+            "updated_at": self.updated_at,
+        }
+
+
+class QueuePool:
+    """
+    Queues serving one destination, ordered by load in a binary heap.
+
+    Updates push a fresh (load, seq, version, queue) entry instead of re-sorting;
+    entries whose version no longer matches the queue are skipped on peek and
+    the heap is compacted when stale entries outnumber live ones. Picking the
+    least-loaded queue and updating a queue are both O(log n).
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.queues: Dict[str, QueueState] = {}
+        self._heap: List[Tuple[float, int, int, str]] = []
+        self._seq = itertools.count()
+
+    def add_queue(self, name: str) -> QueueState:
+        queue = self.queues.get(name)
+        if queue is None:
+            queue = self.queues[name] = QueueState(name, self.name)
+            self._push(queue)
+        return queue
+
+    def _push(self, queue: QueueState) -> None:
+        queue.version += 1
+        heapq.heappush(self._heap, (queue.load, next(self._seq), queue.version, queue.name))
+        if len(self._heap) > 2 * len(self.queues) + 16:
+            self._compact()
+
+    def _compact(self) -> None:
+        self._heap = [(q.load, next(self._seq), q.version, q.name) for q in self.queues.values()]
+        heapq.heapify(self._heap)
+
+    def update(self, name: str, depth: int, available_agents: int) -> QueueState:
+        queue = self.add_queue(name)
+        queue.depth = depth
+        queue.available_agents = available_agents
+        queue.updated_at = time.time()
+        self._push(queue)
+        return queue
+
+    def least_loaded(self) -> Optional[QueueState]:
+        while self._heap:
+            _, _, version, name = self._heap[0]
+            queue = self.queues.get(name)
+            if queue is not None and queue.version == version:
+                return queue
+            heapq.heappop(self._heap)
+        return None
+
+    def reserve(self, queue: QueueState) -> None:
+        """
+        Count a routed call against the queue until the next reported state replaces it.
+        Queues that never reported state stay at zero load (static routing behaviour).
+        """
+        if queue.updated_at is None:
+            return
+        queue.depth += 1
+        self._push(queue)
+
+
+class RoutingIndex:
+    """
+    Compiled routing tables for one configuration version: category -> pool,
+    pool -> queues (each pool with its own heap) and pool -> weighted overflow targets.
+
+    Built without touching live state, so a new index can be prepared off the
+    request path and installed with RoutingEngine.install().
+    """
+
+    def __init__(
+        self,
+        routing_rules: Dict[str, str],
+        pool_queues: Optional[Dict[str, List[str]]] = None,
+        overflow: Optional[Dict[str, Dict[str, float]]] = None
+    ):
+        """
+        Args:
+            routing_rules: Category -> pool (destination) name
+            pool_queues: Pool -> queue names (pools not listed get one queue named after the pool)
+            overflow: Pool -> {overflow pool: weight}
+        """
+        pool_queues = pool_queues or {}
+        self.category_pools: Dict[str, str] = dict(routing_rules)
+        self.pools: Dict[str, QueuePool] = {}
+        for pool_name in set(routing_rules.values()) | set(pool_queues):
+            pool = self.pools[pool_name] = QueuePool(pool_name)
+            for queue_name in pool_queues.get(pool_name) or [pool_name]:
+                pool.add_queue(queue_name)
+        self.overflow: Dict[str, List[Tuple[str, float]]] = {
+            pool: [(target, weight) for target, weight in targets.items() if weight > 0 and target in self.pools]
+            for pool, targets in (overflow or {}).items()
+        }
+
+    def adopt_state(self, previous: "RoutingIndex") -> None:
+        """Carry reported queue state over from the index being replaced."""
+        for pool_name, pool in self.pools.items():
+            old = previous.pools.get(pool_name)
+            if old is None:
+                continue
+            for queue_name, old_queue in old.queues.items():
+                # Queues added at runtime through the API survive a reload too
+                if old_queue.updated_at is None:
+                    continue
+                queue = pool.update(queue_name, old_queue.depth, old_queue.available_agents)
+                queue.updated_at = old_queue.updated_at
+
+
+class RoutingEngine:
+    """
+    Category -> destination pool routing with load balancing and weighted overflow.
+
+    - Each category maps to a pool; each pool holds one or more queues
+    - The least-loaded queue of the pool takes the call
+    - When even that queue is at or above overflow_load, a pool is drawn from the
+      pool's weighted overflow targets (only targets with headroom qualify)
+    - With no usable pool the call goes to fallback_routing
+
+    Without any reported queue state every pool has one queue named after the
+    pool, so decisions match the static routing_rules table.
+    """
+
+    def __init__(self):
+        self.index = RoutingIndex({})
+        self.overflow_load = settings.routing_overflow_load
+
+    def install(self, index: RoutingIndex) -> None:
+        """Swap in a new routing index, keeping live state of queues that still exist."""
+        index.adopt_state(self.index)
+        self.index = index
+        logger.info(
+            f"Routing index installed: {len(index.pools)} pools, "
+            f"{sum(len(p.queues) for p in index.pools.values())} queues"
+        )
+
+    def configure(
+        self,
+        routing_rules: Dict[str, str],
+        pool_queues: Optional[Dict[str, List[str]]] = None,
+        overflow: Optional[Dict[str, Dict[str, float]]] = None
+    ) -> None:
+        """Build and install an index from plain routing tables (see RoutingIndex)."""
+        self.install(RoutingIndex(routing_rules, pool_queues, overflow))
+
+    def update_queue(self, queue: str, depth: int, available_agents: int, pool: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Apply one queue-state report. Unknown queues are added to the given pool.
+
+        Returns:
+            The queue's new state, or None if the queue is unknown and no known pool was given
+        """
+        pools = self.index.pools
+        for candidate in ([pools[pool]] if pool in pools else pools.values()):
+            if queue in candidate.queues or candidate.name == pool:
+                return candidate.update(queue, depth, available_agents).to_dict()
+        logger.warning(f"Queue state for unknown queue {queue} (pool {pool}) ignored")
+        return None
+
+    def _has_headroom(self, pool: QueuePool) -> Optional[QueueState]:
+        queue = pool.least_loaded()
+        if queue is not None and queue.load < self.overflow_load:
+            return queue
+        return None
+
+    def route(self, category: str, index: Optional[RoutingIndex] = None) -> Dict[str, Any]:
+        """
+        Pick the destination queue for a category.
+
+        Args:
+            category: Issue category
+            index: Routing index to use (defaults to the installed one); callers
+                holding a configuration snapshot pass its index for consistency
+
+        Returns:
+            Dict with routing_to (queue), pool, fallback and overflow flags, and the queue's load
+        """
+        index = index or self.index
+        pool_name = index.category_pools.get(category)
+        pool = index.pools.get(pool_name) if pool_name else None
+        if pool is None:
+            return {"routing_to": settings.fallback_routing, "pool": None, "fallback": True, "overflow": False}
+
+        queue = self._has_headroom(pool)
+        overflowed = False
+        if queue is None:
+            candidates = []
+            for target, weight in index.overflow.get(pool.name, []):
+                target_queue = self._has_headroom(index.pools[target])
+                if target_queue is not None:
+                    candidates.append((target_queue, weight))
+            if candidates:
+                queue = random.choices([q for q, _ in candidates], weights=[w for _, w in candidates])[0]
+                overflowed = True
+                metrics.increment("routing.overflow")
+            else:
+                # Every option is saturated: the primary pool still takes the call
+                queue = pool.least_loaded()
+                metrics.increment("routing.saturated")
+
+        if queue is None:
+            return {"routing_to": settings.fallback_routing, "pool": pool.name, "fallback": True, "overflow": False}
+
+        index.pools[queue.pool].reserve(queue)
+        return {
+            "routing_to": queue.name,
+            "pool": queue.pool,
+            "fallback": False,
+            "overflow": overflowed,
+            "queue_load": round(queue.load, 3),
+        }
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Current queue states grouped by pool.
+
+        Returns:
+            Dict suitable for the queue-state API and /metrics
+        """
+        index = self.index
+        return {
+            "overflow_load": self.overflow_load,
+            "categories": dict(index.category_pools),
+            "pools": {
+                name: {
+                    "queues": [queue.to_dict() for queue in pool.queues.values()],
+                    "overflow": dict(index.overflow.get(name, [])),
+                }
+                for name, pool in index.pools.items()
+            },
+            "overflow_decisions": metrics.counter("routing.overflow"),
+            "saturated_decisions": metrics.counter("routing.saturated"),
+        }
+
+
+# Global routing engine, built from settings (runtime_config installs reloaded indexes)
+routing_engine = RoutingEngine()
+routing_engine.configure(settings.routing_rules, settings.routing_pools, settings.routing_overflow)
@@ -0,0 +1,277 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import settings
+from database.supabase_client import db_client
+from services.cache import version_of
+from services.keyword_engine import KeywordClassifier, load_keyword_weights
+from services.routing_engine import RoutingIndex, routing_engine
+
+logger = logging.getLogger(__name__)
+
+# Keys a configuration document may carry; missing keys fall back to settings
+CONFIG_KEYS = ("issue_categories", "routing_rules", "routing_pools", "routing_overflow", "keyword_weights")
+
+
+def _compile_prompt(categories: List[str]) -> str:
+    """Classification prompt with the category list baked in; format() fills language and transcript."""
+    listing = "\n".join(f"- {category}" for category in categories).replace("{", "{{").replace("}", "}}")
+    return (
+        "You are an IVR classification system. Analyze the following customer statement "
+        "and classify it into ONE of these categories:\n"
+        f"{listing}\n\n"
+        'Customer statement (in {language}): "{transcript}"\n\n'
+        "Respond ONLY with valid JSON in this exact format:\n"
+        "{{\n"
+        '    "category": "one_of_the_categories_above",\n'
+        '    "confidence": 0.85,\n'
+        '    "reasoning": "brief explanation"\n'
+        "}}"
+    )
+
+
+def _compile_batch_prompt(categories: List[str]) -> str:
+    """Multi-item classification prompt; format() fills items (a JSON list of id/language/transcript)."""
+    listing = "\n".join(f"- {category}" for category in categories).replace("{", "{{").replace("}", "}}")
+    return (
+        "You are an IVR classification system. Classify EACH of the following customer "
+        "statements into ONE of these categories:\n"
+        f"{listing}\n\n"
+        "Statements (JSON list; each has an id, its language and the transcript):\n"
+        "{items}\n\n"
+        "Respond ONLY with valid JSON in this exact format, with one result per statement id:\n"
+        "{{\n"
+        '    "results": [\n'
+        '        {{"id": 0, "category": "one_of_the_categories_above", "confidence": 0.85, "reasoning": "brief explanation"}}\n'
+        "    ]\n"
+        "}}"
+    )
+
+
+class ConfigSnapshot:
+    """
+    One immutable, fully compiled configuration version.
+
+    Requests grab runtime_config.current once and use that snapshot for every
+    stage, so a reload in the middle of a call never mixes versions.
+    """
+
+    def __init__(self, raw: Dict[str, Any], source: str):
+        """
+        Validate and compile a configuration document.
+
+        Args:
+            raw: Mapping with any of CONFIG_KEYS
+            source: Where it came from (settings, file path, database)
+
+        Raises:
+            ValueError: If the document is malformed
+        """
+        defaults = {
+            "issue_categories": settings.issue_categories,
+            "routing_rules": settings.routing_rules,
+            "routing_pools": settings.routing_pools,
+            "routing_overflow": settings.routing_overflow,
+            "keyword_weights": load_keyword_weights(),
+        }
+        config = {key: raw.get(key, defaults[key]) for key in CONFIG_KEYS}
+
+        categories = config["issue_categories"]
+        if not isinstance(categories, list) or not categories or not all(isinstance(c, str) for c in categories):
+            raise ValueError("issue_categories must be a non-empty list of strings")
+        if not isinstance(config["routing_rules"], dict) or not all(
+            isinstance(k, str) and isinstance(v, str) for k, v in config["routing_rules"].items()
+        ):
+            raise ValueError("routing_rules must map category strings to destination strings")
+
+        canonical = json.dumps(config, sort_keys=True, ensure_ascii=False)
+        self.version = raw.get("version") or hashlib.sha1(canonical.encode("utf-8")).hexdigest()[:12]
+        self.source = source
+        self.loaded_at = time.time()
+        self.issue_categories: List[str] = list(categories)
+        self.routing_rules: Dict[str, str] = dict(config["routing_rules"])
+
+        # Precompiled artifacts
+        self.categories_version = version_of(self.issue_categories)
+        self.prompt_template = _compile_prompt(self.issue_categories)
+        self.batch_prompt_template = _compile_batch_prompt(self.issue_categories)
+        self.keyword_classifier = KeywordClassifier({
+            category: terms
+            for category, terms in config["keyword_weights"].items()
+            if category in self.issue_categories
+        })
+        self.routing_index = RoutingIndex(
+            self.routing_rules,
+            config["routing_pools"],
+            config["routing_overflow"]
+        )
+
+    def build_prompt(self, transcript: str, language: str) -> str:
+        return self.prompt_template.format(language=language, transcript=transcript)
+
+    def build_batch_prompt(self, items: List[Tuple[str, str]]) -> str:
+        """Prompt classifying several (transcript, language) pairs at once; result ids are list positions."""
+        listing = [
+            {"id": position, "language": language, "transcript": transcript}
+            for position, (transcript, language) in enumerate(items)
+        ]
+        return self.batch_prompt_template.format(items=json.dumps(listing, ensure_ascii=False, indent=2))
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            "version": self.version,
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "issue_categories": self.issue_categories,
+            "routing_rules": self.routing_rules,
+            "keyword_vocabulary_size": self.keyword_classifier.vocabulary_size,
+        }
+
+
+class RuntimeConfig:
+    """
+    Holds the current ConfigSnapshot and keeps it up to date.
+
+    Sources (RUNTIME_CONFIG_SOURCE):
+    - "" (default): settings only, no watching
+    - "file": JSON document at RUNTIME_CONFIG_PATH, reloaded when its mtime changes
+    - "db": newest row of the ivr_config table, reloaded when its id changes
+
+    A background task polls the source; new documents are compiled in a worker
+    thread and swapped in with a single assignment. A bad document is logged and
+    the previous snapshot stays active.
+    """
+
+    def __init__(self):
+        self.current = ConfigSnapshot({}, "settings")
+        routing_engine.install(self.current.routing_index)
+        self._marker: Optional[Any] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # Counters
+        self.reloads = 0
+        self.failures = 0
+
+    async def start(self) -> None:
+        """Load the configured source once, then watch it."""
+        if not settings.runtime_config_source:
+            return
+        await self.reload()
+        self._task = asyncio.create_task(self._watch_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch_loop(self) -> None:
+        while True:
+            await asyncio.sleep(settings.runtime_config_poll_interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"Runtime config watch failed: {e}")
+
+    async def _fetch(self) -> Optional[Tuple[Any, Any, str]]:
+        """
+        Read the source if it changed since the last load.
+
+        Returns:
+            (marker, document, source label), or None when unchanged / unavailable
+        """
+        source = settings.runtime_config_source
+        if not source:
+            return None
+        if source == "file":
+            path = settings.runtime_config_path
+            try:
+                marker = os.stat(path).st_mtime_ns
+            except OSError as e:
+                logger.error(f"Runtime config file unavailable: {e}")
+                return None
+            if marker == self._marker:
+                return None
+
+            def read() -> Any:
+                with open(path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+
+            try:
+                document = await asyncio.to_thread(read)
+            except (OSError, ValueError) as e:
+                # Possibly caught mid-write; the marker stays unset so the next poll retries
+                self.failures += 1
+                logger.error(f"Runtime config at {path} could not be read: {e}")
+                return None
+            return marker, document, path
+
+        if source == "db":
+            row = await db_client.get_latest_config()
+            if row is None or row["id"] == self._marker:
+                return None
+            document = row["config"]
+            if isinstance(document, dict) and row["version"]:
+                document = {"version": row["version"], **document}
+            return row["id"], document, f"database:{row['id']}"
+
+        logger.error(f"Unknown RUNTIME_CONFIG_SOURCE '{source}'")
+        return None
+
+    async def reload(self) -> bool:
+        """
+        Load, compile and install the source's document if it changed.
+
+        Returns:
+            True if a new snapshot was installed
+        """
+        fetched = await self._fetch()
+        if fetched is None:
+            return False
+        marker, document, label = fetched
+
+        try:
+            if not isinstance(document, dict):
+                raise ValueError("configuration document must be a JSON object")
+            snapshot = await asyncio.to_thread(ConfigSnapshot, document, label)
+        except Exception as e:
+            self.failures += 1
+            self._marker = marker  # don't retry the same broken document every poll
+            logger.error(f"Rejected runtime config from {label}: {e}")
+            return False
+
+        # Swap: no await between these, so every request sees one version
+        routing_engine.install(snapshot.routing_index)
+        self.current = snapshot
+        self._marker = marker
+        self.reloads += 1
+        logger.info(f"Runtime config version {snapshot.version} active (from {label})")
+        return True
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Active version and reload counts.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        return {
+            "version": self.current.version,
+            "source": self.current.source,
+            "loaded_at": self.current.loaded_at,
+            "watching": self._task is not None,
+            "reloads": self.reloads,
+            "failures": self.failures,
+        }
+
+
+# Global runtime configuration
+runtime_config = RuntimeConfig()
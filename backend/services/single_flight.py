@@ -0,0 +1,63 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Tuple
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work as its own task; callers arriving
+    while it runs await the same task and get the same result (or exception).
+    The work is shielded, so the leader disconnecting does not cancel it for the
+    followers. Keys are forgotten as soon as the work finishes.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """
+        Run fn once per key at a time.
+
+        Args:
+            key: Coalescing key (e.g. audio_url or a caller-supplied idempotency key)
+            fn: Zero-argument coroutine factory doing the actual work
+
+        Returns:
+            (result, shared) - shared is True when this caller joined an execution already in flight
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if shared:
+            metrics.increment(f"{self.name}.coalesced")
+            logger.info(f"Coalesced duplicate request for {key}")
+        else:
+            metrics.increment(f"{self.name}.executions")
+            task = asyncio.create_task(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+
+        return await asyncio.shield(task), shared
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Executions, coalesced duplicates and keys currently in flight.
+
+        Returns:
+            Dict suitable for the /metrics endpoint
+        """
+        executions = metrics.counter(f"{self.name}.executions")
+        coalesced = metrics.counter(f"{self.name}.coalesced")
+        total = executions + coalesced
+        return {
+            "in_flight": len(self._in_flight),
+            "executions": executions,
+            "coalesced": coalesced,
+            "coalesced_rate": round(coalesced / total, 4) if total else 0.0,
+        }
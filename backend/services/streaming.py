@@ -0,0 +1,169 @@
+import logging
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from config import settings
+from metrics import metrics
+from models import ProcessIssueResponse, CallLog
+from services.language_detection import detect_language, confirm_language
+from services.transcription import StreamingTranscriber
+from services.classification import classify_issue
+from services.routing import determine_routing
+from services.pipeline import fallback_reason_for
+from services.runtime_config import runtime_config
+
+logger = logging.getLogger(__name__)
+
+
+class StreamingSession:
+    """
+    State for one streaming IVR call.
+
+    Audio frames and/or text partials arrive while the caller speaks. Every update
+    is re-scored with the keyword engine (microseconds), and as soon as its
+    confidence reaches early_routing_confidence a routing decision is committed,
+    possibly before the caller finishes. If no early decision was reached, the
+    full classification cascade runs on the final transcript.
+    """
+
+    def __init__(self, audio_url: Optional[str] = None, language: Optional[str] = None):
+        self.session_id = str(uuid.uuid4())
+        self.audio_url = audio_url or f"stream:{self.session_id}"
+        self.language = language
+        self.language_result: Dict[str, Any] = {"language": language, "confidence": 1.0} if language else {}
+        self.transcript = ""
+        self.transcriber: Optional[StreamingTranscriber] = None
+        # Configuration version pinned for the whole call
+        self.snapshot = runtime_config.current
+
+        self.classification: Optional[Dict[str, Any]] = None
+        self.routing: Optional[Dict[str, Any]] = None
+        self.early_decision_at: Optional[float] = None
+        self.started_at = time.perf_counter()
+
+    async def start(self) -> None:
+        """Resolve the call language (unless the client supplied it) and open the transcriber."""
+        if not self.language:
+            self.language_result = await detect_language(self.audio_url)
+            self.language = self.language_result.get("language", "Unknown")
+        self.transcriber = StreamingTranscriber(self.language)
+        metrics.increment("streaming.sessions")
+
+    @property
+    def decided(self) -> bool:
+        return self.routing is not None
+
+    async def add_audio(self, chunk: bytes) -> Optional[Dict[str, Any]]:
+        """Feed an audio frame; returns a partial update if the transcript changed."""
+        self.transcriber.feed(chunk)
+        text = await self.transcriber.partial()
+        if text and text != self.transcript:
+            return await self.update_transcript(text)
+        return None
+
+    async def update_transcript(self, text: str) -> Dict[str, Any]:
+        """
+        Record a new partial transcript and re-score it.
+
+        Returns:
+            A "partial" event, or a "routing" event when this update triggers the early decision
+        """
+        self.transcript = text
+        scored = self.snapshot.keyword_classifier.classify(text)
+
+        if not self.decided and scored["confidence"] >= settings.early_routing_confidence:
+            scored["tier"] = "keyword_streaming"
+            self.classification = scored
+            self.routing = await determine_routing(scored["category"], scored["confidence"], self.snapshot)
+            self.early_decision_at = time.perf_counter()
+            metrics.increment("streaming.early_decisions")
+            logger.info(f"Early routing decision: {scored['category']} -> {self.routing['routing_to']}")
+            return self._event("routing", early=True)
+
+        return {
+            "type": "partial",
+            "transcript": text,
+            "issue_category": scored["category"],
+            "confidence": scored["confidence"],
+        }
+
+    async def finish(self) -> Dict[str, Any]:
+        """
+        Close the session at end of speech.
+
+        Returns:
+            The "final" event with the committed routing decision
+        """
+        final_text = await self.transcriber.finalize(self.audio_url) if not self.transcript else ""
+        if final_text:
+            self.transcript = final_text
+        self.language_result = confirm_language(self.language_result, self.transcript)
+        self.language = self.language_result.get("language", self.language)
+
+        if self.early_decision_at is not None:
+            lead = time.perf_counter() - self.early_decision_at
+            metrics.observe("streaming.decision_lead", lead)
+        else:
+            self.classification = await classify_issue(self.transcript, self.language, self.snapshot)
+            self.routing = await determine_routing(
+                self.classification.get("category", "service_request"),
+                self.classification.get("confidence", 0.5),
+                self.snapshot
+            )
+
+        metrics.observe("streaming.session", time.perf_counter() - self.started_at)
+        return self._event("final", early=self.early_decision_at is not None)
+
+    def _event(self, event_type: str, early: bool) -> Dict[str, Any]:
+        response = self.to_response()
+        return {"type": event_type, "early": early, **response.model_dump()}
+
+    def to_response(self) -> ProcessIssueResponse:
+        return ProcessIssueResponse(
+            language=self.language or "Unknown",
+            transcript=self.transcript,
+            issue_category=self.classification.get("category", "service_request"),
+            confidence=self.classification.get("confidence", 0.5),
+            routing_to=self.routing.get("routing_to"),
+            fallback=self.routing.get("fallback", False),
+            fallback_reason=fallback_reason_for(self.classification, self.routing)
+        )
+
+    def to_call_log(self) -> CallLog:
+        response = self.to_response()
+        return CallLog(
+            audio_url=self.audio_url,
+            detected_language=response.language,
+            transcript=response.transcript,
+            issue_category=response.issue_category,
+            confidence=response.confidence,
+            routed_to=response.routing_to,
+            raw_ai_response={
+                "language_detection": self.language_result,
+                "classification": self.classification,
+                "routing": self.routing,
+                "config_version": self.snapshot.version,
+                "streaming": {
+                    "session_id": self.session_id,
+                    "early_decision": self.early_decision_at is not None,
+                    "audio_bytes": self.transcriber.bytes_received if self.transcriber else 0
+                }
+            }
+        )
+
+
+def get_streaming_stats() -> Dict[str, Any]:
+    """
+    Streaming session counts and how far ahead of end-of-speech decisions land.
+
+    Returns:
+        Dict suitable for the /metrics endpoint
+    """
+    return {
+        "sessions": metrics.counter("streaming.sessions"),
+        "early_decisions": metrics.counter("streaming.early_decisions"),
+        "early_routing_confidence": settings.early_routing_confidence,
+        "decision_lead": metrics.latency("streaming.decision_lead").snapshot(),
+        "session_duration": metrics.latency("streaming.session").snapshot(),
+    }
@@ -44,3 +44,34 @@ async def transcribe_audio(audio_url: str, detected_language: str = None) -> str
     except Exception as e:
         logger.error(f"Transcription failed: {e}")
         return "Audio unclear"
+
+
+class StreamingTranscriber:
+    """
+    Incremental transcriber for one streaming call.
+    
+    Receives audio frames as the caller speaks. partial() returns the best
+    transcript so far and finalize() the complete one.
+    
+    For MVP: No streaming speech-to-text backend is wired in, so partials are
+    empty and finalize() uses the same mock as transcribe_audio(). Clients that
+    run their own recognizer (e.g. the browser) send text partials instead.
+    Frames are only counted, not kept: nothing consumes them yet, and a
+    client-driven buffer would grow without bound.
+    """
+    
+    def __init__(self, language_hint: str = None):
+        self.language_hint = language_hint
+        self.bytes_received = 0
+    
+    def feed(self, chunk: bytes) -> None:
+        """Accept one audio frame."""
+        self.bytes_received += len(chunk)
+    
+    async def partial(self) -> str:
+        """Best transcript of the audio received so far."""
+        return ""
+    
+    async def finalize(self, audio_url: str) -> str:
+        """Complete transcript once the caller has finished speaking."""
+        return await transcribe_audio(audio_url, self.language_hint)
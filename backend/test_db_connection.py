@@ -3,6 +3,7 @@ Quick test script for database connection.
 Run this to verify your DATABASE_URL is working.
 """
 from database.supabase_client import db_client
+import asyncio
 import sys
 
 def main():
@@ -22,18 +23,17 @@ def main():
         print("DEBUG: connection_params is None!")
     
     try:
-        is_connected = db_client.test_connection()
+        is_connected = asyncio.run(db_client.test_connection())
         
         if is_connected:
             print("✅ Database connection successful!")
             print("\n📊 Connection Info:")
-            print(f"   Using: PostgreSQL (psycopg2)")
+            print(f"   Using: PostgreSQL (asyncpg)")
             print(f"   Status: Connected")
             
             # Try to query database
             print("\n🔍 Testing database query...")
             try:
-                import asyncio
                 calls = asyncio.run(db_client.get_recent_calls(limit=1))
                 print(f"✅ Query successful! Found {len(calls)} recent call(s)")
                 
@@ -0,0 +1,53 @@
+from services import admission
+from services.admission import AdmissionController
+
+
+def make_controller() -> AdmissionController:
+    return AdmissionController("test", initial_limit=10, min_limit=2, max_limit=12, latency_target=1.0, backoff=0.5)
+
+
+def fill(controller: AdmissionController) -> int:
+    admitted = 0
+    while controller.try_acquire():
+        admitted += 1
+    return admitted
+
+
+def test_slow_burst_decreases_limit_once_and_sheds_load(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(admission.time, "monotonic", lambda: now[0])
+    controller = make_controller()
+    assert fill(controller) == 10
+    assert controller.rejected == 1
+
+    # A burst of slow calls within one latency_target is one congestion signal
+    controller.release(latency=3.0)
+    controller.release(latency=3.0, success=False)
+    assert controller.limit == 5
+    assert controller.decreases == 1
+
+    now[0] += 1.0
+    controller.release(latency=3.0)
+    assert controller.limit == 2.5
+
+    # Seven calls are still in flight; nothing new is admitted until they drain below the limit
+    assert not controller.try_acquire()
+
+
+def test_limit_recovers_under_fast_saturated_load_and_stops_at_max(monkeypatch):
+    controller = make_controller()
+    controller.limit = 4.0
+    for _ in range(200):
+        fill(controller)
+        while controller.in_flight:
+            controller.release(latency=0.1)
+    assert controller.limit == 12
+    assert controller.decreases == 0
+
+
+def test_idle_fast_calls_do_not_grow_the_limit():
+    controller = make_controller()
+    for _ in range(50):
+        assert controller.try_acquire()
+        controller.release(latency=0.1)
+    assert controller.limit == 10
@@ -0,0 +1,144 @@
+import asyncio
+import sqlite3
+
+from database.call_log_sink import CallLogSink
+from models import CallLog
+
+
+class FakeDatabase:
+    """
+    Stands in for DatabaseClient.log_calls_idempotent: rows are keyed by id and
+    a row already present is skipped, like INSERT ... ON CONFLICT (id) DO NOTHING.
+    """
+
+    def __init__(self):
+        self.connection_params = {"dsn": "postgresql://test"}
+        self.rows = {}
+        self.reachable = True
+        self.lose_next_ack = False
+
+    async def log_calls_idempotent(self, call_logs):
+        if not self.reachable:
+            return None
+        written = 0
+        for call_log in call_logs:
+            if call_log.id not in self.rows:
+                self.rows[call_log.id] = call_log
+                written += 1
+        if self.lose_next_ack:
+            # Committed, but the answer never reached the replayer
+            self.lose_next_ack = False
+            raise ConnectionResetError("connection lost before the reply")
+        return written
+
+    async def log_call(self, call_log):
+        raise AssertionError("rows must go through the spool")
+
+
+def make_call(n: int) -> CallLog:
+    return CallLog(
+        audio_url=f"call-{n}.wav",
+        detected_language="hi",
+        transcript=f"issue {n}",
+        issue_category="billing",
+        confidence=0.9,
+        routed_to="Billing",
+    )
+
+
+def make_sink(db: FakeDatabase, path) -> CallLogSink:
+    return CallLogSink(db, batch_size=2, flush_interval=0.01, retry_max=0.02, spool_path=str(path))
+
+
+def spooled(path) -> int:
+    with sqlite3.connect(str(path)) as conn:
+        return conn.execute("SELECT COUNT(*) FROM spool").fetchone()[0]
+
+
+def test_spooled_rows_are_shipped_and_removed(tmp_path):
+    db = FakeDatabase()
+    path = tmp_path / "spool.db"
+
+    async def run():
+        sink = make_sink(db, path)
+        await sink.start()
+        for n in range(5):
+            assert await sink.submit(make_call(n))
+        await sink.stop(timeout=2)
+        return sink
+
+    sink = asyncio.run(run())
+    assert sorted(call_log.audio_url for call_log in db.rows.values()) == [f"call-{n}.wav" for n in range(5)]
+    assert sink.get_stats()["written"] == 5
+    assert spooled(path) == 0
+
+
+def test_replayed_batch_is_written_once(tmp_path):
+    db = FakeDatabase()
+    db.lose_next_ack = True
+    path = tmp_path / "spool.db"
+
+    async def run():
+        sink = make_sink(db, path)
+        await sink.start()
+        await sink.submit(make_call(0))
+        await sink.submit(make_call(1))
+        # Let the replayer back off and retry before stop() (which gives up on failures)
+        await asyncio.sleep(0.2)
+        await sink.stop(timeout=2)
+        return sink
+
+    sink = asyncio.run(run())
+    stats = sink.get_stats()
+    assert len(db.rows) == 2
+    assert stats["ship_failures"] == 1
+    assert stats["duplicates_skipped"] == 2
+    assert spooled(path) == 0
+
+
+def test_rows_left_by_a_previous_run_ship_after_restart(tmp_path):
+    db = FakeDatabase()
+    db.reachable = False
+    path = tmp_path / "spool.db"
+    calls = [make_call(n) for n in range(3)]
+
+    async def outage():
+        sink = make_sink(db, path)
+        await sink.start()
+        for call_log in calls:
+            await sink.submit(call_log)
+        await sink.stop(timeout=0.1)
+
+    asyncio.run(outage())
+    assert db.rows == {}
+    assert spooled(path) == 3
+
+    async def restart():
+        db.reachable = True
+        sink = make_sink(db, path)
+        await sink.start()
+        await sink.stop(timeout=2)
+
+    asyncio.run(restart())
+    assert set(db.rows) == {call_log.id for call_log in calls}
+    # created_at was fixed when the row was spooled, not when it was replayed
+    assert [db.rows[call_log.id].created_at for call_log in calls] == [call_log.created_at for call_log in calls]
+    assert spooled(path) == 0
+
+
+def test_submit_many_spools_a_chunk_in_one_append(tmp_path, monkeypatch):
+    db = FakeDatabase()
+    path = tmp_path / "spool.db"
+    appends = []
+
+    async def run():
+        sink = make_sink(db, path)
+        await sink.start()
+        append = sink.spool.append
+        monkeypatch.setattr(sink.spool, "append", lambda rows: appends.append(len(rows)) or append(rows))
+        assert await sink.submit_many([make_call(n) for n in range(3)]) == 3
+        await sink.stop(timeout=2)
+
+    asyncio.run(run())
+    assert appends == [3]
+    assert len(db.rows) == 3
@@ -0,0 +1,26 @@
+from services.keyword_engine import KeywordAutomaton, KeywordClassifier
+
+
+def test_automaton_reports_overlapping_and_nested_matches():
+    automaton = KeywordAutomaton({"he": "he", "she": "she", "his": "his", "hers": "hers"})
+    found = sorted((start, end, payload) for start, end, payload in automaton.find("ushers"))
+    # "she" and "he" end at the same character, "hers" overlaps both
+    assert found == [(1, 4, "she"), (2, 4, "he"), (2, 6, "hers")]
+
+
+def test_automaton_reports_every_occurrence():
+    automaton = KeywordAutomaton({"aa": "aa"})
+    assert [(start, end) for start, end, _ in automaton.find("aaaa")] == [(0, 2), (1, 3), (2, 4)]
+
+
+def test_overlapping_phrases_score_once_each_on_word_boundaries():
+    classifier = KeywordClassifier({
+        "billing": {"bill": 1.0, "bill payment": 2.0},
+        "technical": {"payment gateway": 1.5, "pay": 5.0},
+    })
+    scores, matched = classifier.score("My bill payment gateway failed, bill again")
+    assert matched["billing"] == ["bill", "bill payment"]
+    assert scores["billing"] == 3.0
+    # "pay" inside "payment" is not a whole word
+    assert matched["technical"] == ["payment gateway"]
+    assert scores["technical"] == 1.5
@@ -0,0 +1,40 @@
+import pytest
+
+from services.langid import identify_language
+
+
+@pytest.mark.parametrize("text, code", [
+    ("nahi", "hi-Latn"),
+    ("mera bill", "hi-Latn"),
+    ("mera bill galat hai", "hi-Latn"),
+    ("password reset nahi ho raha", "hi-Latn"),
+    ("mera account block ho gaya please help me", "hi-Latn"),
+    ("my bill is wrong", "en"),
+    ("please help", "en"),
+])
+def test_short_and_code_mixed_latin_text(text, code):
+    assert identify_language(text)["code"] == code
+
+
+def test_mixed_script_text_is_judged_on_its_devanagari_part():
+    assert identify_language("मेरा password reset नहीं हो रहा")["code"] == "hi"
+    assert identify_language("माझं password reset करायचं आहे")["code"] == "mr"
+
+
+def test_single_ambiguous_word_has_low_confidence():
+    # "bill" is as much Hinglish as English
+    assert identify_language("bill")["confidence"] < 0.7
+    assert identify_language("mera bill galat hai")["confidence"] > 0.9
+
+
+def test_text_without_letters_is_unknown():
+    for text in ("", "123", "   ", None):
+        result = identify_language(text)
+        assert result["code"] == "und"
+        assert result["confidence"] == 0.0
+
+
+def test_result_is_a_copy_of_the_cached_answer():
+    first = identify_language("mera bill")
+    first["code"] = "en"
+    assert identify_language("mera bill")["code"] == "hi-Latn"
@@ -0,0 +1,43 @@
+import asyncio
+
+from metrics import metrics
+from services import pipeline
+
+
+def test_discarded_speculation_records_no_transcription_sample(monkeypatch):
+    started = []
+
+    async def detect_language(audio_url):
+        await asyncio.sleep(0.01)
+        return {"language": "English", "confidence": 0.9}
+
+    async def transcribe_audio(audio_url, language):
+        started.append(language)
+        await asyncio.sleep(0.2 if language == "Hindi" else 0.01)
+        return f"{language} transcript"
+
+    monkeypatch.setattr(pipeline, "detect_language", detect_language)
+    monkeypatch.setattr(pipeline, "transcribe_audio", transcribe_audio)
+    monkeypatch.setattr(pipeline.settings, "speculative_language", "Hindi")
+    before = metrics.latency("pipeline.transcription").count
+
+    _, transcript = asyncio.run(pipeline._detect_and_transcribe("call.wav"))
+
+    assert transcript == "English transcript"
+    assert started == ["Hindi", "English"]
+    # Only the real (English) transcription is timed
+    assert metrics.latency("pipeline.transcription").count == before + 1
+
+
+def test_speculation_hit_uses_speculative_transcript(monkeypatch):
+    async def detect_language(audio_url):
+        return {"language": "hindi"}
+
+    async def transcribe_audio(audio_url, language):
+        return f"{language} transcript"
+
+    monkeypatch.setattr(pipeline, "detect_language", detect_language)
+    monkeypatch.setattr(pipeline, "transcribe_audio", transcribe_audio)
+    monkeypatch.setattr(pipeline.settings, "speculative_language", "Hindi")
+
+    assert asyncio.run(pipeline._detect_and_transcribe("call.wav"))[1] == "Hindi transcript"
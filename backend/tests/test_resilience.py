@@ -0,0 +1,210 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from services.llm_client import LLMClient
+from services.resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError, hedged
+
+
+def make_breaker(**overrides) -> CircuitBreaker:
+    options = dict(window=4, min_calls=4, failure_rate=0.5, slow_call_seconds=1.0, slow_call_rate=0.5, open_seconds=10.0)
+    options.update(overrides)
+    return CircuitBreaker("test", **options)
+
+
+def trip(breaker: CircuitBreaker) -> None:
+    for _ in range(breaker.min_calls):
+        assert breaker.allow()
+        breaker.record(False, 0.1)
+
+
+def expire(breaker: CircuitBreaker) -> None:
+    breaker._opened_at = time.monotonic() - breaker.open_seconds - 1
+
+
+def test_breaker_stays_closed_below_min_calls():
+    breaker = make_breaker()
+    for _ in range(3):
+        assert breaker.allow()
+        breaker.record(False, 0.1)
+    assert breaker.state == CLOSED
+
+
+def test_breaker_opens_on_failure_rate_and_rejects():
+    breaker = make_breaker()
+    trip(breaker)
+    assert breaker.state == OPEN
+    assert breaker.is_open
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+    assert breaker.trips == 1
+
+
+def test_breaker_opens_on_slow_call_rate():
+    breaker = make_breaker()
+    for _ in range(4):
+        assert breaker.allow()
+        breaker.record(True, 2.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_trial_success_closes():
+    breaker = make_breaker()
+    trip(breaker)
+    expire(breaker)
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()  # only one trial at a time
+    breaker.record(True, 0.1)
+    assert breaker.state == CLOSED
+    assert breaker.allow()
+
+
+def test_half_open_trial_failure_reopens():
+    breaker = make_breaker()
+    trip(breaker)
+    expire(breaker)
+    assert breaker.allow()
+    breaker.record(False, 0.1)
+    assert breaker.state == OPEN
+    assert breaker.trips == 2
+    assert not breaker.allow()
+
+
+def test_half_open_release_frees_trial_slot():
+    breaker = make_breaker()
+    trip(breaker)
+    expire(breaker)
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == HALF_OPEN
+    assert breaker.allow()
+
+
+def test_hedged_primary_wins_without_hedge():
+    async def primary():
+        return "p"
+
+    async def secondary():
+        raise AssertionError("hedge should not start")
+
+    assert asyncio.run(hedged(primary, secondary, 0.5)) == ("p", "primary")
+
+
+def test_hedged_slow_primary_loses_and_is_cancelled():
+    cancelled = []
+
+    async def primary():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+        return "p"
+
+    async def secondary():
+        return "h"
+
+    async def run():
+        result = await hedged(primary, secondary, 0.01)
+        await asyncio.sleep(0)
+        return result
+
+    assert asyncio.run(run()) == ("h", "hedge")
+    assert cancelled == [True]
+
+
+def test_hedged_falls_back_when_one_attempt_fails():
+    async def primary():
+        await asyncio.sleep(0.05)
+        return "p"
+
+    async def secondary():
+        raise RuntimeError("hedge down")
+
+    assert asyncio.run(hedged(primary, secondary, 0.01)) == ("p", "primary")
+
+
+def test_hedged_raises_primary_error_when_both_fail():
+    async def primary():
+        await asyncio.sleep(0.02)
+        raise ValueError("primary down")
+
+    async def secondary():
+        raise RuntimeError("hedge down")
+
+    with pytest.raises(ValueError):
+        asyncio.run(hedged(primary, secondary, 0.01))
+
+
+def _client_with_target(breaker: CircuitBreaker, completion):
+    client = LLMClient()
+    client._semaphore = asyncio.Semaphore(1)
+    target = SimpleNamespace(
+        name="primary",
+        model="m",
+        breaker=breaker,
+        client=SimpleNamespace(chat=SimpleNamespace(completions=SimpleNamespace(create=completion))),
+    )
+    return client, target
+
+
+def test_attempt_cancelled_while_queued_releases_trial_slot():
+    breaker = make_breaker()
+    trip(breaker)
+    expire(breaker)
+
+    async def completion(**kwargs):
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+
+    async def run():
+        client, target = _client_with_target(breaker, completion)
+        await client._semaphore.acquire()  # every slot busy
+        task = asyncio.create_task(client._attempt(target, messages=[]))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        assert breaker.state == HALF_OPEN
+        client._semaphore.release()
+        # The trial slot came back: the next call is let through and closes the breaker
+        assert await client._attempt(target, messages=[]) == "ok"
+
+    asyncio.run(run())
+    assert breaker.state == CLOSED
+
+
+def test_attempt_rejected_while_open():
+    breaker = make_breaker()
+    trip(breaker)
+
+    async def completion(**kwargs):
+        raise AssertionError("provider must not be called")
+
+    async def run():
+        client, target = _client_with_target(breaker, completion)
+        with pytest.raises(CircuitOpenError):
+            await client._attempt(target, messages=[])
+
+    asyncio.run(run())
+    assert breaker.state == OPEN
+
+
+def test_close_during_completion_releases_cleanly():
+    release = asyncio.Event()
+
+    async def completion(**kwargs):
+        await release.wait()
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="ok"))])
+
+    async def run():
+        client, target = _client_with_target(make_breaker(), completion)
+        task = asyncio.create_task(client._attempt(target, messages=[]))
+        await asyncio.sleep(0.01)
+        await client.close()  # shutdown while the completion is in flight
+        release.set()
+        return await task
+
+    assert asyncio.run(run()) == "ok"
@@ -0,0 +1,52 @@
+from services.routing_engine import RoutingEngine, RoutingIndex
+
+
+def make_engine() -> RoutingEngine:
+    engine = RoutingEngine()
+    engine.overflow_load = 5
+    engine.install(RoutingIndex(
+        {"billing": "Billing"},
+        pool_queues={"Billing": ["billing-a", "billing-b"], "Support": ["support-a"]},
+        overflow={"Billing": {"Support": 1.0}},
+    ))
+    return engine
+
+
+def test_least_loaded_queue_takes_the_call():
+    engine = make_engine()
+    engine.update_queue("billing-a", depth=6, available_agents=2)
+    engine.update_queue("billing-b", depth=1, available_agents=2)
+    assert engine.route("billing")["routing_to"] == "billing-b"
+
+
+def test_unstaffed_empty_queue_loses_to_staffed_queue():
+    engine = make_engine()
+    engine.update_queue("billing-a", depth=0, available_agents=0)
+    engine.update_queue("billing-b", depth=4, available_agents=1)
+    decision = engine.route("billing")
+    assert decision["routing_to"] == "billing-b"
+    assert not decision["overflow"]
+
+
+def test_unstaffed_pool_overflows_to_staffed_pool():
+    engine = make_engine()
+    engine.update_queue("billing-a", depth=0, available_agents=0)
+    engine.update_queue("billing-b", depth=0, available_agents=0)
+    engine.update_queue("support-a", depth=2, available_agents=1)
+    decision = engine.route("billing")
+    assert decision["routing_to"] == "support-a"
+    assert decision["overflow"]
+
+
+def test_only_unstaffed_queues_left_picks_the_shortest():
+    engine = make_engine()
+    engine.update_queue("billing-a", depth=3, available_agents=0)
+    engine.update_queue("billing-b", depth=1, available_agents=0)
+    engine.update_queue("support-a", depth=0, available_agents=0)
+    decision = engine.route("billing")
+    assert decision["routing_to"] == "billing-b"
+    assert not decision["fallback"]
+
+
+def test_unknown_category_falls_back():
+    assert make_engine().route("nope")["fallback"]
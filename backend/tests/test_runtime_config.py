@@ -0,0 +1,29 @@
+import asyncio
+
+from config import settings
+from services.runtime_config import RuntimeConfig
+
+
+def test_malformed_file_keeps_snapshot_and_retries(tmp_path, monkeypatch):
+    path = tmp_path / "ivr_config.json"
+    path.write_text('{"issue_categories": ["billing"', encoding="utf-8")
+    monkeypatch.setattr(settings, "runtime_config_source", "file")
+    monkeypatch.setattr(settings, "runtime_config_path", str(path))
+    config = RuntimeConfig()
+    before = config.current
+
+    assert asyncio.run(config.reload()) is False
+    assert config.current is before
+    assert config.failures == 1
+
+    # The writer finishes; the next poll picks the document up
+    path.write_text('{"issue_categories": ["billing", "outage"]}', encoding="utf-8")
+    assert asyncio.run(config.reload()) is True
+    assert config.current.issue_categories == ["billing", "outage"]
+
+
+def test_default_source_reload_is_a_quiet_no_op(monkeypatch, caplog):
+    monkeypatch.setattr(settings, "runtime_config_source", "")
+    config = RuntimeConfig()
+    assert asyncio.run(config.reload()) is False
+    assert "Unknown RUNTIME_CONFIG_SOURCE" not in caplog.text
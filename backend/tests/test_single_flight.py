@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from services.single_flight import SingleFlight
+
+
+def test_failure_is_shared_by_every_waiter_and_the_key_is_released():
+    flight = SingleFlight("test_flight")
+    runs = []
+
+    async def failing():
+        runs.append("failing")
+        await asyncio.sleep(0.01)
+        raise ValueError("download failed")
+
+    async def succeeding():
+        runs.append("succeeding")
+        return "routed"
+
+    async def run():
+        outcomes = await asyncio.gather(
+            *(flight.do("call-1", failing) for _ in range(3)),
+            return_exceptions=True
+        )
+        assert flight.get_stats()["in_flight"] == 0
+        # The failure is not cached: the next caller runs the work again
+        return outcomes, await flight.do("call-1", succeeding)
+
+    outcomes, retry = asyncio.run(run())
+    assert runs == ["failing", "succeeding"]
+    assert all(isinstance(outcome, ValueError) for outcome in outcomes)
+    assert len({id(outcome) for outcome in outcomes}) == 1
+    assert retry == ("routed", False)
+
+
+def test_leader_cancellation_does_not_cancel_followers():
+    flight = SingleFlight("test_flight_cancel")
+
+    async def work():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def run():
+        leader = asyncio.create_task(flight.do("call-2", work))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("call-2", work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(run()) == ("done", True)
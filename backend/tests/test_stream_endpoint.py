@@ -0,0 +1,59 @@
+import asyncio
+import json
+
+import main
+
+
+class FakeSession:
+    def __init__(self, audio_url, language):
+        self.session_id = "s1"
+        self.language = language or "en"
+        self.transcript = ""
+        self.decided = False
+
+    async def start(self):
+        pass
+
+    async def finish(self):
+        self.decided = True
+        return {"type": "final"}
+
+    def to_call_log(self):
+        return self.transcript
+
+
+class FailingCloseSocket:
+    """Client that ends the stream, then the connection breaks while the server closes it."""
+
+    def __init__(self):
+        self.sent = []
+
+    async def accept(self):
+        pass
+
+    async def receive_json(self):
+        return {"type": "start"}
+
+    async def receive(self):
+        return {"type": "websocket.receive", "text": json.dumps({"type": "end", "text": "mera bill galat hai"})}
+
+    async def send_json(self, data):
+        self.sent.append(data)
+
+    async def close(self):
+        raise RuntimeError("connection reset")
+
+
+def test_stream_session_is_logged_once_when_close_fails(monkeypatch):
+    submitted = []
+
+    async def submit(call_log):
+        submitted.append(call_log)
+        return True
+
+    monkeypatch.setattr(main, "StreamingSession", FakeSession)
+    monkeypatch.setattr(main.call_log_sink, "submit", submit)
+
+    asyncio.run(main.process_issue_stream(FailingCloseSocket()))
+
+    assert submitted == ["mera bill galat hai"]